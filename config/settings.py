@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import importlib.util
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # 他のミドルウェアを含めて計測するため、最初に置く
+    "info_share_tool_backend.middleware.TimingMiddleware",
+    # 圧縮の時間も Server-Timing に含めるため、TimingMiddleware の次に置く
+    "info_share_tool_backend.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -126,3 +131,126 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "info_share_tool_backend.User"
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # チームのシリアライズ結果(ローカルメモリはLRUで古いものから削除する)
+    # 複数プロセスで共有するときはRedisなどの共有キャッシュに置き換える
+    "teams": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "teams",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    # 認証済みのトークン
+    "tokens": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tokens",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+TEAM_CACHE_ALIAS = "teams"
+TEAM_CACHE_TIMEOUT = 300
+
+TOKEN_AUTH_CACHE_ALIAS = "tokens"
+TOKEN_AUTH_CACHE_TIMEOUT = 60
+
+# msgpack がインストールされているときのみ、Accept・Content-Type で MessagePack を選択できる
+MESSAGEPACK_ENABLED = importlib.util.find_spec("msgpack") is not None
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "info_share_tool_backend.authentication.CachedTokenAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    # JSONは orjson で出力・解析する(orjson がないときは標準の json)
+    "DEFAULT_RENDERER_CLASSES": [
+        "info_share_tool_backend.renderers.FastJSONRenderer",
+        *(
+            ["info_share_tool_backend.renderers.MessagePackRenderer"]
+            if MESSAGEPACK_ENABLED
+            else []
+        ),
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "info_share_tool_backend.renderers.FastJSONParser",
+        *(
+            ["info_share_tool_backend.renderers.MessagePackParser"]
+            if MESSAGEPACK_ENABLED
+            else []
+        ),
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+# 非同期のビューで同期処理を実行するスレッド数
+ASYNC_EXECUTOR_WORKERS = 8
+
+# 変更履歴を残す日数(compact_changes で古いものを削除する)
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# 変更の通知の配信(プロセス内のみ)
+# 複数のワーカープロセスで動かすときは ChangeLogBroker にする
+EVENT_BROKER = "info_share_tool_backend.events.LocalBroker"
+# ChangeLogBroker が変更履歴を確認する間隔(秒)
+EVENT_POLL_INTERVAL = 1.0
+# Server-Sent Eventsで変更がないときにコメントを送る間隔(秒)
+EVENT_KEEPALIVE_INTERVAL = 15
+# Server-Sent Eventsの1接続の最長時間(秒)。クライアントは再接続して続きを受け取る
+EVENT_STREAM_MAX_DURATION = 300
+
+# バックグラウンドのジョブ(run_jobs で実行する)
+# 失敗したときに実行する最大回数
+JOB_MAX_ATTEMPTS = 5
+# 再試行までの待ち時間(秒)。失敗するたびに倍にする
+JOB_RETRY_DELAY = 5
+# ワーカーがジョブを確保する時間(秒)。過ぎると他のワーカーが再実行する
+JOB_VISIBILITY_TIMEOUT = 300
+# チーム削除のジョブで1トランザクションで削除するチャネルの数
+JOB_DELETE_BATCH_SIZE = 100
+
+# レスポンスの圧縮(Accept-Encoding で選択する)
+# この大きさ(バイト)より小さいレスポンスは圧縮しない(ストリーミングは常に圧縮する)
+COMPRESSION_MIN_SIZE = 1024
+# 優先する順。br・zstd は brotli・zstandard がインストールされているときのみ使用する
+COMPRESSION_ENCODINGS = ["zstd", "br", "gzip"]
+# 圧縮レベル。大きいほど小さくなるがCPU時間が増える(bench_compression で比較する)
+COMPRESSION_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+# 閾値(ミリ秒)を超えたクエリを、呼び出し元と実行計画と一緒に記録する(None で記録しない)
+# slow_query_report で集計する
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = BASE_DIR / "slow_queries.log"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"message": {"format": "%(message)s"}},
+    "handlers": {
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            # 遅いクエリがなければファイルを作らない
+            "delay": True,
+            "formatter": "message",
+        },
+    },
+    "loggers": {
+        "info_share_tool_backend.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
@@ -0,0 +1,39 @@
+"""
+本番用のデータベースの設定
+DJANGO_SETTINGS_MODULE=config.settings_production で選択する
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# 接続をリクエストをまたいで再利用し、再利用前に死活確認する
+# (開発用の設定を書き換えないよう、コピーして変更する)
+DATABASES = {
+    **DATABASES,
+    "default": {
+        **DATABASES["default"],
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        # sqlite3モジュールのロック待ち(秒)。PRAGMA busy_timeout と合わせる
+        "OPTIONS": {"timeout": 5},
+    },
+}
+
+# 接続のたびに設定するSQLiteのPRAGMA
+# WALにより読み込みと書き込みが互いを待たなくなる
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    # 負の値はKiB単位(64MiB)
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# ロック待ちで失敗した書き込みのトランザクションを再試行する回数と初回の待ち時間(秒)
+DATABASE_BUSY_RETRIES = 5
+DATABASE_BUSY_RETRY_DELAY = 0.05
+
+# 複数のワーカープロセスに変更を通知する
+EVENT_BROKER = "info_share_tool_backend.events.ChangeLogBroker"
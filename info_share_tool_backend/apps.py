@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+
+
+class InfoShareToolBackendConfig(AppConfig):
+    name = "info_share_tool_backend"
+
+    def ready(self):
+        # シグナルの受信処理を登録する
+        from . import (  # noqa: F401
+            authentication,
+            cache,
+            counters,
+            db,
+            events,
+            jobs,
+            metrics,
+            search,
+            slow_queries,
+            tasks,
+        )
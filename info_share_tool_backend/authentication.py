@@ -0,0 +1,63 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+
+# 認証済みのトークンのキャッシュ
+# 既定はローカルメモリ(LRU・有効期限付き)。共有キャッシュを使うときは settings.CACHES に追加し、
+# TOKEN_AUTH_CACHE_ALIAS で指定する
+# ローカルメモリのときは他のプロセスの無効化が届かないため、有効期限を短くする
+TOKEN_AUTH_CACHE_ALIAS = getattr(settings, "TOKEN_AUTH_CACHE_ALIAS", DEFAULT_CACHE_ALIAS)
+TOKEN_AUTH_CACHE_TIMEOUT = getattr(settings, "TOKEN_AUTH_CACHE_TIMEOUT", 60)
+
+
+def get_token_cache():
+    return caches[TOKEN_AUTH_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    """トークンそのものをキャッシュのキーに残さないよう、ダイジェストにする"""
+    return "token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    get_token_cache().delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    トークン認証の結果(ユーザの主キーのみ)をキャッシュする
+    リクエストごとの Token と User の結合のクエリを、主キーでのユーザの取得に置き換える
+    ユーザは毎回取得するため、QuerySet.update での無効化もすぐに反映される
+    トークンの削除でキャッシュを無効にする(ユーザの削除ではトークンも連鎖して削除される)
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        user_id = get_token_cache().get(cache_key)
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            # パスワードのハッシュなどを共有キャッシュに置かないよう、主キーのみ格納する
+            get_token_cache().set(cache_key, user.pk, TOKEN_AUTH_CACHE_TIMEOUT)
+            return (user, token)
+
+        user = User.objects.filter(pk=user_id).first()
+        if user is None or not user.is_active:
+            get_token_cache().delete(cache_key)
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        # トークンは取得しない(キーとユーザのみ持つ)
+        return (user, Token(key=key, user=user))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
@@ -0,0 +1,75 @@
+from django.test import Client, override_settings
+
+from ..compression import CODECS
+from .endpoints import _send, run_scenario
+
+
+# 形式ごとに比較する圧縮レベル(速さ重視・既定・圧縮率重視)
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 11), "zstd": (1, 3, 9)}
+
+# 転送時間を見積もる帯域(Mbps)
+BANDWIDTHS = (1, 10, 100)
+
+
+def variants(encodings=None):
+    """比較する (形式, レベル)。identity は圧縮しない場合"""
+    names = [name for name in encodings or LEVELS if name in CODECS]
+    return [("identity", None)] + [(name, level) for name in names for level in LEVELS[name]]
+
+
+def _response_size(scenario, headers):
+    path, data = scenario.requests(1)[0]
+    response = _send(Client(headers=headers), scenario.method, path, data)
+    return len(response.content), response.get("Content-Encoding", "identity")
+
+
+def run_compression(scenarios, iterations, warmup=3, encodings=None, bandwidths=BANDWIDTHS):
+    """
+    GETのシナリオごとに、圧縮の形式・レベルごとのレイテンシとレスポンスのサイズを計測する
+    レイテンシに帯域ごとの転送時間を加えた値で、CPU時間と転送量の兼ね合いを比較する
+    圧縮しない場合との比(サイズ・レイテンシ)を付与する
+    """
+    results = []
+    for scenario in scenarios:
+        if scenario.method != "GET":
+            continue
+        rows = []
+        for encoding, level in variants(encodings):
+            headers = {"Accept-Encoding": encoding}
+            with override_settings(
+                COMPRESSION_ENCODINGS=[] if level is None else [encoding],
+                COMPRESSION_LEVELS={} if level is None else {encoding: level},
+            ):
+                latency = run_scenario(
+                    scenario,
+                    iterations,
+                    warmup,
+                    query_samples=0,
+                    memory_samples=0,
+                    headers=headers,
+                )["latency"]
+                size, applied = _response_size(scenario, headers)
+            rows.append(
+                {
+                    "encoding": encoding,
+                    "level": level,
+                    # 閾値より小さい・小さくならないときは圧縮されない
+                    "applied": applied,
+                    "bytes": size,
+                    "latency": latency,
+                    "transfer_ms": {
+                        f"{mbps}mbps": round(
+                            latency["p50_ms"] + size * 8 / (mbps * 1000), 3
+                        )
+                        for mbps in bandwidths
+                    },
+                }
+            )
+        baseline = rows[0]
+        for row in rows:
+            row["size_ratio"] = round(row["bytes"] / baseline["bytes"], 3)
+            row["latency_ratio"] = round(
+                row["latency"]["p50_ms"] / baseline["latency"]["p50_ms"], 3
+            )
+        results.append({"name": scenario.name, "results": rows})
+    return results
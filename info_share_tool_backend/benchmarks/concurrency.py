@@ -0,0 +1,169 @@
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+
+from .endpoints import build_scenarios
+from .utils import summarize
+
+
+# 同時実行で計測するシナリオ(登録・更新はSQLiteの書き込みロックで直列化されるため除く)
+CONCURRENCY_SCENARIOS = ("team_detail", "team_list", "team_list_search", "channel_detail")
+
+# 非同期のビューのURLの接頭辞
+ASYNC_PREFIX = "/async"
+
+
+def build_requests(seed=0, names=CONCURRENCY_SCENARIOS):
+    """
+    シナリオ名と、リクエストを生成する関数の組を返す
+    同期・非同期のビューは同じパス・パラメタで呼び出す
+    """
+    scenarios = {scenario.name: scenario for scenario in build_scenarios(seed=seed)}
+    return [(name, scenarios[name].requests) for name in names]
+
+
+def _wsgi_environ(path, params):
+    return {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": urlencode(params or {}),
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "testserver",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+
+def _wsgi_request(app, path, params):
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(" ", 1)[0]))
+
+    body = app(_wsgi_environ(path, params), start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    return statuses[0]
+
+
+def _asgi_scope(path, params):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+
+
+async def _asgi_request(app, path, params):
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    disconnected = asyncio.Event()
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # レスポンスを返し終えるまで切断しない
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(_asgi_scope(path, params), receive, send)
+    disconnected.set()
+    return statuses[0]
+
+
+def _result(interface, concurrency, elapsed, samples, statuses):
+    return {
+        "interface": interface,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else None,
+        "latency": summarize(samples),
+        "errors": sum(1 for status in statuses if status >= 400),
+    }
+
+
+def run_wsgi(requests, concurrency):
+    """WSGIのハンドラを concurrency 個のスレッドから呼び出す"""
+    app = get_wsgi_application()
+
+    def send(request):
+        path, params = request
+        started = time.perf_counter()
+        status = _wsgi_request(app, path, params)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests))
+    elapsed = time.perf_counter() - started
+    return _result(
+        "wsgi",
+        concurrency,
+        elapsed,
+        [sample for sample, _ in results],
+        [status for _, status in results],
+    )
+
+
+def run_asgi(requests, concurrency):
+    """ASGIのハンドラを1つのイベントループで concurrency 件ずつ同時に呼び出す"""
+    app = get_asgi_application()
+    samples, statuses = [], []
+
+    async def worker(queue):
+        while queue:
+            path, params = queue.pop()
+            started = time.perf_counter()
+            status = await _asgi_request(app, ASYNC_PREFIX + path, params)
+            samples.append(time.perf_counter() - started)
+            statuses.append(status)
+
+    async def main():
+        queue = list(reversed(requests))
+        await asyncio.gather(*(worker(queue) for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - started
+    return _result("asgi", concurrency, elapsed, samples, statuses)
+
+
+def run_concurrency(name, make_requests, count, concurrency, warmup=10):
+    """同じリクエストをWSGI・ASGIで実行し、スループットを比較する"""
+    results = []
+    for runner in (run_wsgi, run_asgi):
+        runner(make_requests(warmup), min(concurrency, warmup))
+        result = runner(make_requests(count), concurrency)
+        results.append({"name": name, **result})
+    return results
@@ -0,0 +1,114 @@
+import importlib
+import json
+import multiprocessing
+import random
+import time
+
+from django.db import OperationalError, connections
+from django.test import Client, override_settings
+
+from ..db import is_busy_error
+from ..models import TeamAdministrator, User
+from .utils import summarize
+
+
+def database_profiles():
+    """
+    比較するデータベースの設定
+    default は開発用の設定(ロールバックジャーナル、再試行なし)、
+    production は config.settings_production の設定
+    """
+    production = importlib.import_module("config.settings_production")
+    return {
+        "default": {
+            "pragmas": {"journal_mode": "DELETE"},
+            "retries": 0,
+            "conn_max_age": 0,
+        },
+        "production": {
+            "pragmas": production.SQLITE_PRAGMAS,
+            "retries": production.DATABASE_BUSY_RETRIES,
+            "conn_max_age": production.DATABASES["default"]["CONN_MAX_AGE"],
+        },
+    }
+
+
+def _worker(args):
+    """
+    1プロセス分の書き込みを実行する
+    チームの作成と、プロセスごとのチームの更新(メンバの入れ替え)を交互に行う
+    """
+    profile, team_id, operator, usernames, count, seed = args
+    rng = random.Random(seed)
+    connections["default"].settings_dict["CONN_MAX_AGE"] = profile["conn_max_age"]
+    settings = override_settings(
+        SQLITE_PRAGMAS=profile["pragmas"], DATABASE_BUSY_RETRIES=profile["retries"]
+    )
+    settings.enable()
+
+    client = Client()
+    samples, busy, errors = [], 0, 0
+    for i in range(count):
+        data = {
+            "name": f"書き込み{seed}-{i}",
+            "description": "書き込みの競合の計測",
+            "operator_user": operator,
+            "administrators": [operator],
+            "members": rng.sample(usernames, 10),
+        }
+        path = "/team/" if i % 2 == 0 else f"/team/{team_id}"
+        method = client.post if i % 2 == 0 else client.put
+        started = time.perf_counter()
+        try:
+            response = method(path, json.dumps(data), content_type="application/json")
+        except OperationalError as exc:
+            if is_busy_error(exc):
+                busy += 1
+            else:
+                errors += 1
+            continue
+        if response.status_code >= 400:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - started)
+
+    settings.disable()
+    connections.close_all()
+    return samples, busy, errors
+
+
+def run_contention(profile_name, profile, processes, transactions, seed=0):
+    """
+    複数のプロセスから同時に書き込み、成功したトランザクションのスループットと
+    ロック待ちで失敗した件数を計測する
+    """
+    usernames = list(User.objects.values_list("username", flat=True)[:1000])
+    teams = list(
+        TeamAdministrator.objects.order_by("team_id").values_list("team_id", "admin_id")[
+            :processes
+        ]
+    )
+    # 子プロセスに接続を引き継がない
+    connections.close_all()
+
+    args = [
+        (profile, team_id, operator, usernames, transactions, seed + i)
+        for i, (team_id, operator) in enumerate(teams)
+    ]
+    context = multiprocessing.get_context("fork")
+    started = time.perf_counter()
+    with context.Pool(len(args)) as pool:
+        results = pool.map(_worker, args)
+    elapsed = time.perf_counter() - started
+
+    samples = [sample for result in results for sample in result[0]]
+    return {
+        "profile": profile_name,
+        "processes": len(args),
+        "transactions": len(args) * transactions,
+        "succeeded": len(samples),
+        "busy_errors": sum(result[1] for result in results),
+        "other_errors": sum(result[2] for result in results),
+        "throughput_tps": round(len(samples) / elapsed, 1),
+        "latency": summarize(samples),
+    }
@@ -0,0 +1,226 @@
+import bisect
+import itertools
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from rest_framework.authtoken.models import Token
+
+from .. import search
+from ..counters import repair_team_counters
+from ..models import (
+    Channel,
+    ChannelMember,
+    Team,
+    TeamAdministrator,
+    TeamMember,
+    User,
+)
+
+
+BENCHMARK_PASSWORD = "password"
+
+
+class SyntheticDataGenerator:
+    """
+    ユーザ・チーム・管理者・メンバ・チャネル・チャネルメンバの合成データを登録する
+
+    - チームの人数はパレート分布(べき乗則)に従い、少数の大きなチームと多数の小さなチームになる
+    - 所属するユーザも偏りを持たせ、一部のユーザが多くのチームに所属する
+    - チャネルは人数の多いチームほど多く作成する
+    - 同じシードからは同じデータを生成する
+    - パスワードのハッシュ化は1回だけ行い、全ユーザで共有する
+    - 所属の行はモデルを経由せず、バッチごとにまとめて登録する
+    """
+
+    def __init__(
+        self,
+        users=50000,
+        teams=5000,
+        channels=50000,
+        seed=0,
+        batch_size=5000,
+        team_size_alpha=1.5,
+        min_team_size=3,
+        max_team_size=5000,
+        user_skew=0.8,
+        prefix="user",
+        password=BENCHMARK_PASSWORD,
+        with_tokens=False,
+        log=None,
+    ):
+        self.users = users
+        self.teams = teams
+        self.channels = channels
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.team_size_alpha = team_size_alpha
+        self.min_team_size = min_team_size
+        self.max_team_size = min(max_team_size, users)
+        self.user_skew = user_skew
+        self.prefix = prefix
+        self.password = password
+        self.with_tokens = with_tokens
+        self.log = log or (lambda message: None)
+        self.stats = {}
+
+    def generate(self):
+        started = time.perf_counter()
+        with transaction.atomic():
+            usernames = self.create_users()
+            team_users = self.create_teams(usernames)
+            self.create_channels(team_users)
+            # bulk_createはシグナルを送らないため、インデックスと件数を作り直す
+            search.rebuild_index()
+            repair_team_counters(batch_size=self.batch_size)
+        self.stats["seconds"] = round(time.perf_counter() - started, 1)
+        return self.stats
+
+    def create_users(self):
+        password = make_password(self.password)
+        usernames = [f"{self.prefix}{i:07}" for i in range(self.users)]
+        self._bulk_create(
+            User,
+            (
+                User(username=username, email=f"{username}@sample.com", password=password)
+                for username in usernames
+            ),
+        )
+        if self.with_tokens:
+            self._bulk_create(
+                Token,
+                (Token(key=Token.generate_key(), user_id=username) for username in usernames),
+            )
+        self.stats["users"] = len(usernames)
+        self.log(f"users: {len(usernames)}")
+        return usernames
+
+    def create_teams(self, usernames):
+        sizes = [self._team_size() for _ in range(self.teams)]
+        teams = self._bulk_create(
+            Team,
+            (
+                Team(name=f"チーム{i}", description=f"{size}人のチーム")
+                for i, size in enumerate(sizes)
+            ),
+        )
+
+        # 先頭のユーザほど多くのチームに所属するよう重み付けする
+        cum_weights = list(
+            itertools.accumulate(1 / (i + 1) ** self.user_skew for i in range(len(usernames)))
+        )
+
+        team_users = {}
+        admin_count = member_count = 0
+        admins, members = [], []
+        for team, size in zip(teams, sizes):
+            sampled = self._sample_users(usernames, cum_weights, size)
+            admin_size = 1 + size // 20
+            admins.extend((team.pk, username) for username in sampled[:admin_size])
+            members.extend((team.pk, username) for username in sampled[admin_size:])
+            team_users[team.pk] = sampled
+            if len(admins) + len(members) >= self.batch_size:
+                admin_count += self._flush(TeamAdministrator, ("team", "admin"), admins)
+                member_count += self._flush(TeamMember, ("team", "member"), members)
+        admin_count += self._flush(TeamAdministrator, ("team", "admin"), admins)
+        member_count += self._flush(TeamMember, ("team", "member"), members)
+
+        self.stats.update(
+            teams=len(teams),
+            team_administrators=admin_count,
+            team_members=member_count,
+            max_team_size=max(sizes, default=0),
+        )
+        self.log(f"teams: {len(teams)}, administrators: {admin_count}, members: {member_count}")
+        return team_users
+
+    def create_channels(self, team_users):
+        team_ids = list(team_users)
+        if not team_ids:
+            return
+        # 人数の多いチームほどチャネルを多く作成する(人数の平方根に比例)
+        channel_teams = self.rng.choices(
+            team_ids,
+            weights=[len(team_users[team_id]) ** 0.5 for team_id in team_ids],
+            k=self.channels,
+        )
+        channels = self._bulk_create(
+            Channel,
+            (
+                Channel(
+                    name=f"チャネル{i}",
+                    team_id=team_id,
+                    description=f"チャネル{i}",
+                    creator_id=team_users[team_id][0],
+                )
+                for i, team_id in enumerate(channel_teams)
+            ),
+        )
+
+        count = 0
+        channel_members = []
+        for channel in channels:
+            candidates = team_users[channel.team_id]
+            # チームの一部のメンバのみ所属するチャネルを多くする
+            size = max(1, int(len(candidates) * self.rng.random() ** 2))
+            channel_members.extend(
+                (channel.pk, username) for username in self.rng.sample(candidates, size)
+            )
+            if len(channel_members) >= self.batch_size:
+                count += self._flush(ChannelMember, ("channel", "member"), channel_members)
+        count += self._flush(ChannelMember, ("channel", "member"), channel_members)
+
+        self.stats.update(channels=len(channels), channel_members=count)
+        self.log(f"channels: {len(channels)}, channel members: {count}")
+
+    def _team_size(self):
+        size = int(self.min_team_size * self.rng.paretovariate(self.team_size_alpha))
+        return max(1, min(size, self.max_team_size))
+
+    def _sample_users(self, usernames, cum_weights, size):
+        # 重み付きで多めに選び、重複を除いて size 人にする
+        total = cum_weights[-1]
+        sampled = dict.fromkeys(
+            usernames[bisect.bisect_left(cum_weights, self.rng.random() * total)]
+            for _ in range(size * 2)
+        )
+        sampled = list(sampled)[:size]
+        while len(sampled) < size:
+            username = self.rng.choice(usernames)
+            if username not in sampled:
+                sampled.append(username)
+        return sampled
+
+    def _bulk_create(self, model, objs):
+        created = []
+        while True:
+            batch = list(itertools.islice(objs, self.batch_size))
+            if not batch:
+                break
+            created.extend(model.objects.bulk_create(batch))
+        if created and created[-1].pk is None:
+            # 登録した行の主キーを返せないバックエンドでは登録順に取得し直す
+            pks = model.objects.order_by("-pk").values_list("pk", flat=True)[: len(created)]
+            for obj, pk in zip(created, reversed(list(pks))):
+                obj.pk = pk
+        return created
+
+    @staticmethod
+    def _flush(model, fields, rows):
+        """
+        所属の行をまとめて登録する
+        行数が多いため、モデルのインスタンスを作らずにexecutemanyで登録する
+        """
+        count = len(rows)
+        if rows:
+            columns = [model._meta.get_field(field).column for field in fields]
+            placeholders = ", ".join(["%s"] * len(columns))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {model._meta.db_table} ({', '.join(columns)}) "
+                    f"VALUES ({placeholders})",
+                    rows,
+                )
+        rows.clear()
+        return count
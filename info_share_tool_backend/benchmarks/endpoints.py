@@ -0,0 +1,326 @@
+import itertools
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.db.models import Count, F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from ..models import Channel, ChannelMember, Team, TeamAdministrator, TeamMember, User
+from .dataset import BENCHMARK_PASSWORD
+from .utils import summarize
+
+
+class Scenario:
+    """
+    ベンチマークの1シナリオ
+    requests(count) は1リクエストごとの (パス, データ) を count 件返す
+    """
+
+    def __init__(self, name, method, requests):
+        self.name = name
+        self.method = method
+        self.requests = requests
+
+
+def _alternate(*values):
+    cycle = itertools.cycle(values)
+    return lambda: next(cycle)
+
+
+def build_scenarios(seed=0):
+    """登録済みのデータから、urls.py の各URLのシナリオを組み立てる"""
+    rng = random.Random(seed)
+    usernames = list(User.objects.order_by("username").values_list("username", flat=True))
+
+    # 所属チームが最も多いユーザでチーム一覧を取得する
+    busiest = (
+        TeamMember.objects.values("member")
+        .annotate(teams=Count("id"))
+        .order_by("-teams")
+        .first()["member"]
+    )
+
+    # 人数が最も多いチームで詳細・更新を計測する
+    team_id = (
+        TeamMember.objects.values("team")
+        .annotate(members=Count("id"))
+        .order_by("-members")
+        .first()["team"]
+    )
+    operator = (
+        TeamAdministrator.objects.filter(team_id=team_id).order_by("id").first().admin_id
+    )
+    team_users = list(
+        TeamMember.objects.filter(team_id=team_id).values_list("member_id", flat=True)
+    )
+    channel_member = (
+        ChannelMember.objects.filter(channel__team_id=team_id).order_by("id").first()
+    )
+    channel_id = channel_member.channel_id
+
+    def team_data(members):
+        return {
+            "name": "ベンチマーク用のチーム",
+            "description": "ベンチマーク用のチーム",
+            "operator_user": operator,
+            "administrators": [operator],
+            "members": members,
+        }
+
+    def channel_data(members):
+        return {
+            "name": "ベンチマーク用のチャネル",
+            "team": team_id,
+            "description": "ベンチマーク用のチャネル",
+            "operator_user": operator,
+            "members": members,
+        }
+
+    def create_teams(count):
+        teams = Team.objects.bulk_create(
+            [
+                Team(
+                    name="削除用のチーム",
+                    description="削除用のチーム",
+                    admin_count=1,
+                    member_count=len(team_users),
+                )
+                for _ in range(count)
+            ]
+        )
+        ids = [team.pk for team in teams]
+        TeamAdministrator.objects.bulk_create(
+            [TeamAdministrator(team_id=id, admin_id=operator) for id in ids]
+        )
+        TeamMember.objects.bulk_create(
+            [
+                TeamMember(team_id=id, member_id=username)
+                for id in ids
+                for username in team_users
+            ]
+        )
+        return ids
+
+    def create_channels(count):
+        channels = Channel.objects.bulk_create(
+            [
+                Channel(
+                    name="削除用のチャネル",
+                    team_id=team_id,
+                    description="削除用のチャネル",
+                    creator_id=operator,
+                )
+                for _ in range(count)
+            ]
+        )
+        Team.objects.filter(pk=team_id).update(channel_count=F("channel_count") + count)
+        return [channel.pk for channel in channels]
+
+    signup_counter = itertools.count()
+    members_a = team_users
+    members_b = team_users[: len(team_users) // 2] + rng.sample(usernames, 5)
+    team_members = _alternate(members_a, members_b)
+    channel_members = _alternate(team_users[:5], team_users[5:10])
+
+    list_params = {"operator_user": busiest}
+
+    return [
+        Scenario(
+            "signup",
+            "POST",
+            lambda n: [
+                (
+                    "/signup/",
+                    {
+                        "username": f"signup{i:07}",
+                        "password": BENCHMARK_PASSWORD,
+                        "email": f"signup{i:07}@sample.com",
+                    },
+                )
+                for i in itertools.islice(signup_counter, n)
+            ],
+        ),
+        Scenario(
+            "user_detail",
+            "GET",
+            lambda n: [(f"/user/{rng.choice(usernames)}", None) for _ in range(n)],
+        ),
+        Scenario(
+            "api_token_auth",
+            "POST",
+            lambda n: [
+                ("/api-token-auth/", {"username": operator, "password": BENCHMARK_PASSWORD})
+            ]
+            * n,
+        ),
+        Scenario(
+            "team_create",
+            "POST",
+            lambda n: [("/team/", team_data(rng.sample(usernames, 20))) for _ in range(n)],
+        ),
+        Scenario(
+            "team_detail",
+            "GET",
+            lambda n: [(f"/team/{team_id}", {"operator_user": operator})] * n,
+        ),
+        Scenario(
+            "team_update",
+            "PUT",
+            lambda n: [(f"/team/{team_id}", team_data(team_members())) for _ in range(n)],
+        ),
+        Scenario(
+            "team_delete",
+            "DELETE",
+            lambda n: [
+                (f"/team/{id}", {"operator_user": operator}) for id in create_teams(n)
+            ],
+        ),
+        Scenario("team_list", "GET", lambda n: [("/team/list", list_params)] * n),
+        Scenario(
+            "team_list_sort_name",
+            "GET",
+            lambda n: [
+                ("/team/list", {**list_params, "sort": "name", "order": "DESC"})
+            ]
+            * n,
+        ),
+        Scenario(
+            "team_list_search",
+            "GET",
+            lambda n: [("/team/list", {**list_params, "search_keyword": "チーム1"})] * n,
+        ),
+        Scenario(
+            "team_list_search_short",
+            "GET",
+            lambda n: [("/team/list", {**list_params, "search_keyword": "1"})] * n,
+        ),
+        Scenario(
+            "channel_create",
+            "POST",
+            lambda n: [("/channel/", channel_data(channel_members())) for _ in range(n)],
+        ),
+        Scenario(
+            "channel_detail",
+            "GET",
+            lambda n: [
+                (f"/channel/{channel_id}", {"operator_user": channel_member.member_id})
+            ]
+            * n,
+        ),
+        Scenario(
+            "channel_list",
+            "GET",
+            lambda n: [("/channel/list", {"operator_user": busiest})] * n,
+        ),
+        Scenario(
+            "team_channels",
+            "GET",
+            lambda n: [(f"/team/{team_id}/channels", {"operator_user": operator})] * n,
+        ),
+        Scenario(
+            "channel_update",
+            "PUT",
+            lambda n: [
+                (f"/channel/{channel_id}", channel_data(channel_members()))
+                for _ in range(n)
+            ],
+        ),
+        Scenario(
+            "channel_delete",
+            "DELETE",
+            lambda n: [
+                (f"/channel/{id}", {"operator_user": operator})
+                for id in create_channels(n)
+            ],
+        ),
+    ]
+
+
+def _send(client, method, path, data):
+    if method == "GET":
+        return client.get(path, data)
+    return client.generic(
+        method, path, json.dumps(data), content_type="application/json"
+    )
+
+
+def run_scenario(
+    scenario, iterations, warmup=3, query_samples=5, memory_samples=5, headers=None
+):
+    """
+    シナリオを実行し、レイテンシ・クエリ数・ピークメモリを計測する
+    計測の影響を避けるため、それぞれ別のリクエストで計測する
+    headers はすべてのリクエストに付与する(認証ヘッダなど)
+    """
+    client = Client(headers=headers)
+    requests = scenario.requests(warmup + iterations + query_samples + memory_samples)
+    requests = iter(requests)
+    statuses = []
+
+    def send(path, data):
+        response = _send(client, scenario.method, path, data)
+        statuses.append(response.status_code)
+
+    for path, data in itertools.islice(requests, warmup):
+        send(path, data)
+
+    samples = []
+    for path, data in itertools.islice(requests, iterations):
+        started = time.perf_counter()
+        send(path, data)
+        samples.append(time.perf_counter() - started)
+
+    query_counts = []
+    for path, data in itertools.islice(requests, query_samples):
+        with CaptureQueriesContext(connection) as queries:
+            send(path, data)
+        query_counts.append(len(queries.captured_queries))
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for path, data in itertools.islice(requests, memory_samples):
+            tracemalloc.reset_peak()
+            send(path, data)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": scenario.name,
+        "method": scenario.method,
+        "route": resolve(path).route,
+        "latency": summarize(samples),
+        "queries": statistics.median(query_counts) if query_counts else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "errors": sum(1 for status in statuses if status >= 400),
+    }
+
+
+def compare(report, baseline):
+    """前回の計測結果とのp50・クエリ数の差分を返す"""
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    rows = []
+    for result in report["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        p50 = result["latency"]["p50_ms"]
+        before_p50 = before["latency"]["p50_ms"]
+        rows.append(
+            {
+                "name": result["name"],
+                "p50_ms": p50,
+                "baseline_p50_ms": before_p50,
+                "p50_ratio": round(p50 / before_p50, 3) if before_p50 else None,
+                "queries": result["queries"],
+                "baseline_queries": before["queries"],
+            }
+        )
+    return rows
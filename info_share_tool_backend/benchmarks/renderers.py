@@ -0,0 +1,68 @@
+import io
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .. import renderers
+from ..cache import serialize_teams
+from ..models import Team
+from .utils import measure, summarize
+
+
+def renderer_classes():
+    """比較する出力・解析の形式(msgpack がないときは MessagePack を除く)"""
+    classes = {
+        "json": (JSONRenderer, JSONParser),
+        "orjson": (renderers.FastJSONRenderer, renderers.FastJSONParser),
+    }
+    if renderers.msgpack is not None:
+        classes["msgpack"] = (renderers.MessagePackRenderer, renderers.MessagePackParser)
+    return classes
+
+
+def build_payloads(page_size):
+    """
+    計測するレスポンス
+    - team_list: メンバの多い順のチーム一覧の1ページ
+    - team_members: 最もメンバの多いチーム1件
+    """
+    teams = list(Team.objects.order_by("-member_count", "id")[:page_size])
+    data = serialize_teams(teams)
+    return {
+        "team_list": {"next": None, "previous": None, "results": data},
+        "team_members": data[0],
+    }
+
+
+def run_renderers(payloads, iterations, warmup=3):
+    """
+    レスポンスごとに、形式ごとの出力・解析の時間とサイズを計測する
+    DRFのJSONRendererとの比(時間・サイズ)を付与する
+    """
+    results = []
+    for name, payload in payloads.items():
+        by_format = {}
+        for format_name, (renderer_class, parser_class) in renderer_classes().items():
+            renderer = renderer_class()
+            parser = parser_class()
+            content = renderer.render(payload)
+            by_format[format_name] = {
+                "format": format_name,
+                "bytes": len(content),
+                "encode": summarize(
+                    measure(lambda: renderer.render(payload), iterations, warmup)
+                ),
+                "decode": summarize(
+                    measure(
+                        lambda: parser.parse(io.BytesIO(content)), iterations, warmup
+                    )
+                ),
+            }
+        baseline = by_format["json"]
+        for result in by_format.values():
+            result["encode_ratio"] = round(
+                result["encode"]["p50_ms"] / baseline["encode"]["p50_ms"], 3
+            )
+            result["size_ratio"] = round(result["bytes"] / baseline["bytes"], 3)
+        results.append({"name": name, "results": list(by_format.values())})
+    return results
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+
+from ..authentication import CachedTokenAuthentication, get_token_cache
+from .endpoints import run_scenario
+
+
+# 比較する認証クラス
+AUTHENTICATION_CLASSES = {
+    "token": TokenAuthentication,
+    "cached_token": CachedTokenAuthentication,
+}
+
+# 認証して計測するシナリオ(参照系のチーム・チャネルのエンドポイント)
+TOKEN_AUTH_SCENARIOS = [
+    "team_detail",
+    "team_list",
+    "channel_detail",
+    "channel_list",
+    "team_channels",
+]
+
+
+def run_token_auth(scenarios, iterations, warmup=3):
+    """
+    トークン認証のヘッダを付けて、認証クラスごとにシナリオを計測する
+    シナリオごとに、キャッシュによるp50とクエリ数の差分を返す
+    """
+    key = Token.objects.order_by("key").values_list("key", flat=True).first()
+    headers = {"Authorization": f"Token {key}"}
+
+    results = []
+    for scenario in scenarios:
+        by_class = {}
+        for name, authentication_class in AUTHENTICATION_CLASSES.items():
+            get_token_cache().clear()
+            # 認証クラスを指定していないビューは APIView の既定値を使う
+            with mock.patch.object(
+                APIView, "authentication_classes", [authentication_class]
+            ):
+                result = run_scenario(scenario, iterations, warmup, headers=headers)
+            by_class[name] = {**result, "authentication": name}
+        token, cached = by_class["token"], by_class["cached_token"]
+        results.append(
+            {
+                "name": scenario.name,
+                "results": list(by_class.values()),
+                "p50_saving_ms": round(
+                    token["latency"]["p50_ms"] - cached["latency"]["p50_ms"], 3
+                ),
+                "query_saving": token["queries"] - cached["queries"],
+            }
+        )
+    return results
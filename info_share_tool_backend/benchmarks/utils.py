@@ -0,0 +1,101 @@
+import datetime
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+def summarize(samples):
+    """計測値(秒)のリストからレイテンシの統計値(ミリ秒)を算出する"""
+    samples_ms = sorted(sample * 1000 for sample in samples)
+    if not samples_ms:
+        return {"count": 0}
+    if len(samples_ms) > 1:
+        quantiles = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    else:
+        quantiles = samples_ms * 99
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "p50_ms": round(quantiles[49], 3),
+        "p90_ms": round(quantiles[89], 3),
+        "p95_ms": round(quantiles[94], 3),
+        "p99_ms": round(quantiles[98], 3),
+        "max_ms": round(samples_ms[-1], 3),
+    }
+
+
+def measure(func, iterations, warmup=1):
+    """関数を繰り返し実行し、1回ごとの実行時間(秒)のリストを返す"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+@contextmanager
+def benchmark_database(keepdb=False, verbosity=0, test_name=None):
+    """
+    ベンチマーク用のデータベースを作成する
+    開発用のデータベースを汚さないよう、テスト用データベースを使う
+    複数のプロセスから接続するときは test_name にファイル名を指定する
+    """
+    # テストクライアントのホスト(testserver)を許可する
+    setup_test_environment(debug=settings.DEBUG)
+    old_name = connection.settings_dict["NAME"]
+    old_test_name = connection.settings_dict["TEST"].get("NAME")
+    if test_name is not None:
+        connection.settings_dict["TEST"]["NAME"] = test_name
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, keepdb=keepdb, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity, keepdb)
+        connection.settings_dict["TEST"]["NAME"] = old_test_name
+        teardown_test_environment()
+
+
+def environment():
+    """比較のため、計測した環境の情報を返す"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def write_report(report, output=None, stdout=None):
+    """計測結果をJSONで出力する"""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if stdout is not None:
+        stdout.write(text)
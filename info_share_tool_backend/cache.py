@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db.models import prefetch_related_objects
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Team, TeamAdministrator, TeamMember
+
+
+# チームのシリアライズ結果のキャッシュ
+# 既定はローカルメモリ(LRU)。共有キャッシュを使うときは settings.CACHES に追加し、
+# TEAM_CACHE_ALIAS で指定する
+TEAM_CACHE_ALIAS = getattr(settings, "TEAM_CACHE_ALIAS", DEFAULT_CACHE_ALIAS)
+TEAM_CACHE_TIMEOUT = getattr(settings, "TEAM_CACHE_TIMEOUT", 300)
+
+
+def get_team_cache():
+    return caches[TEAM_CACHE_ALIAS]
+
+
+def team_cache_key(team_id):
+    return f"team:{team_id}"
+
+
+def get_cached_teams(teams):
+    """
+    キャッシュ済みのシリアライズ結果をまとめて取得する
+    キャッシュにはバージョンと一緒に格納し、チームのバージョンと一致するもののみ返す
+    """
+    if not teams:
+        return {}
+    keys = {team_cache_key(team.pk): team for team in teams}
+    cached = get_team_cache().get_many(keys)
+    results = {}
+    for key, (version, data) in cached.items():
+        team = keys[key]
+        if version == team.version:
+            results[team.pk] = data
+    return results
+
+
+def set_cached_teams(teams, data):
+    get_team_cache().set_many(
+        {
+            team_cache_key(team.pk): (team.version, dict(team_data))
+            for team, team_data in zip(teams, data)
+        },
+        timeout=TEAM_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_team(team_id):
+    get_team_cache().delete(team_cache_key(team_id))
+
+
+def serialize_teams(teams, context=None):
+    """
+    チームをシリアライズする
+    キャッシュにないチームのみ管理者・メンバを先読みしてシリアライズする
+    context の fieldset で項目を選択したときは、選択した関連のみ先読みする
+    キャッシュにはすべての項目の結果のみ格納し、選択したときは項目を絞り込んで使う
+    """
+    from .serializers import TeamSerializer
+
+    fieldset = (context or {}).get("fieldset")
+    cached = get_cached_teams(teams)
+    missing = [team for team in teams if team.pk not in cached]
+    if missing:
+        prefetch_related_objects(
+            missing, *TeamSerializer.eager_loading_lookups(fieldset)
+        )
+        data = TeamSerializer(missing, many=True, context=context).data
+        if fieldset is None:
+            set_cached_teams(missing, data)
+        cached.update((team.pk, team_data) for team, team_data in zip(missing, data))
+    if fieldset is not None:
+        return [fieldset.prune(cached[team.pk]) for team in teams]
+    return [cached[team.pk] for team in teams]
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_team_cache(sender, instance, **kwargs):
+    invalidate_team(instance.pk)
+
+
+# 所属の削除はシグナルを受けると一括削除できなくなるため、保存のみ受ける
+# シリアライザによる削除はチームのバージョンを上げるため、古いキャッシュは使われない
+@receiver(post_save, sender=TeamAdministrator)
+@receiver(post_save, sender=TeamMember)
+def invalidate_team_membership_cache(sender, instance, **kwargs):
+    invalidate_team(instance.team_id)
+
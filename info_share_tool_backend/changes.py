@@ -0,0 +1,245 @@
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Max, Min, Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Channel, ChangeLog, ChannelMember, TeamAdministrator, TeamMember
+
+
+# 変更履歴を記録したトランザクションのコミット後に送信する
+# team_ids: 変更したチーム、usernames: 新たに所属したユーザ(まだ購読側でチームを知らない)
+changes_recorded = Signal()
+
+
+def _notify(team_ids, usernames=()):
+    team_ids = frozenset(team_ids)
+    usernames = frozenset(usernames)
+    transaction.on_commit(
+        lambda: changes_recorded.send(
+            sender=ChangeLog, team_ids=team_ids, usernames=usernames
+        )
+    )
+
+
+# 変更履歴の記録
+# いずれもシリアライザの書き込みと同じトランザクションの中で呼び出す
+
+
+def record_team(team, action):
+    ChangeLog.objects.create(
+        object_type=ChangeLog.TEAM, object_id=team.pk, team_id=team.pk, action=action
+    )
+    _notify([team.pk])
+
+
+def record_channel(channel, action):
+    ChangeLog.objects.create(
+        object_type=ChangeLog.CHANNEL,
+        object_id=channel.pk,
+        team_id=channel.team_id,
+        action=action,
+    )
+    _notify([channel.team_id])
+
+
+def record_membership(object_type, object_id, team_id, joined=(), left=()):
+    """所属した・所属しなくなったユーザごとに、そのユーザのみに見える履歴を記録する"""
+    ChangeLog.objects.bulk_create(
+        [
+            ChangeLog(
+                object_type=object_type,
+                object_id=object_id,
+                team_id=team_id,
+                action=action,
+                username=username,
+            )
+            for action, usernames in ((ChangeLog.JOINED, joined), (ChangeLog.LEFT, left))
+            for username in sorted(usernames)
+        ]
+    )
+    _notify([team_id], joined)
+
+
+def _insert_select(select_sql, params):
+    """SELECTの結果(object_type, object_id, team_id, action, username)を履歴に追加する"""
+    table = ChangeLog._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} "
+            "(object_type, object_id, team_id, action, username, created_at) "
+            f"SELECT s.*, %s FROM ({select_sql}) s",
+            [timezone.now(), *params],
+        )
+
+
+def record_team_deleted(team):
+    """
+    チームの管理者・メンバごとに削除を記録する
+    所属の行は連鎖して削除されるため、削除の前に呼び出す
+    """
+    _insert_select(
+        f"SELECT %s, %s, %s, %s, admin_id FROM {TeamAdministrator._meta.db_table} "
+        "WHERE team_id = %s "
+        f"UNION SELECT %s, %s, %s, %s, member_id FROM {TeamMember._meta.db_table} "
+        "WHERE team_id = %s",
+        [ChangeLog.TEAM, team.pk, team.pk, ChangeLog.DELETED, team.pk] * 2,
+    )
+    _notify([team.pk])
+
+
+def record_channel_deleted(channel):
+    """チャネルメンバごとに削除を記録する。削除の前に呼び出す"""
+    _insert_select(
+        f"SELECT %s, %s, %s, %s, member_id FROM {ChannelMember._meta.db_table} "
+        "WHERE channel_id = %s",
+        [ChangeLog.CHANNEL, channel.pk, channel.team_id, ChangeLog.DELETED, channel.pk],
+    )
+    _notify([channel.team_id])
+
+
+def record_channel_memberships(team_id, action, select_sql, params):
+    """
+    SELECTの結果(channel_id, username)のチャネルメンバごとに、所属した・所属しなくなったことを記録する
+    チームのチャネルへの一括の反映で、行を読み込まずに記録する。反映の前に呼び出す
+    """
+    _insert_select(
+        f"SELECT %s, s.channel_id, %s, %s, s.username FROM ({select_sql}) s",
+        [ChangeLog.CHANNEL, team_id, action, *params],
+    )
+    _notify([team_id])
+
+
+def record_team_channels_updated(team_id):
+    """チームのすべてのチャネルの更新を記録する"""
+    _insert_select(
+        f"SELECT %s, id, team_id, %s, NULL FROM {Channel._meta.db_table} "
+        "WHERE team_id = %s",
+        [ChangeLog.CHANNEL, ChangeLog.UPDATED, team_id],
+    )
+    _notify([team_id])
+
+
+def record_teams_updated(team_ids):
+    ChangeLog.objects.bulk_create(
+        [
+            ChangeLog(
+                object_type=ChangeLog.TEAM,
+                object_id=team_id,
+                team_id=team_id,
+                action=ChangeLog.UPDATED,
+            )
+            for team_id in team_ids
+        ]
+    )
+    _notify(team_ids)
+
+
+def record_channels_updated(channels):
+    """チャネルのクエリセットのすべてのチャネルの更新を記録する"""
+    rows = list(channels.values_list("id", "team_id").distinct())
+    ChangeLog.objects.bulk_create(
+        [
+            ChangeLog(
+                object_type=ChangeLog.CHANNEL,
+                object_id=channel_id,
+                team_id=team_id,
+                action=ChangeLog.UPDATED,
+            )
+            for channel_id, team_id in rows
+        ]
+    )
+    _notify(team_id for _, team_id in rows)
+
+
+# 変更履歴の取得・圧縮
+
+
+def latest_seq():
+    return ChangeLog.objects.aggregate(seq=Max("seq"))["seq"] or 0
+
+
+def user_team_ids(username):
+    """ユーザが管理者・メンバのチーム(削除済みを除く)のidを返す"""
+    alive = Q(team__deleted_at__isnull=True)
+    return set(
+        TeamAdministrator.objects.filter(alive, admin_id=username).values_list(
+            "team_id", flat=True
+        )
+    ) | set(
+        TeamMember.objects.filter(alive, member_id=username).values_list(
+            "team_id", flat=True
+        )
+    )
+
+
+def compacted_seq(using=DEFAULT_DB_ALIAS):
+    """圧縮した位置を返す。これ以前の履歴は削除済み"""
+    seq = (
+        ChangeLog.objects.using(using)
+        .filter(action=ChangeLog.COMPACTED)
+        .aggregate(seq=Max("seq"))["seq"]
+    )
+    return seq or 0
+
+
+def visible_changes(username, since):
+    """
+    seq より後の履歴のうち、ユーザに見えるものを返す
+    - チームの作成・更新は、チームの管理者・メンバに見える
+    - チャネルの作成・更新は、チャネルメンバに見える
+    - 削除と所属の変更は、記録したときの対象のユーザに見える
+    削除済みのチーム・チャネルの所属は、ジョブで削除される前でも含めない
+    """
+    alive = Q(team__deleted_at__isnull=True)
+    teams = Q(
+        team_id__in=TeamAdministrator.objects.filter(alive, admin_id=username).values(
+            "team_id"
+        )
+    ) | Q(
+        team_id__in=TeamMember.objects.filter(alive, member_id=username).values(
+            "team_id"
+        )
+    )
+    channels = Q(
+        object_id__in=ChannelMember.objects.filter(
+            member_id=username, channel__team__deleted_at__isnull=True
+        ).values("channel_id")
+    )
+    return (
+        ChangeLog.objects.filter(seq__gt=since)
+        .filter(
+            Q(username=username)
+            | (Q(username__isnull=True, object_type=ChangeLog.TEAM) & teams)
+            | (Q(username__isnull=True, object_type=ChangeLog.CHANNEL) & channels)
+        )
+        .order_by("seq")
+    )
+
+
+def compact_changes(before, batch_size=10000, using=DEFAULT_DB_ALIAS, log=None):
+    """
+    before より前に記録した履歴を削除する
+    テーブルを長くロックしないよう、seqの範囲ごとに短いトランザクションで削除し、
+    最後に残した1行を圧縮した位置を示す行にする
+    削除した行数を返す
+    """
+    log = log or (lambda message: None)
+    changes = ChangeLog.objects.using(using)
+    bounds = changes.filter(created_at__lt=before).aggregate(
+        low=Min("seq"), high=Max("seq")
+    )
+    if bounds["high"] is None:
+        return 0
+
+    deleted = 0
+    for low in range(bounds["low"], bounds["high"], batch_size):
+        high = min(low + batch_size, bounds["high"])
+        with transaction.atomic(using=using):
+            count, _ = changes.filter(seq__gte=low, seq__lt=high).delete()
+        deleted += count
+        if count:
+            log(f"deleted {count} changes (seq {low}-{high - 1})")
+    changes.filter(seq=bounds["high"]).update(
+        object_type="", action=ChangeLog.COMPACTED, username=None
+    )
+    return deleted
@@ -0,0 +1,129 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCodec:
+    name = "gzip"
+    default_level = 6
+
+    def compress(self, data, level):
+        # 同じ内容から同じ出力になるよう、更新日時を含めない
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    def compressor(self, level):
+        return _GzipStream(level)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31 はgzipのヘッダ付き
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        # チャンクごとに出力し、Server-Sent Eventsなどを遅延させない
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class BrotliCodec:
+    name = "br"
+    default_level = 4
+
+    def compress(self, data, level):
+        return brotli.compress(data, quality=level)
+
+    def compressor(self, level):
+        return _BrotliStream(level)
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._obj.process(chunk) + self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class ZstdCodec:
+    name = "zstd"
+    default_level = 3
+
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def compressor(self, level):
+        return _ZstdStream(level)
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk) + self._obj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self._obj.flush()
+
+
+# 使用できる圧縮形式(brotli・zstandard はインストールされているときのみ)
+CODECS = {
+    codec.name: codec
+    for codec, available in (
+        (GzipCodec(), True),
+        (BrotliCodec(), brotli is not None),
+        (ZstdCodec(), zstandard is not None),
+    )
+    if available
+}
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding を形式ごとの q値の辞書にする"""
+    weights = {}
+    for item in header.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+    return weights
+
+
+def select_encoding(header, encodings):
+    """
+    Accept-Encoding で受け付ける形式のうち、q値が最も大きいものを返す
+    q値が同じときは encodings(サーバの優先順)の順に選ぶ。受け付けないときは None
+    """
+    weights = parse_accept_encoding(header or "")
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in encodings:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
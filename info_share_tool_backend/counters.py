@@ -0,0 +1,108 @@
+from functools import reduce
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from . import changes
+from .models import Channel, Team, TeamAdministrator, TeamMember, User
+
+
+# チームの件数の項目と、集計元のモデル
+TEAM_COUNTERS = {
+    "admin_count": TeamAdministrator,
+    "member_count": TeamMember,
+    "channel_count": Channel,
+}
+
+
+def adjusted(field, delta):
+    """
+    件数を delta だけ増減する式
+    ORMで直接登録した行などで集計とずれていても、負の値にならないようにする
+    (ずれは repair_team_counters で修正する)
+    """
+    return Greatest(F(field) + delta, Value(0))
+
+
+def _actual_count(model):
+    """チームごとの実際の件数を返すサブクエリ"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(team=OuterRef("pk"))
+            .order_by()
+            .values("team")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def repair_team_counters(batch_size=1000, using=DEFAULT_DB_ALIAS, log=None):
+    """
+    チームの件数を所属・チャネルの行から集計し直す
+    テーブルを長くロックしないよう、idの範囲ごとに短いトランザクションで更新する
+    件数が一致しなかったチームの数を返す
+    """
+    log = log or (lambda message: None)
+    teams = Team.objects.using(using)
+    actual = {field: _actual_count(model) for field, model in TEAM_COUNTERS.items()}
+
+    repaired = 0
+    last_id = 0
+    while True:
+        ids = list(
+            teams.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[
+                :batch_size
+            ]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        with transaction.atomic(using=using):
+            mismatched = (
+                teams.filter(id__in=ids)
+                .alias(**{f"actual_{field}": value for field, value in actual.items()})
+                .filter(
+                    reduce(
+                        lambda a, b: a | b,
+                        [~Q(**{field: F(f"actual_{field}")}) for field in actual],
+                    )
+                )
+                .values_list("id", flat=True)
+            )
+            # 表現が変わるため、バージョンも上げる
+            count = teams.filter(id__in=list(mismatched)).update(
+                **actual, version=F("version") + 1
+            )
+        repaired += count
+        if count:
+            log(f"repaired {count} teams (id {ids[0]}-{ids[-1]})")
+    return repaired
+
+
+@receiver(pre_delete, sender=User)
+def update_user_teams(sender, instance, **kwargs):
+    """
+    ユーザを削除すると所属する行は連鎖して削除されるため、チームの件数を減らす
+    所属するチーム・チャネルの表現が変わるため、バージョンを上げて更新を記録する
+    """
+    team_ids = set(
+        Team.objects.filter(
+            Q(administrators=instance) | Q(members=instance)
+        ).values_list("id", flat=True)
+    )
+    Team.objects.filter(administrators=instance).update(
+        admin_count=adjusted("admin_count", -1), version=F("version") + 1
+    )
+    Team.objects.filter(members=instance).update(
+        member_count=adjusted("member_count", -1), version=F("version") + 1
+    )
+    channels = Channel.objects.filter(Q(members=instance) | Q(creator=instance))
+    changes.record_teams_updated(sorted(team_ids))
+    changes.record_channels_updated(channels)
+    channels.update(version=F("version") + 1)
@@ -0,0 +1,74 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    接続のたびに settings.SQLITE_PRAGMAS のPRAGMAを設定する
+    journal_mode 以外のPRAGMAは接続ごとの設定のため、毎回設定する必要がある
+    """
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_busy_error(exc):
+    """SQLiteのロック待ちのタイムアウトによるエラーかを返す"""
+    message = str(exc).lower()
+    return isinstance(exc, OperationalError) and (
+        "database is locked" in message or "database table is locked" in message
+    )
+
+
+def retry_on_busy(func=None, *, using=DEFAULT_DB_ALIAS):
+    """
+    関数を書き込みのトランザクションで実行し、ロック待ちで失敗したときに再試行する
+    再試行の間隔は指数的に延ばし、同時に再試行しないよう揺らぎを加える
+    外側のトランザクションの中では再試行できないため、そのまま実行する
+    再試行のたびにやり直し、その間ロックを保持するため、シリアライザの検証など
+    CPU時間のかかる処理は外で済ませ、書き込みの処理のみを囲む
+    """
+    if func is None:
+        return functools.partial(retry_on_busy, using=using)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connections[using].in_atomic_block:
+            return func(*args, **kwargs)
+
+        retries = getattr(settings, "DATABASE_BUSY_RETRIES", 0)
+        delay = getattr(settings, "DATABASE_BUSY_RETRY_DELAY", 0.05)
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == retries or not is_busy_error(exc):
+                    raise
+                wait = delay * 2**attempt * (1 + random.random())
+                logger.warning(
+                    "database is busy, retrying %s in %.3fs (%d/%d)",
+                    func.__qualname__,
+                    wait,
+                    attempt + 1,
+                    retries,
+                )
+                time.sleep(wait)
+
+    return wrapper
@@ -0,0 +1,32 @@
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(obj, fieldset=None):
+    """
+    モデルのバージョンから強いETagを生成する
+    バージョンは書き込みのたびに加算されるため、表現が変われば必ず変わる
+    項目を選択したときは選択ごとに異なる表現のため、選択した項目も含める
+    """
+    suffix = f"-{fieldset.etag_suffix}" if fieldset is not None else ""
+    return f'"{obj._meta.model_name}-{obj.pk}-v{obj.version}{suffix}"'
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request, etag):
+    """If-None-Match のいずれかのETagと一致するかを返す(弱い比較)"""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    if "*" in etags:
+        return True
+    return _strip_weak(etag) in {_strip_weak(candidate) for candidate in etags}
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
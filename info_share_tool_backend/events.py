@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .changes import changes_recorded
+from .executors import run_sync
+from .models import ChangeLog
+
+
+# 変更の通知を配信するクラス
+# 複数のワーカープロセスで動かすときは ChangeLogBroker などプロセスをまたいで配信するものにする
+EVENT_BROKER = getattr(
+    settings, "EVENT_BROKER", "info_share_tool_backend.events.LocalBroker"
+)
+EVENT_POLL_INTERVAL = getattr(settings, "EVENT_POLL_INTERVAL", 1.0)
+
+
+class Event(NamedTuple):
+    """
+    変更の通知
+    通知には変更の内容を含めず、受け取った側で変更履歴から取得する
+    """
+
+    team_ids: frozenset
+    usernames: frozenset = frozenset()
+
+    def concerns(self, team_ids, username):
+        """所属するチーム、または新たに所属したユーザへの通知か"""
+        return username in self.usernames or not self.team_ids.isdisjoint(team_ids)
+
+
+class Subscription:
+    """
+    購読者ごとの通知の待ち行列
+    購読したイベントループで受け取り、配信はどのスレッドからも行える
+    """
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # イベントループが終了している
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self):
+        """
+        通知を待ち、溜まっている通知をまとめて返す
+        受け取りが追いつかず通知を捨てたときは None を返す(すべて確認し直す)
+        """
+        events = [await self.queue.get()]
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        if self.overflowed:
+            self.overflowed = False
+            return None
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Broker:
+    """
+    変更の通知の配信
+    publish はこのプロセスの購読者に配信する。どのスレッドからも呼び出せる
+    """
+
+    queue_size = 100
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """イベントループの中で呼び出す"""
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+class LocalBroker(Broker):
+    """プロセス内でのみ配信する(開発用・1プロセスで動かすとき)"""
+
+
+class ChangeLogBroker(Broker):
+    """
+    このプロセスの通知に加え、変更履歴のテーブルを定期的に読んで
+    他のプロセスで記録した変更も配信する
+    Redisなどを使わずに、複数のワーカープロセスに配信するための代替
+    (このプロセスの変更は2回通知されるが、購読側は seq より後を取得するため影響しない)
+    """
+
+    poll_interval = EVENT_POLL_INTERVAL
+    batch_size = 1000
+
+    def __init__(self):
+        super().__init__()
+        self._last_seq = None
+        self._task = None
+
+    def subscribe(self):
+        subscription = super().subscribe()
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._poll())
+        return subscription
+
+    async def _poll(self):
+        # 購読者がいなくなったら止め、次の購読時に再開する
+        while self._subscribers:
+            self._last_seq, event = await run_sync(self._fetch, self._last_seq)
+            if event is not None:
+                self.publish(event)
+            await asyncio.sleep(self.poll_interval)
+
+    def _fetch(self, last_seq):
+        changes = ChangeLog.objects.order_by("seq").values_list(
+            "seq", "team_id", "username"
+        )
+        if last_seq is None:
+            # 購読を始める前の変更は、購読側が接続時に取得する
+            latest = changes.order_by("-seq").first()
+            return (latest[0] if latest else 0), None
+        rows = list(changes.filter(seq__gt=last_seq)[: self.batch_size])
+        if not rows:
+            return last_seq, None
+        event = Event(
+            frozenset(team_id for _, team_id, _ in rows),
+            frozenset(username for _, _, username in rows if username),
+        )
+        return rows[-1][0], event
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(EVENT_BROKER)()
+        return _broker
+
+
+@receiver(changes_recorded)
+def publish_changes(sender, team_ids, usernames, **kwargs):
+    get_broker().publish(Event(team_ids, usernames))
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+# 同期処理(パスワードのハッシュ化、シリアライザの検証・保存)を実行するスレッド数
+# イベントループを塞がないよう、上限のあるスレッドプールで実行する
+ASYNC_EXECUTOR_WORKERS = getattr(settings, "ASYNC_EXECUTOR_WORKERS", 8)
+
+executor = ThreadPoolExecutor(
+    max_workers=ASYNC_EXECUTOR_WORKERS, thread_name_prefix="async-view"
+)
+
+
+def _call_with_connections(func, *args, **kwargs):
+    # リクエストの開始・終了と同様に、期限切れ・異常な接続を閉じる
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """同期処理をスレッドプールで実行し、結果を待つ"""
+    return await sync_to_async(
+        _call_with_connections, thread_sensitive=False, executor=executor
+    )(func, *args, **kwargs)
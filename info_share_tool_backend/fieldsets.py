@@ -0,0 +1,82 @@
+import hashlib
+from functools import lru_cache
+
+from rest_framework.exceptions import ValidationError
+
+
+class Fieldset:
+    """
+    レスポンスに含める項目
+    選択しなかった関連は先読みせず、選択しなかったカラムは取得しない
+    """
+
+    def __init__(self, names):
+        # idは常に含める
+        self.names = frozenset(names) | {"id"}
+
+    def includes(self, name):
+        return name in self.names
+
+    def prune(self, data):
+        """選択した項目のみ残す(キャッシュ済みのシリアライズ結果用)"""
+        return {name: value for name, value in data.items() if name in self.names}
+
+    @property
+    def etag_suffix(self):
+        """表現ごとに異なるETagにするための、選択した項目のダイジェスト"""
+        digest = hashlib.sha1(",".join(sorted(self.names)).encode()).hexdigest()
+        return f"f{digest[:8]}"
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    return frozenset(
+        name
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+def _split(value):
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def get_fieldset(request, serializer_class):
+    """
+    クエリパラメタ fields・expand から選択した項目を返す
+    fields を指定しないときは None(すべての項目)
+    fields を指定したときは、fields の項目と expand で指定した関連のみ含める
+    関連は expand でのみ指定でき、fields に指定したときはエラーにする
+    """
+    fields = _split(request.GET.get("fields"))
+    expand = _split(request.GET.get("expand")) or set()
+    expandable = set(serializer_class.expandable_fields)
+
+    unknown = expand - expandable
+    if fields is not None:
+        relations = fields & expandable
+        if relations:
+            msg = f"fields: {', '.join(sorted(relations))} must be specified in expand"
+            raise ValidationError(msg)
+        unknown |= fields - readable_fields(serializer_class)
+    if unknown:
+        msg = f"fields: {', '.join(sorted(unknown))} is not supported"
+        raise ValidationError(msg)
+
+    if fields is None:
+        return None
+    return Fieldset(fields | expand)
+
+
+def only_selected(queryset, fieldset, *required):
+    """
+    選択した項目のカラムと required のカラムのみ取得するクエリセットを返す
+    required にはETag・ページ分割・権限の判定に使うカラムを指定する(カラム以外は無視する)
+    """
+    if fieldset is None:
+        return queryset
+    columns = {field.name for field in queryset.model._meta.concrete_fields}
+    selected = {name for name in fieldset.names | set(required) if name in columns}
+    return queryset.only(*selected)
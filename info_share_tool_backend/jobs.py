@@ -0,0 +1,179 @@
+import datetime
+import logging
+import os
+import socket
+import time
+import traceback
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .db import retry_on_busy
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# 処理の名前と関数
+TASKS = {}
+
+
+def task(name):
+    """ジョブとして実行する関数を登録する。再試行されるため、何度実行しても同じ結果にする"""
+
+    def decorator(func):
+        TASKS[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, key=None, operator=None, **payload):
+    """
+    処理を登録する
+    呼び出し元のトランザクションと一緒にコミットされるため、
+    ロールバックしたときは実行されない
+    key を指定したとき、同じ操作者・キーの待機中の処理があればそれを返す
+    operator は状態を参照できるユーザ
+    """
+    if name not in TASKS:
+        raise LookupError(f"job: {name} is not registered")
+    if key is not None:
+        queued = Job.objects.filter(
+            key=key, operator=operator, status=Job.QUEUED
+        ).first()
+        # 読み取りの後にワーカーが確保していることがあるため、待機中のときだけ更新してまとめる
+        # 更新で書き込みのロックを取るため、コミットまでワーカーはこの処理を確保できない
+        if (
+            queued is not None
+            and Job.objects.filter(pk=queued.pk, status=Job.QUEUED).update(
+                payload=payload
+            )
+            == 1
+        ):
+            queued.payload = payload
+            return queued
+    return Job.objects.create(
+        name=name,
+        key=key,
+        operator=operator,
+        payload=payload,
+        max_attempts=getattr(settings, "JOB_MAX_ATTEMPTS", 5),
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable(now):
+    # 待機中で実行日時を過ぎたもの、または実行中のまま確保の期限を過ぎたもの(ワーカーの異常終了など)
+    return Q(status=Job.QUEUED, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+
+
+@retry_on_busy
+def _lock(job_id, worker, now, visibility_timeout):
+    # 書き込みのみのトランザクションにし、読み取りからのロックの昇格で失敗しないようにする
+    return Job.objects.filter(_claimable(now), pk=job_id).update(
+        status=Job.RUNNING,
+        locked_by=worker,
+        locked_until=now + datetime.timedelta(seconds=visibility_timeout),
+        attempts=F("attempts") + 1,
+    )
+
+
+def claim(worker, visibility_timeout):
+    """
+    実行できる処理を1件取り出す。なければ None を返す
+    他のワーカーと同じ処理を取り出さないよう、条件付きの UPDATE で確保する
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(_claimable(now))
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in list(candidates):
+        if _lock(job_id, worker, now, visibility_timeout):
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+@retry_on_busy
+def _finish(job, worker, **fields):
+    # 確保の期限を過ぎて他のワーカーが取り出したときは更新しない
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=worker).update(
+        locked_by=None, locked_until=None, **fields
+    )
+
+
+def retry_delay(attempts):
+    """再試行までの待ち時間。失敗するたびに倍にする"""
+    delay = getattr(settings, "JOB_RETRY_DELAY", 5)
+    return datetime.timedelta(seconds=delay * 2 ** (attempts - 1))
+
+
+def run_job(job, worker):
+    """
+    取り出した処理を実行する。トランザクションは処理の関数ごとに管理する
+    失敗したときは max_attempts 回まで待ち時間をおいて再試行する
+    """
+    try:
+        if job.attempts > job.max_attempts:
+            raise TimeoutError("visibility timeout exceeded")
+        func = TASKS.get(job.name)
+        if func is None:
+            raise LookupError(f"job: {job.name} is not registered")
+        func(**job.payload)
+    except Exception as exc:
+        error = traceback.format_exc()
+        code = type(exc).__name__
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error("job %s (%s) failed", job.pk, job.name)
+            _finish(
+                job,
+                worker,
+                status=Job.FAILED,
+                last_error=error,
+                error=code,
+                finished_at=now,
+            )
+        else:
+            logger.warning("job %s (%s) failed, retrying", job.pk, job.name)
+            _finish(
+                job,
+                worker,
+                status=Job.QUEUED,
+                last_error=error,
+                error=code,
+                run_after=now + retry_delay(job.attempts),
+            )
+        return False
+    _finish(job, worker, status=Job.SUCCEEDED, finished_at=timezone.now())
+    return True
+
+
+def run_worker(
+    worker=None, visibility_timeout=300, poll_interval=1.0, burst=False, stop=None
+):
+    """
+    処理を取り出して実行し続ける
+    burst のときは実行できる処理がなくなったら終了する
+    実行した件数を返す
+    """
+    worker = worker or worker_name()
+    processed = 0
+    while stop is None or not stop.is_set():
+        job = claim(worker, visibility_timeout)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job, worker)
+        processed += 1
+    return processed
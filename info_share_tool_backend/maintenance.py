@@ -0,0 +1,124 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+
+from .models import ChannelMember, TeamAdministrator, TeamMember
+
+
+# 所属の中間テーブル
+MEMBERSHIP_MODELS = (TeamAdministrator, TeamMember, ChannelMember)
+
+
+def _unique_fields(model):
+    (constraint,) = model._meta.constraints
+    return constraint.fields
+
+
+def delete_duplicates(model, batch_size=10000, using=DEFAULT_DB_ALIAS, log=None):
+    """
+    同じ組み合わせの所属の行のうち、idが最小の行のみ残して削除する
+    テーブルを長くロックしないよう、idの範囲ごとに短いトランザクションで削除する
+    削除した行数を返す
+    """
+    log = log or (lambda message: None)
+    fields = _unique_fields(model)
+    manager = model._base_manager.using(using)
+    bounds = manager.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return 0
+
+    # 自分より前に同じ組み合わせの行があるもの
+    earlier = manager.filter(
+        id__lt=OuterRef("id"), **{field: OuterRef(field) for field in fields}
+    )
+    deleted = 0
+    for low in range(bounds["low"], bounds["high"] + 1, batch_size):
+        with transaction.atomic(using=using):
+            count, _ = manager.filter(
+                Exists(earlier), id__gte=low, id__lt=low + batch_size
+            ).delete()
+        deleted += count
+        if count:
+            log(f"{model._meta.db_table}: deleted {count} rows (id {low}-)")
+    return deleted
+
+
+def apply_constraints(model, using=DEFAULT_DB_ALIAS, log=None):
+    """
+    モデルの一意制約・インデックスのうち、データベースにないものを作成する
+    テーブルを作り直さないよう、一意インデックスとして作成する
+    作成した制約・インデックスの名前を返す
+    """
+    log = log or (lambda message: None)
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    # インデックスの名前ではなく、カラムの組み合わせで作成済みかを判定する
+    existing_columns = {
+        (tuple(info["columns"]), bool(info["unique"])) for info in existing.values()
+    }
+
+    created = []
+    with connection.schema_editor(atomic=False) as schema_editor:
+        for constraint in model._meta.constraints:
+            columns = tuple(model._meta.get_field(f).column for f in constraint.fields)
+            if constraint.name in existing or (columns, True) in existing_columns:
+                continue
+            schema_editor.execute(constraint.create_sql(model, schema_editor))
+            created.append(constraint.name)
+        for index in model._meta.indexes:
+            columns = tuple(model._meta.get_field(f).column for f in index.fields)
+            if index.name in existing or (columns, False) in existing_columns:
+                continue
+            schema_editor.add_index(model, index)
+            created.append(index.name)
+    for name in created:
+        log(f"{model._meta.db_table}: created {name}")
+    return created
+
+
+def add_missing_columns(model, using=DEFAULT_DB_ALIAS, log=None):
+    """
+    モデルのテーブル・カラムのうち、データベースにないものを作成する
+    syncdb は既存のテーブルにカラムを追加しないため、以前のデータベースの更新に使う
+    追加したカラムには既存の行も default の値を入れる
+    作成したテーブル・カラムの名前を返す
+    """
+    log = log or (lambda message: None)
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        exists = table in connection.introspection.table_names(cursor)
+        columns = (
+            {
+                column.name
+                for column in connection.introspection.get_table_description(
+                    cursor, table
+                )
+            }
+            if exists
+            else set()
+        )
+
+    created = []
+    with connection.schema_editor() as schema_editor:
+        if not exists:
+            schema_editor.create_model(model)
+            created.append(table)
+        else:
+            for field in model._meta.local_concrete_fields:
+                if field.column in columns:
+                    continue
+                # SQLiteの add_field は現在のモデルでテーブルを作り直すため、
+                # 複数のカラムがないときに使えない。default を付けて1カラムずつ追加する
+                definition, params = schema_editor.column_sql(
+                    model, field, include_default=True
+                )
+                schema_editor.execute(
+                    f"ALTER TABLE {schema_editor.quote_name(table)} "
+                    f"ADD COLUMN {schema_editor.quote_name(field.column)} {definition}",
+                    params,
+                )
+                created.append(field.column)
+    for name in created:
+        log(f"{table}: created {name}")
+    return created
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.compression import LEVELS, run_compression
+from ...benchmarks.dataset import SyntheticDataGenerator
+from ...benchmarks.endpoints import build_scenarios
+from ...benchmarks.utils import benchmark_database, environment, write_report
+from ...compression import CODECS
+
+
+class Command(BaseCommand):
+    help = (
+        "合成データのGETのエンドポイントについて、圧縮の形式・レベルごとの"
+        "レイテンシとレスポンスのサイズ(帯域ごとの転送時間の見積もり)を比較する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50000)
+        parser.add_argument("--teams", type=int, default=5000)
+        parser.add_argument("--channels", type=int, default=50000)
+        parser.add_argument("--team-size-alpha", type=float, default=1.5)
+        parser.add_argument("--max-team-size", type=int, default=5000)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="実行するGETのシナリオ名(複数指定可。省略時はすべて)",
+        )
+        parser.add_argument(
+            "--encoding",
+            action="append",
+            dest="encodings",
+            choices=list(LEVELS),
+            help="比較する形式(複数指定可。省略時は使用できるものすべて)",
+        )
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stderr.write("seeding...")
+            dataset = SyntheticDataGenerator(
+                users=options["users"],
+                teams=options["teams"],
+                channels=options["channels"],
+                seed=options["seed"],
+                team_size_alpha=options["team_size_alpha"],
+                max_team_size=options["max_team_size"],
+            ).generate()
+
+            scenarios = [
+                scenario
+                for scenario in build_scenarios(seed=options["seed"])
+                if scenario.method == "GET"
+            ]
+            if options["scenarios"]:
+                names = {scenario.name for scenario in scenarios}
+                unknown = set(options["scenarios"]) - names
+                if unknown:
+                    raise CommandError(f"unknown scenario: {', '.join(sorted(unknown))}")
+                scenarios = [s for s in scenarios if s.name in options["scenarios"]]
+
+            self.stderr.write("running...")
+            results = run_compression(
+                scenarios,
+                options["iterations"],
+                options["warmup"],
+                encodings=options["encodings"],
+            )
+
+        report = {
+            "benchmark": "compression",
+            "environment": environment(),
+            "dataset": dataset,
+            "available_encodings": list(CODECS),
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        write_report(report, options["output"], self.stdout)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.concurrency import CONCURRENCY_SCENARIOS, build_requests, run_concurrency
+from ...benchmarks.dataset import SyntheticDataGenerator
+from ...benchmarks.utils import benchmark_database, environment, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "合成データを登録し、同期のビュー(WSGI)と非同期のビュー(ASGI)の"
+        "同時実行時のスループットを比較する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--teams", type=int, default=1000)
+        parser.add_argument("--channels", type=int, default=10000)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            action="append",
+            help="同時リクエスト数(複数指定可。省略時は 1, 8, 32)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help=f"実行するシナリオ名(省略時は {', '.join(CONCURRENCY_SCENARIOS)})",
+        )
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+
+    def handle(self, *args, **options):
+        names = options["scenarios"] or CONCURRENCY_SCENARIOS
+        unknown = set(names) - set(CONCURRENCY_SCENARIOS)
+        if unknown:
+            raise CommandError(f"unknown scenario: {', '.join(sorted(unknown))}")
+        levels = options["concurrency"] or [1, 8, 32]
+
+        with benchmark_database():
+            self.stderr.write("seeding...")
+            dataset = SyntheticDataGenerator(
+                users=options["users"],
+                teams=options["teams"],
+                channels=options["channels"],
+                seed=options["seed"],
+            ).generate()
+
+            results = []
+            for name, make_requests in build_requests(options["seed"], names):
+                for concurrency in levels:
+                    self.stderr.write(f"running {name} (concurrency {concurrency})...")
+                    results.extend(
+                        run_concurrency(
+                            name, make_requests, options["requests"], concurrency
+                        )
+                    )
+
+        report = {
+            "benchmark": "concurrency",
+            "environment": environment(),
+            "dataset": dataset,
+            "results": results,
+        }
+        write_report(report, options["output"], self.stdout)
@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.dataset import SyntheticDataGenerator
+from ...benchmarks.endpoints import build_scenarios, compare, run_scenario
+from ...benchmarks.utils import benchmark_database, environment, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "合成データを登録し、urls.py の各エンドポイントの"
+        "レイテンシ・クエリ数・ピークメモリを計測する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50000)
+        parser.add_argument("--teams", type=int, default=5000)
+        parser.add_argument("--channels", type=int, default=50000)
+        parser.add_argument("--team-size-alpha", type=float, default=1.5)
+        parser.add_argument("--max-team-size", type=int, default=5000)
+        parser.add_argument("--iterations", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="実行するシナリオ名(複数指定可。省略時はすべて)",
+        )
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+        parser.add_argument("--compare", help="比較する前回の計測結果のJSONファイル")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        with benchmark_database():
+            self.stderr.write("seeding...")
+            dataset = SyntheticDataGenerator(
+                users=options["users"],
+                teams=options["teams"],
+                channels=options["channels"],
+                seed=options["seed"],
+                team_size_alpha=options["team_size_alpha"],
+                max_team_size=options["max_team_size"],
+            ).generate()
+
+            scenarios = build_scenarios(seed=options["seed"])
+            if options["scenarios"]:
+                names = {scenario.name for scenario in scenarios}
+                unknown = set(options["scenarios"]) - names
+                if unknown:
+                    raise CommandError(f"unknown scenario: {', '.join(sorted(unknown))}")
+                scenarios = [s for s in scenarios if s.name in options["scenarios"]]
+
+            results = []
+            for scenario in scenarios:
+                self.stderr.write(f"running {scenario.name}...")
+                results.append(
+                    run_scenario(scenario, options["iterations"], options["warmup"])
+                )
+
+        report = {
+            "benchmark": "endpoints",
+            "environment": environment(),
+            "dataset": dataset,
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        if baseline is not None:
+            report["comparison"] = compare(report, baseline)
+
+        write_report(report, options["output"], self.stdout)
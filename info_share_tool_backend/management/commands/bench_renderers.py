@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from ... import renderers
+from ...benchmarks.dataset import SyntheticDataGenerator
+from ...benchmarks.renderers import build_payloads, run_renderers
+from ...benchmarks.utils import benchmark_database, environment, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "合成データのチーム一覧・メンバ一覧のレスポンスについて、"
+        "JSON(標準・orjson)とMessagePackの出力・解析の時間とサイズを比較する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20000)
+        parser.add_argument("--teams", type=int, default=2000)
+        parser.add_argument("--channels", type=int, default=2000)
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stderr.write("seeding...")
+            dataset = SyntheticDataGenerator(
+                users=options["users"],
+                teams=options["teams"],
+                channels=options["channels"],
+                seed=options["seed"],
+            ).generate()
+
+            self.stderr.write("running...")
+            payloads = build_payloads(options["page_size"])
+            results = run_renderers(payloads, options["iterations"], options["warmup"])
+
+        report = {
+            "benchmark": "renderers",
+            "environment": environment(),
+            "dataset": dataset,
+            "orjson_available": renderers.orjson is not None,
+            "msgpack_available": renderers.msgpack is not None,
+            "page_size": options["page_size"],
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        write_report(report, options["output"], self.stdout)
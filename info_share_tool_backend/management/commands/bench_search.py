@@ -0,0 +1,105 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from ... import search
+from ...benchmarks.utils import (
+    benchmark_database,
+    environment,
+    measure,
+    summarize,
+    write_report,
+)
+from ...models import Team
+
+
+# チーム名・説明の生成に使う語彙
+WORDS = [
+    "開発", "営業", "企画", "広報", "総務", "人事", "経理", "法務", "品質", "保守",
+    "運用", "設計", "調査", "分析", "基盤", "研究", "支援", "推進", "改善", "管理",
+    "東京", "大阪", "名古屋", "福岡", "札幌", "仙台", "横浜", "神戸", "京都", "広島",
+    "プロジェクト", "チーム", "グループ", "ユニット", "センター", "ラボ", "オフィス",
+    "子丑寅卯", "辰巳午未", "申酉戌亥", "春夏秋冬", "東西南北", "松竹梅",
+]
+
+
+class Command(BaseCommand):
+    help = "チーム検索の全文検索インデックスと部分一致検索のレイテンシを比較する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, default=100000)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+        parser.add_argument(
+            "--keyword",
+            action="append",
+            dest="keywords",
+            help="検索キーワード(複数指定可)",
+        )
+
+    def handle(self, *args, **options):
+        keywords = options["keywords"] or ["開発チーム", "申酉戌亥", "名古屋", "存在しない語"]
+
+        with benchmark_database():
+            self.seed(options["teams"], options["seed"])
+            report = {
+                "benchmark": "team_search",
+                "environment": environment(),
+                "teams": options["teams"],
+                "fts_available": search.is_available(),
+                "results": self.run(keywords, options["iterations"], options["page_size"]),
+            }
+
+        write_report(report, options["output"], self.stdout)
+
+    def seed(self, count, seed):
+        rng = random.Random(seed)
+        batch = []
+        with transaction.atomic():
+            for i in range(count):
+                batch.append(
+                    Team(
+                        name="".join(rng.sample(WORDS, 2)),
+                        description="".join(rng.sample(WORDS, 6)),
+                    )
+                )
+                if len(batch) >= 5000:
+                    Team.objects.bulk_create(batch)
+                    batch = []
+            Team.objects.bulk_create(batch)
+            # bulk_createはシグナルを送らないため、インデックスを作り直す
+            search.rebuild_index()
+
+    def run(self, keywords, iterations, page_size):
+        results = []
+        for keyword in keywords:
+            like_condition = Q(name__icontains=keyword) | Q(description__icontains=keyword)
+            index_condition = search.search_condition(keyword)
+            ranked = Team.objects.filter(index_condition).annotate(
+                search_rank=search.rank_expression(keyword)
+            )
+
+            queries = {
+                "like": lambda: list(
+                    Team.objects.filter(like_condition).order_by("id")[:page_size]
+                ),
+                "index": lambda: list(
+                    Team.objects.filter(index_condition).order_by("id")[:page_size]
+                ),
+                "index_ranked": lambda: list(
+                    ranked.order_by("search_rank", "id")[:page_size]
+                ),
+            }
+            result = {
+                "keyword": keyword,
+                "uses_index": search.uses_index(keyword),
+                "matches": Team.objects.filter(like_condition).count(),
+            }
+            for name, query in queries.items():
+                result[name] = summarize(measure(query, iterations))
+            results.append(result)
+        return results
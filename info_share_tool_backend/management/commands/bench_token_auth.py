@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.dataset import SyntheticDataGenerator
+from ...benchmarks.endpoints import build_scenarios
+from ...benchmarks.token_auth import TOKEN_AUTH_SCENARIOS, run_token_auth
+from ...benchmarks.utils import benchmark_database, environment, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "合成データを登録し、トークン認証のキャッシュの有無で"
+        "チーム・チャネルのエンドポイントのレイテンシ・クエリ数を比較する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--teams", type=int, default=1000)
+        parser.add_argument("--channels", type=int, default=10000)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help=f"実行するシナリオ名(省略時は {', '.join(TOKEN_AUTH_SCENARIOS)})",
+        )
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+
+    def handle(self, *args, **options):
+        names = options["scenarios"] or TOKEN_AUTH_SCENARIOS
+        unknown = set(names) - set(TOKEN_AUTH_SCENARIOS)
+        if unknown:
+            raise CommandError(f"unknown scenario: {', '.join(sorted(unknown))}")
+
+        with benchmark_database():
+            self.stderr.write("seeding...")
+            dataset = SyntheticDataGenerator(
+                users=options["users"],
+                teams=options["teams"],
+                channels=options["channels"],
+                seed=options["seed"],
+                with_tokens=True,
+            ).generate()
+
+            scenarios = [
+                scenario
+                for scenario in build_scenarios(seed=options["seed"])
+                if scenario.name in names
+            ]
+            self.stderr.write("running...")
+            results = run_token_auth(scenarios, options["iterations"], options["warmup"])
+
+        report = {
+            "benchmark": "token_auth",
+            "environment": environment(),
+            "dataset": dataset,
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        write_report(report, options["output"], self.stdout)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...benchmarks.contention import database_profiles, run_contention
+from ...benchmarks.dataset import SyntheticDataGenerator
+from ...benchmarks.utils import benchmark_database, environment, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "複数のプロセスから同時にチームを作成・更新し、"
+        "データベースの設定ごとのスループットとロック待ちのエラー数を比較する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--teams", type=int, default=500)
+        parser.add_argument("--channels", type=int, default=2000)
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--transactions", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--profile",
+            action="append",
+            dest="profiles",
+            help="計測する設定(default, production。省略時はすべて)",
+        )
+        parser.add_argument("--output", help="計測結果を出力するJSONファイル")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("this benchmark requires sqlite")
+        profiles = database_profiles()
+        names = options["profiles"] or list(profiles)
+        unknown = set(names) - set(profiles)
+        if unknown:
+            raise CommandError(f"unknown profile: {', '.join(sorted(unknown))}")
+
+        # 複数のプロセスから接続するため、ファイルのデータベースを使う
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = os.path.join(directory, "contention.sqlite3")
+            with benchmark_database(test_name=test_name):
+                self.stderr.write("seeding...")
+                dataset = SyntheticDataGenerator(
+                    users=options["users"],
+                    teams=options["teams"],
+                    channels=options["channels"],
+                    seed=options["seed"],
+                ).generate()
+
+                results = []
+                for name in names:
+                    self.stderr.write(f"running {name}...")
+                    results.append(
+                        run_contention(
+                            name,
+                            profiles[name],
+                            options["processes"],
+                            options["transactions"],
+                            seed=options["seed"],
+                        )
+                    )
+
+        report = {
+            "benchmark": "write_contention",
+            "environment": environment(),
+            "dataset": dataset,
+            "results": results,
+        }
+        write_report(report, options["output"], self.stdout)
@@ -0,0 +1,31 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = "保持期間より古い変更履歴を削除する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHANGE_LOG_RETENTION_DAYS,
+            help="変更履歴を残す日数",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="1トランザクションで削除する変更履歴の数",
+        )
+
+    def handle(self, *args, **options):
+        log = self.stderr.write if options["verbosity"] > 1 else None
+        before = timezone.now() - datetime.timedelta(days=options["days"])
+        deleted = compact_changes(before, batch_size=options["batch_size"], log=log)
+        self.stdout.write(f"{deleted} changes deleted")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from ...maintenance import MEMBERSHIP_MODELS, apply_constraints, delete_duplicates
+
+
+class Command(BaseCommand):
+    help = (
+        "チーム管理者・チームメンバ・チャネルメンバの重複した行を削除し、"
+        "一意制約・インデックスを作成する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="1トランザクションで確認するidの範囲",
+        )
+        parser.add_argument(
+            "--skip-constraints",
+            action="store_true",
+            help="重複の削除のみ行い、一意制約・インデックスを作成しない",
+        )
+
+    def handle(self, *args, **options):
+        log = self.stderr.write if options["verbosity"] > 1 else None
+        for model in MEMBERSHIP_MODELS:
+            deleted = delete_duplicates(model, batch_size=options["batch_size"], log=log)
+            self.stdout.write(f"{model._meta.db_table}: {deleted} duplicate rows deleted")
+            if not options["skip_constraints"]:
+                for name in apply_constraints(model, log=log):
+                    self.stdout.write(f"{model._meta.db_table}: {name} created")
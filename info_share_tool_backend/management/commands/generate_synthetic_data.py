@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from ...benchmarks.dataset import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "ユーザ・チーム・管理者・メンバ・チャネル・チャネルメンバの合成データを登録する"
+        "(チームの人数はべき乗則に従う)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50000)
+        parser.add_argument("--teams", type=int, default=5000)
+        parser.add_argument("--channels", type=int, default=50000)
+        parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--team-size-alpha",
+            type=float,
+            default=1.5,
+            help="チームの人数のパレート分布の形状(小さいほど大きなチームが増える)",
+        )
+        parser.add_argument("--min-team-size", type=int, default=3)
+        parser.add_argument("--max-team-size", type=int, default=5000)
+        parser.add_argument(
+            "--user-skew",
+            type=float,
+            default=0.8,
+            help="所属チーム数の偏り(0で一様)",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="user",
+            help="ユーザ名の接頭辞(既存のユーザと重複しないよう指定する)",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="全ユーザ共通のパスワード(ハッシュ化は1回のみ行う)",
+        )
+        parser.add_argument(
+            "--with-tokens", action="store_true", help="認証トークンも登録する"
+        )
+
+    def handle(self, *args, **options):
+        generator = SyntheticDataGenerator(
+            users=options["users"],
+            teams=options["teams"],
+            channels=options["channels"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            team_size_alpha=options["team_size_alpha"],
+            min_team_size=options["min_team_size"],
+            max_team_size=options["max_team_size"],
+            user_skew=options["user_skew"],
+            prefix=options["prefix"],
+            password=options["password"],
+            with_tokens=options["with_tokens"],
+            log=lambda message: self.stdout.write(message),
+        )
+        stats = generator.generate()
+        self.stdout.write(self.style.SUCCESS(f"done in {stats['seconds']}s: {stats}"))
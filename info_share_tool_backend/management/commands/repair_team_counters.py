@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ...counters import repair_team_counters
+
+
+class Command(BaseCommand):
+    help = "チームの管理者数・メンバ数・チャネル数を集計し直し、一致しないものを修正する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="1トランザクションで修正するチームの数",
+        )
+
+    def handle(self, *args, **options):
+        log = self.stderr.write if options["verbosity"] > 1 else None
+        repaired = repair_team_counters(batch_size=options["batch_size"], log=log)
+        self.stdout.write(f"{repaired} teams repaired")
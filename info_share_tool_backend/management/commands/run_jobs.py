@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...jobs import run_worker, worker_name
+
+
+def _run_child(index, stop, options):
+    # 停止は親プロセスが stop で伝える
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(
+        worker=f"{worker_name()}-{index}",
+        visibility_timeout=options["visibility_timeout"],
+        poll_interval=options["poll_interval"],
+        burst=options["burst"],
+        stop=stop,
+    )
+
+
+class Command(BaseCommand):
+    help = "登録されたバックグラウンドのジョブを実行する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=1, help="ワーカーのプロセス数"
+        )
+        parser.add_argument(
+            "--visibility-timeout",
+            type=int,
+            default=getattr(settings, "JOB_VISIBILITY_TIMEOUT", 300),
+            help="ジョブを確保する時間(秒)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="実行できるジョブがないときに待つ時間(秒)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="実行できるジョブがなくなったら終了する",
+        )
+
+    def handle(self, *args, **options):
+        if options["processes"] <= 1:
+            try:
+                processed = run_worker(
+                    visibility_timeout=options["visibility_timeout"],
+                    poll_interval=options["poll_interval"],
+                    burst=options["burst"],
+                )
+            except KeyboardInterrupt:
+                return
+            self.stdout.write(f"{processed} jobs processed")
+            return
+
+        # 接続を子プロセスに引き継がない
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+        workers = [
+            context.Process(target=_run_child, args=(index, stop, options))
+            for index in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            # 実行中のジョブを終えてから終了する
+            stop.set()
+            for worker in workers:
+                worker.join()
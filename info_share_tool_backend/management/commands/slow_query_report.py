@@ -0,0 +1,42 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...slow_queries import read_entries, summarize
+
+
+class Command(BaseCommand):
+    help = "遅いクエリの記録を同じSQLごとに集計し、合計時間の長い順に出力する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log",
+            default=str(settings.SLOW_QUERY_LOG),
+            help="遅いクエリのログファイル(ローテーションしたファイルも読む)",
+        )
+        parser.add_argument("--top", type=int, default=10, help="出力するSQLの数")
+        parser.add_argument("--json", action="store_true", help="JSONで出力する")
+
+    def handle(self, *args, **options):
+        summaries = summarize(read_entries(options["log"]), top=options["top"])
+        if options["json"]:
+            self.stdout.write(json.dumps(summaries, ensure_ascii=False, indent=2))
+            return
+        if not summaries:
+            self.stdout.write("no slow queries")
+            return
+
+        for rank, summary in enumerate(summaries, start=1):
+            self.stdout.write(
+                f"#{rank} total {summary['total_ms']}ms, count {summary['count']}, "
+                f"mean {summary['mean_ms']}ms, max {summary['max_ms']}ms"
+            )
+            self.stdout.write(f"  sql: {summary['sql']}")
+            if summary["view"]:
+                self.stdout.write(f"  view: {summary['view']}")
+            for origin in summary["origins"]:
+                self.stdout.write(f"  origin: {origin}")
+            for line in summary["plan"] or []:
+                self.stdout.write(f"  plan: {line}")
+            self.stdout.write("")
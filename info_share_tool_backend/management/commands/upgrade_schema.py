@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from ... import search
+from ...counters import repair_team_counters
+from ...maintenance import (
+    MEMBERSHIP_MODELS,
+    add_missing_columns,
+    apply_constraints,
+    delete_duplicates,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "以前のデータベースにないテーブル・カラム・一意制約・インデックスを作成し、"
+        "チームの件数と全文検索インデックスを作り直す"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="1トランザクションで修正するチームの数",
+        )
+
+    def handle(self, *args, **options):
+        log = self.stderr.write if options["verbosity"] > 1 else None
+        # 全文検索の仮想テーブルなど、Djangoが管理しないものは除く
+        models = [
+            model
+            for model in apps.get_app_config("info_share_tool_backend").get_models()
+            if model._meta.managed
+        ]
+        for model in models:
+            for name in add_missing_columns(model, log=log):
+                self.stdout.write(f"{model._meta.db_table}: {name} created")
+
+        # 一意制約を作成する前に重複した行を削除する
+        for model in MEMBERSHIP_MODELS:
+            deleted = delete_duplicates(model, log=log)
+            self.stdout.write(f"{model._meta.db_table}: {deleted} duplicate rows deleted")
+        for model in models:
+            for name in apply_constraints(model, log=log):
+                self.stdout.write(f"{model._meta.db_table}: {name} created")
+
+        search.rebuild_index()
+        repaired = repair_team_counters(batch_size=options["batch_size"], log=log)
+        self.stdout.write(f"{repaired} teams repaired")
@@ -0,0 +1,214 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# リクエストごとの計測値
+# 非同期のビューがスレッドで実行する処理にも引き継がれる
+current_timing = ContextVar("current_timing", default=None)
+
+
+class RequestTiming:
+    """1リクエストのSQLのクエリ数・時間と、処理ごとの時間(秒)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.durations = {"db": 0.0}
+        self._lock = threading.Lock()
+
+    def add(self, name, duration):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def add_query(self, duration):
+        with self._lock:
+            self.query_count += 1
+            self.durations["db"] += duration
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def timer(name):
+    """計測中のリクエストに処理の時間を加算する"""
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+@contextmanager
+def untimed():
+    """計測中のリクエストに含めずに実行する(計測のための内部のクエリなど)"""
+    token = current_timing.set(None)
+    try:
+        yield
+    finally:
+        current_timing.reset(token)
+
+
+def _record_query(execute, sql, params, many, context):
+    timing = current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # 接続はスレッドごとのため、接続のたびにクエリの計測を組み込む
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    """
+    Prometheusのヒストグラム
+    バケットごとの件数を保持し、出力時に累積する
+    """
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * (len(self.buckets) + 1), 0))
+            counts[index] += 1
+            self._values[labels] = (counts, total + value)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = sorted((labels, (list(c), s)) for labels, (c, s) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bucket, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                label_text = _format_labels(self.labels, labels, [("le", bucket)])
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{label_text} {total}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+# 時間(秒)とクエリ数のバケット
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+# ラベルの route は urls.py のパターン(team/<int:team_id> など)
+ROUTE_LABELS = ("route", "method")
+
+requests_total = Counter(
+    "http_requests_total", "Requests by route and status.", ("route", "method", "status")
+)
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Total time spent in the view and middleware.",
+    ROUTE_LABELS,
+    DURATION_BUCKETS,
+)
+db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL queries executed per request.",
+    ROUTE_LABELS,
+    QUERY_BUCKETS,
+)
+db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL per request.",
+    ROUTE_LABELS,
+    DURATION_BUCKETS,
+)
+validate_duration = Histogram(
+    "http_request_validate_duration_seconds",
+    "Time spent in serializer validation per request.",
+    ROUTE_LABELS,
+    DURATION_BUCKETS,
+)
+render_duration = Histogram(
+    "http_request_render_duration_seconds",
+    "Time spent rendering the response body per request.",
+    ROUTE_LABELS,
+    DURATION_BUCKETS,
+)
+
+REGISTRY = [
+    requests_total,
+    request_duration,
+    db_queries,
+    db_duration,
+    validate_duration,
+    render_duration,
+]
+
+
+def observe_request(route, method, status_code, timing, total):
+    labels = (route, method)
+    requests_total.inc((route, method, str(status_code)))
+    request_duration.observe(labels, total)
+    db_queries.observe(labels, timing.query_count)
+    db_duration.observe(labels, timing.durations["db"])
+    if "validate" in timing.durations:
+        validate_duration.observe(labels, timing.durations["validate"])
+    if "render" in timing.durations:
+        render_duration.observe(labels, timing.durations["render"])
+
+
+def render_metrics():
+    """Prometheusのテキスト形式で出力する(プロセスごとの集計)"""
+    return "\n".join(line for metric in REGISTRY for line in metric.collect()) + "\n"
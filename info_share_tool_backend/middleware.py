@@ -0,0 +1,171 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .compression import CODECS, select_encoding
+from .metrics import RequestTiming, current_timing, observe_request, timer
+
+
+class TimingMiddleware:
+    """
+    リクエストごとにSQLのクエリ数・時間、シリアライザの検証時間、レスポンスの描画時間、
+    全体の時間を計測し、Server-Timing ヘッダを付与してルートごとに集計する
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.finish(request, response, timing)
+
+    def process_template_response(self, request, response):
+        # DRFのレスポンスはビューのあとに描画されるため、描画の前後で計測する
+        timing = current_timing.get()
+        if timing is not None:
+            started = timing.total()
+            response.add_post_render_callback(
+                lambda response: timing.add("render", timing.total() - started)
+            )
+        return response
+
+    @staticmethod
+    def finish(request, response, timing):
+        total = timing.total()
+        metrics = [
+            ("db", timing.durations["db"], f"{timing.query_count} queries"),
+            *(
+                (name, duration, None)
+                for name, duration in timing.durations.items()
+                if name != "db"
+            ),
+            ("total", total, None),
+        ]
+        response["Server-Timing"] = ", ".join(
+            f"{name};dur={duration * 1000:.3f}" + (f';desc="{desc}"' if desc else "")
+            for name, duration, desc in metrics
+        )
+
+        # 生のパスではなくURLのパターンで集計し、ラベルの種類を抑える
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "<unmatched>"
+        observe_request(route, request.method, response.status_code, timing, total)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding で選んだ形式(zstd・br・gzip のうち使用できるもの)でレスポンスを圧縮する
+    COMPRESSION_MIN_SIZE より小さいレスポンスは圧縮しない
+    ストリーミングのレスポンスはチャンクごとに圧縮して送る
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+        self.encodings = [
+            name
+            for name in getattr(settings, "COMPRESSION_ENCODINGS", ["gzip"])
+            if name in CODECS
+        ]
+        self.levels = getattr(settings, "COMPRESSION_LEVELS", {})
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if (
+            not self.encodings
+            or response.has_header("Content-Encoding")
+            or response.status_code in (204, 206, 304)
+            # 変換しないよう指定されたもの
+            or "no-transform" in response.get("Cache-Control", "")
+        ):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        # 圧縮しなかったときもキャッシュがAccept-Encodingごとに保存するようにする
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = select_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encodings
+        )
+        if encoding is None:
+            return response
+        codec = CODECS[encoding]
+        level = self.levels.get(encoding, codec.default_level)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async(
+                    codec.compressor(level), response.streaming_content
+                )
+            else:
+                response.streaming_content = self._compress_sync(
+                    codec.compressor(level), response.streaming_content
+                )
+            # 圧縮後の長さは送り終わるまでわからない
+            del response["Content-Length"]
+        else:
+            with timer("compress"):
+                compressed = codec.compress(response.content, level)
+            # 圧縮しても小さくならないときは、そのまま送る
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # 表現が変わるため、強いETagは弱いETagにする(If-None-Match は弱い比較のため一致する)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def _compress_sync(compressor, content):
+        for chunk in content:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @staticmethod
+    async def _compress_async(compressor, content):
+        async for chunk in content:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
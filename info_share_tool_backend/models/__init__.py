@@ -1,3 +1,6 @@
 from .users import User
 from .teams import Team, TeamAdministrator, TeamMember
 from .channels import Channel, ChannelMember
+from .search import TeamSearchEntry
+from .changes import ChangeLog
+from .jobs import Job
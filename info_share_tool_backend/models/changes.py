@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class ChangeLog(models.Model):
+    """
+    チーム・チャネル・所属の変更履歴(追記のみ)
+    クライアントは seq より後の変更を取得して差分を同期する
+    削除されたチーム・チャネル・ユーザの履歴も残すため、外部キーにしない
+    """
+
+    TEAM = "team"
+    CHANNEL = "channel"
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    # ユーザがチーム・チャネルに所属した・所属しなくなった
+    JOINED = "joined"
+    LEFT = "left"
+    # 圧縮した位置を示す行。これより前の履歴は削除済み
+    COMPACTED = "compacted"
+
+    seq = models.BigAutoField(primary_key=True)
+    object_type = models.CharField(verbose_name="object_type", max_length=16)
+    object_id = models.BigIntegerField(verbose_name="object_id")
+    team_id = models.BigIntegerField(verbose_name="team_id")
+    action = models.CharField(verbose_name="action", max_length=16)
+    # 特定のユーザのみに見える履歴(削除・所属の変更)のとき、そのユーザ名
+    username = models.CharField(
+        verbose_name="username", max_length=150, null=True, blank=True
+    )
+    created_at = models.DateTimeField(verbose_name="created_at", auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["username", "seq"], name="changelog_username_seq_idx"),
+            # 圧縮した位置(compacted_seq)を全件走査せずに取得する
+            models.Index(fields=["action", "seq"], name="changelog_action_seq_idx"),
+        ]
@@ -3,6 +3,13 @@ from django.db import models
 from . import User, Team
 
 
+class ChannelManager(models.Manager):
+    """削除済みのチームのチャネルを除く"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(team__deleted_at__isnull=True)
+
+
 class Channel(models.Model):
     name = models.CharField(verbose_name="name", max_length=64)
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
@@ -17,6 +24,14 @@ class Channel(models.Model):
     changed_at = models.TimeField(
         verbose_name="changed_at", auto_now=True, editable=False
     )
+    # 更新のたびに加算する。ETagの生成に使う
+    version = models.PositiveIntegerField(
+        verbose_name="version", default=1, editable=False
+    )
+
+    objects = ChannelManager()
+    # 削除済みのチームのチャネルを含む
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
@@ -25,3 +40,14 @@ class Channel(models.Model):
 class ChannelMember(models.Model):
     channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
     member = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["channel", "member"], name="unique_channel_member"
+            )
+        ]
+        # ユーザがメンバのチャネルの検索用
+        indexes = [
+            models.Index(fields=["member", "channel"], name="channel_member_member_idx")
+        ]
@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    バックグラウンドで実行する処理の待ち行列
+    登録したトランザクションと一緒にコミットされ、run_jobs のワーカーが取り出して実行する
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    name = models.CharField(verbose_name="name", max_length=64)
+    payload = models.JSONField(verbose_name="payload", default=dict)
+    # 登録した操作者。状態はこのユーザのみ参照できる
+    operator = models.CharField(
+        verbose_name="operator", max_length=150, null=True, blank=True
+    )
+    # 同じ処理を重複して登録しないためのキー(待機中のもののみ比較する)
+    key = models.CharField(verbose_name="key", max_length=128, null=True, blank=True)
+    status = models.CharField(verbose_name="status", max_length=16, default=QUEUED)
+    attempts = models.PositiveIntegerField(verbose_name="attempts", default=0)
+    max_attempts = models.PositiveIntegerField(verbose_name="max_attempts", default=5)
+    # この日時以降に実行する(再試行の待ち時間)
+    run_after = models.DateTimeField(verbose_name="run_after", default=timezone.now)
+    # 実行中のワーカーと、その確保の期限。期限を過ぎたら他のワーカーが取り出す
+    locked_by = models.CharField(
+        verbose_name="locked_by", max_length=128, null=True, blank=True
+    )
+    locked_until = models.DateTimeField(verbose_name="locked_until", null=True, blank=True)
+    # 最後の失敗のトレースバック(ワーカーの調査用。クライアントには返さない)
+    last_error = models.TextField(verbose_name="last_error", null=True, blank=True)
+    # クライアントに返す最後の失敗の種類(例外のクラス名)
+    error = models.CharField(verbose_name="error", max_length=64, null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name="created_at", auto_now_add=True)
+    finished_at = models.DateTimeField(verbose_name="finished_at", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+            models.Index(fields=["key", "status"], name="job_key_status_idx"),
+        ]
@@ -0,0 +1,41 @@
+from django.db import models
+from django.db.models import Lookup
+
+from . import Team
+
+
+class SearchDocumentField(models.TextField):
+    """FTS5の仮想テーブルと同名の隠しカラム。MATCHで全文検索する"""
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class TeamSearchEntry(models.Model):
+    """
+    チーム名・説明の全文検索インデックス(SQLite FTS5 trigram)
+    仮想テーブルはマイグレーション後に search.create_index で作成する
+    """
+
+    team = models.OneToOneField(
+        Team,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    name = models.TextField()
+    description = models.TextField()
+    document = SearchDocumentField(db_column="info_share_tool_backend_team_search")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "info_share_tool_backend_team_search"
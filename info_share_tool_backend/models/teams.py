@@ -3,6 +3,13 @@ from django.db import models
 from . import User
 
 
+class TeamManager(models.Manager):
+    """削除済み(チャネル・所属の削除を待っている)チームを除く"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Team(models.Model):
     name = models.CharField(verbose_name="name", max_length=64)
     description = models.CharField(verbose_name="description", max_length=200)
@@ -16,6 +23,48 @@ class Team(models.Model):
     changed_at = models.TimeField(
         verbose_name="changed_at", auto_now=True, editable=False
     )
+    # 更新のたびに加算する。ETagの生成に使う
+    version = models.PositiveIntegerField(
+        verbose_name="version", default=1, editable=False
+    )
+    # 管理者・メンバ・チャネルの件数
+    # 一覧で件数を表示・ソートするとき、所属の行を集計しないよう保持する
+    admin_count = models.PositiveIntegerField(
+        verbose_name="admin_count", default=0, editable=False
+    )
+    member_count = models.PositiveIntegerField(
+        verbose_name="member_count", default=0, editable=False
+    )
+    channel_count = models.PositiveIntegerField(
+        verbose_name="channel_count", default=0, editable=False
+    )
+    # 削除した日時。チャネル・所属はジョブで削除し、最後にチームの行を削除する
+    deleted_at = models.DateTimeField(
+        verbose_name="deleted_at", null=True, blank=True, editable=False
+    )
+
+    objects = TeamManager()
+    # 削除済みのチームを含む
+    all_objects = models.Manager()
+
+    class Meta:
+        # 一覧のキーセット(ソートキー, changed_at, id)の範囲検索用
+        indexes = [
+            models.Index(fields=["changed_at", "id"], name="team_changed_at_id_idx"),
+            *(
+                models.Index(
+                    fields=[field, "changed_at", "id"], name=f"team_{field}_idx"
+                )
+                for field in (
+                    "created_at",
+                    "name",
+                    "description",
+                    "member_count",
+                    "admin_count",
+                    "channel_count",
+                )
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -25,7 +74,23 @@ class TeamAdministrator(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     admin = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["team", "admin"], name="unique_team_admin")
+        ]
+        # ユーザが管理者のチームの検索用
+        indexes = [models.Index(fields=["admin", "team"], name="team_admin_admin_team_idx")]
+
 
 class TeamMember(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     member = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["team", "member"], name="unique_team_member")
+        ]
+        # ユーザがメンバのチームの検索用
+        indexes = [
+            models.Index(fields=["member", "team"], name="team_member_member_team_idx")
+        ]
@@ -0,0 +1,168 @@
+import base64
+import datetime
+import json
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    キーセット(カーソル)によるページネーション
+    ソートキーの最終値より後ろを範囲検索するため、ページの深さに関わらず
+    1ページの取得コストが一定になる
+    ソートキーが一意になるよう、末尾に id を付与する(unique のときは付与しない)
+    """
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering, unique=False):
+        ordering = list(ordering)
+        if not unique and not any(field.lstrip("-") == "id" for field in ordering):
+            descending = ordering[0].startswith("-") if ordering else False
+            ordering.append("-id" if descending else "id")
+        self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position, reverse = self._page_queryset(queryset, request)
+        return self._set_page(list(queryset), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """非同期ビュー用。非同期のORMでページを取得する"""
+        queryset, position, reverse = self._page_queryset(queryset, request)
+        return self._set_page([obj async for obj in queryset], position, reverse)
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self._reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, ordering))
+
+        # 1件多く取得して次ページの有無を判定する
+        return queryset[: self.page_size + 1], position, reverse
+
+    def _set_page(self, results, position, reverse):
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self._position(results[-1]) if has_next and results else None
+        self.previous_position = (
+            self._position(results[0]) if has_previous and results else None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps(
+            {"p": [self._encode_value(value) for value in position], "r": reverse},
+            separators=(",", ":"),
+        )
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            values = payload["p"]
+            reverse = bool(payload["r"])
+            if len(values) != len(self.ordering):
+                raise ValueError()
+            position = [
+                self._decode_value(field.lstrip("-"), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _position(self, instance):
+        return [getattr(instance, field.lstrip("-")) for field in self.ordering]
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return [field[1:] if field.startswith("-") else "-" + field for field in ordering]
+
+    @staticmethod
+    def _after(position, ordering):
+        # (f1, f2, ..., fn) > (v1, v2, ..., vn) を展開した条件
+        conditions = []
+        for i, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equals = {
+                ordering[j].lstrip("-"): position[j] for j in range(i)
+            }
+            conditions.append(Q(**equals, **{f"{name}__{lookup}": position[i]}))
+        return reduce(lambda a, b: a | b, conditions)
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def _decode_value(self, name, value):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # アノテーションの値はそのまま使う
+            return value
+        return field.to_python(value)
+
+    def get_schema_operation_parameters(self, view):
+        return []
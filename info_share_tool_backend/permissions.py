@@ -0,0 +1,184 @@
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission, SAFE_METHODS
+
+from .models import Team, TeamAdministrator, TeamMember, ChannelMember
+
+
+TEAM_ADMIN = "admin"
+TEAM_MEMBER = "member"
+
+
+def get_operator_username(request):
+    """
+    リクエストから操作者のユーザ名を取得する
+    GETはクエリパラメタ、それ以外はリクエストボディから取得する
+    """
+    if request.method in SAFE_METHODS:
+        return request.query_params.get("operator_user")
+    return request.data.get("operator_user")
+
+
+def member_team_ids(username):
+    """
+    操作者が管理者・メンバのチームのidのサブクエリ
+    所属のテーブルの (ユーザ, チーム) のインデックスで検索する
+    """
+    return (
+        TeamAdministrator.objects.filter(admin_id=username)
+        .values("team_id")
+        .union(TeamMember.objects.filter(member_id=username).values("team_id"))
+    )
+
+
+def with_team_roles(queryset, username):
+    """
+    チームのクエリセットに操作者の管理者・メンバ判定を付与する
+    取得したチームは MembershipResolver.prime_team で判定結果を取り込める
+    """
+    return queryset.annotate(
+        operator_is_admin=Exists(
+            TeamAdministrator.objects.filter(team=OuterRef("pk"), admin_id=username)
+        ),
+        operator_is_member=Exists(
+            TeamMember.objects.filter(team=OuterRef("pk"), member_id=username)
+        ),
+    )
+
+
+def with_channel_roles(queryset, username):
+    """
+    チャネルのクエリセットに操作者のチャネルメンバ・チーム管理者判定を付与する
+    取得したチャネルは MembershipResolver.prime_channel で判定結果を取り込める
+    """
+    return queryset.annotate(
+        operator_is_member=Exists(
+            ChannelMember.objects.filter(channel=OuterRef("pk"), member_id=username)
+        ),
+        operator_is_team_admin=Exists(
+            TeamAdministrator.objects.filter(
+                team=OuterRef("team_id"), admin_id=username
+            )
+        ),
+    )
+
+
+class MembershipResolver:
+    """
+    チーム・チャネルへの所属判定
+    判定はそれぞれ1回のEXISTSクエリで行い、結果はリクエストの間メモ化する
+    """
+
+    def __init__(self):
+        self._team_roles = {}
+        self._channel_members = {}
+
+    def prime_team(self, team, username):
+        """with_team_roles で取得したチームの判定結果を取り込む"""
+        self._team_roles[(team.pk, username)] = self._to_role(
+            team.operator_is_admin, team.operator_is_member
+        )
+
+    def prime_channel(self, channel, username):
+        """with_channel_roles で取得したチャネルの判定結果を取り込む"""
+        self._channel_members[(channel.pk, username)] = channel.operator_is_member
+        # チームメンバかどうかは不明のため、管理者のときのみ取り込む
+        if channel.operator_is_team_admin:
+            self._team_roles[(channel.team_id, username)] = TEAM_ADMIN
+
+    def team_role(self, team, username):
+        """
+        チームでの役割を返す
+        管理者は TEAM_ADMIN、メンバは TEAM_MEMBER、所属しないときは None
+        """
+        team_id = getattr(team, "pk", team)
+        key = (team_id, username)
+        if key not in self._team_roles:
+            row = (
+                with_team_roles(Team.objects.filter(pk=team_id), username)
+                .values_list("operator_is_admin", "operator_is_member")
+                .first()
+            )
+            self._team_roles[key] = self._to_role(*row) if row else None
+        return self._team_roles[key]
+
+    def is_team_admin(self, team, username):
+        return self.team_role(team, username) == TEAM_ADMIN
+
+    def is_team_referrer(self, team, username):
+        return self.team_role(team, username) is not None
+
+    def is_channel_member(self, channel, username):
+        channel_id = getattr(channel, "pk", channel)
+        key = (channel_id, username)
+        if key not in self._channel_members:
+            self._channel_members[key] = ChannelMember.objects.filter(
+                channel_id=channel_id, member_id=username
+            ).exists()
+        return self._channel_members[key]
+
+    @staticmethod
+    def _to_role(is_admin, is_member):
+        if is_admin:
+            return TEAM_ADMIN
+        if is_member:
+            return TEAM_MEMBER
+        return None
+
+
+def get_membership_resolver(request=None):
+    """
+    リクエストに紐づく MembershipResolver を取得する
+    リクエストがないときはメモ化しない新しいインスタンスを返す
+    """
+    if request is None:
+        return MembershipResolver()
+    # DRFのRequestとDjangoのHttpRequestで同じインスタンスを共有する
+    http_request = getattr(request, "_request", request)
+    resolver = getattr(http_request, "_membership_resolver", None)
+    if resolver is None:
+        resolver = MembershipResolver()
+        http_request._membership_resolver = resolver
+    return resolver
+
+
+class TeamPermission(BasePermission):
+    """
+    参照はチーム管理者・メンバ、削除はチーム管理者のみ許可する
+    更新の権限は TeamSerializer で確認する
+    """
+
+    def has_object_permission(self, request, view, obj):
+        operator_user = get_operator_username(request)
+        resolver = get_membership_resolver(request)
+
+        if request.method in SAFE_METHODS:
+            if not resolver.is_team_referrer(obj, operator_user):
+                msg = f"operator user: {operator_user} has no permision for team: {obj.pk}"
+                raise PermissionDenied(msg)
+        elif request.method == "DELETE":
+            if not resolver.is_team_admin(obj, operator_user):
+                msg = f"operator: {operator_user} has no permission"
+                raise PermissionDenied(msg)
+        return True
+
+
+class ChannelPermission(BasePermission):
+    """
+    参照はチャネルメンバ、削除はチーム管理者のみ許可する
+    更新の権限は ChannelSerializer で確認する
+    """
+
+    def has_object_permission(self, request, view, obj):
+        operator_user = get_operator_username(request)
+        resolver = get_membership_resolver(request)
+
+        if request.method in SAFE_METHODS:
+            if not resolver.is_channel_member(obj, operator_user):
+                msg = f"operator user: {operator_user} has no permision for channel: {obj.pk}"
+                raise PermissionDenied(msg)
+        elif request.method == "DELETE":
+            if not resolver.is_team_admin(obj.team_id, operator_user):
+                msg = f"operator: {operator_user} has no permission"
+                raise PermissionDenied(msg)
+        return True
@@ -0,0 +1,91 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# DRFのJSONRendererと同様に、HTMLに埋め込んでも安全なようエスケープする
+_UNSAFE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    """orjson・msgpack が変換できない値(遅延評価の文字列、Decimal など)をDRFと同じ形式にする"""
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    orjson でJSONを出力する
+    出力はDRFのJSONRendererの既定(区切りの空白なし、非ASCIIをエスケープしない)と同じ
+    orjson がないとき、既定と異なる設定・インデントの指定のときはDRFのJSONRendererで出力する
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.encoder_class is not encoders.JSONEncoder
+            or self.get_indent(accepted_media_type, renderer_context)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # idをキーにした辞書(複数取得の結果)があるため、文字列以外のキーも許可する
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        for separator, escaped in _UNSAFE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """orjson でJSONを解析する。orjson がないときはDRFのJSONParserで解析する"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePackで出力する(msgpack が必要)"""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """MessagePackを解析する(msgpack が必要)"""
+
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
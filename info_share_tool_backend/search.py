@@ -0,0 +1,133 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import Team, TeamSearchEntry
+
+
+# チーム名・説明の全文検索インデックス(SQLite FTS5 trigram)
+TEAM_SEARCH_TABLE = TeamSearchEntry._meta.db_table
+
+# trigramトークナイザは3文字未満のキーワードを検索できない
+MIN_KEYWORD_LENGTH = 3
+
+_availability = {}
+
+
+def is_available(using=DEFAULT_DB_ALIAS):
+    """
+    FTS5(trigram)が使えるかを返す
+    SQLite以外のバックエンドや、FTS5を含まないSQLiteでは使えない
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    if using not in _availability:
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE temp.fts5_trigram_check "
+                    "USING fts5(value, tokenize='trigram')"
+                )
+                cursor.execute("DROP TABLE temp.fts5_trigram_check")
+                _availability[using] = True
+            except Exception:
+                _availability[using] = False
+    return _availability[using]
+
+
+def create_index(using=DEFAULT_DB_ALIAS):
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TEAM_SEARCH_TABLE} "
+            "USING fts5(name, description, tokenize='trigram')"
+        )
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """
+    インデックスを作り直す
+    bulk_createなどシグナルを経由しない登録の後に実行する
+    """
+    if not is_available(using):
+        return
+    create_index(using)
+    team_table = Team._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TEAM_SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {TEAM_SEARCH_TABLE} (rowid, name, description) "
+            f"SELECT id, name, description FROM {team_table}"
+        )
+
+
+def index_team(team, using=DEFAULT_DB_ALIAS):
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TEAM_SEARCH_TABLE} WHERE rowid = %s", [team.pk])
+        cursor.execute(
+            f"INSERT INTO {TEAM_SEARCH_TABLE} (rowid, name, description) "
+            "VALUES (%s, %s, %s)",
+            [team.pk, team.name, team.description],
+        )
+
+
+def remove_team(team_id, using=DEFAULT_DB_ALIAS):
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TEAM_SEARCH_TABLE} WHERE rowid = %s", [team_id])
+
+
+def uses_index(keyword, using=DEFAULT_DB_ALIAS):
+    return len(keyword) >= MIN_KEYWORD_LENGTH and is_available(using)
+
+
+def _match_query(keyword):
+    # キーワード全体を1つのフレーズとして部分一致させる
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def search_condition(keyword, using=DEFAULT_DB_ALIAS):
+    """
+    チーム名・説明にキーワードを含むチームの検索条件
+    インデックスが使えないときは部分一致(LIKE)で検索する
+    """
+    if not uses_index(keyword, using):
+        return Q(name__icontains=keyword) | Q(description__icontains=keyword)
+    return Q(search_entry__document__match=_match_query(keyword))
+
+
+def rank_expression(keyword, using=DEFAULT_DB_ALIAS):
+    """
+    検索結果の関連度(小さいほど関連度が高い)
+    インデックスが使えないときはチーム名に一致するチームを優先する
+    """
+    if not uses_index(keyword, using):
+        return Case(
+            When(name__icontains=keyword, then=Value(-2.0)),
+            default=Value(-1.0),
+            output_field=FloatField(),
+        )
+    # 検索条件と同じ結合でFTS5のrank(bm25)を参照する
+    return F("search_entry__rank")
+
+
+@receiver(post_migrate)
+def create_team_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sender.name == Team._meta.app_config.name:
+        create_index(using)
+
+
+@receiver(post_save, sender=Team)
+def update_team_search_index(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    index_team(instance, using)
+
+
+@receiver(post_delete, sender=Team)
+def delete_team_search_index(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    remove_team(instance.pk, using)
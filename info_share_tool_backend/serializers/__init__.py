@@ -1,5 +1,6 @@
 from .user_register import RegisterSerializer
 
-# from .team import TeamSerializer
-from .team import TeamSerializer
-from .channel import ChannelSerializer
+from .team import TeamSerializer, delete_team
+from .channel import ChannelSerializer, delete_channel
+from .change import ChangeLogSerializer
+from .job import JobSerializer
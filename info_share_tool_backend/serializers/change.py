@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from ..models import ChangeLog
+
+
+class ChangeLogSerializer(serializers.ModelSerializer):
+    team = serializers.IntegerField(source="team_id")
+
+    class Meta:
+        model = ChangeLog
+        fields = ("seq", "object_type", "object_id", "team", "action", "created_at")
@@ -1,15 +1,35 @@
+from django.db import transaction
+from django.db.models import F, Prefetch
 from rest_framework import fields, serializers
 from rest_framework.exceptions import ValidationError, NotFound, PermissionDenied
-from .. import models
-
-
-class ChannelMemberSerializer(serializers.PrimaryKeyRelatedField):
+from .. import changes, models
+from ..counters import adjusted
+from ..permissions import get_membership_resolver
+from .fields import BulkPrimaryKeyRelatedField
+from .mixins import SparseFieldsMixin, TimedValidationMixin
+
+
+def delete_channel(channel):
+    """チャネルを削除し、チームのチャネル数を減らす"""
+    with transaction.atomic():
+        # チャネルメンバの行は連鎖して削除されるため、先に記録する
+        changes.record_channel_deleted(channel)
+        channel.delete()
+        models.Team.objects.filter(pk=channel.team_id).update(
+            channel_count=adjusted("channel_count", -1), version=F("version") + 1
+        )
+        changes.record_teams_updated([channel.team_id])
+
+
+class ChannelMemberSerializer(BulkPrimaryKeyRelatedField):
     class Meta:
         model = models.ChannelMember
         fields = ("members",)
 
 
-class ChannelSerializer(serializers.ModelSerializer):
+class ChannelSerializer(
+    SparseFieldsMixin, TimedValidationMixin, serializers.ModelSerializer
+):
     members = ChannelMemberSerializer(
         many=True, queryset=models.User.objects.all(), required=False
     )
@@ -18,17 +38,10 @@ class ChannelSerializer(serializers.ModelSerializer):
         queryset=models.User.objects.all(), write_only=True
     )
 
+    expandable_fields = ("members",)
+
     def create(self, validated_data: dict):
-        # チームとチーム管理者・メンバ取得
         team = validated_data.get("team")
-        team_admins = [
-            team_admin.admin.username
-            for team_admin in models.TeamAdministrator.objects.filter(team=team)
-        ]
-        team_members = [
-            team_member.member.username
-            for team_member in models.TeamMember.objects.filter(team=team)
-        ]
 
         members = validated_data.get("members")
         if members is not None:
@@ -37,31 +50,38 @@ class ChannelSerializer(serializers.ModelSerializer):
             raise ValidationError()
 
         operator_user = validated_data.pop("operator_user")
-        _creator = models.User.objects.filter(username=operator_user).first()
 
         # 操作者が管理者・メンバに含まれないとき権限エラー
-        if _creator.username not in [*team_admins, *team_members]:
+        resolver = get_membership_resolver(self.context.get("request"))
+        if not resolver.is_team_referrer(team, operator_user.pk):
             msg = f"operator: {operator_user} has no permission"
             raise PermissionDenied(msg)
 
-        channel = models.Channel.objects.create(**validated_data, creator=_creator)
+        with transaction.atomic():
+            channel = models.Channel.objects.create(
+                **validated_data, creator=operator_user
+            )
+
+            member_objs = []
+            members = list(set(members))
+            for member in members:
+                member_objs.append(models.ChannelMember(channel=channel, member=member))
+            models.ChannelMember.objects.bulk_create(member_objs)
 
-        member_objs = []
-        members = list(set(members))
-        for member in members:
-            member_objs.append(models.ChannelMember(channel=channel, member=member))
-        models.ChannelMember.objects.bulk_create(member_objs)
+            # チームのチャネル数が変わるため、チームのETagも無効にする
+            models.Team.objects.filter(pk=team.pk).update(
+                channel_count=F("channel_count") + 1, version=F("version") + 1
+            )
+            changes.record_channel(channel, changes.ChangeLog.CREATED)
+            changes.record_teams_updated([team.pk])
 
         return channel
     
     def update(self, instance: models.Channel, validated_data: dict):
         operator_user = validated_data.pop("operator_user")
-        _operator_user = models.User.objects.filter(username=operator_user).first()
 
-        admins = [
-            admin.admin for admin in models.TeamAdministrator.objects.filter(team=instance.team)
-        ]
-        if _operator_user not in admins:
+        resolver = get_membership_resolver(self.context.get("request"))
+        if not resolver.is_team_admin(instance.team_id, operator_user.pk):
             msg = f"operator: {operator_user} has no permission"
             raise PermissionDenied(msg)
 
@@ -69,18 +89,63 @@ class ChannelSerializer(serializers.ModelSerializer):
         instance.description = validated_data.get("description")
         
         members = validated_data.pop("members")
-        models.ChannelMember.objects.filter(channel=instance).delete()
-        user_objs = models.User.objects.filter(username__in=members)
-        member_objs = [
-            models.ChannelMember(channel=instance, member=user_obj) 
-            for user_obj in user_objs
-        ]
-
-        models.ChannelMember.objects.bulk_create(member_objs)
-
-        instance.save()
+        with transaction.atomic():
+            before = set(
+                models.ChannelMember.objects.filter(channel=instance).values_list(
+                    "member_id", flat=True
+                )
+            )
+            models.ChannelMember.objects.filter(channel=instance).delete()
+            member_objs = [
+                models.ChannelMember(channel=instance, member=member)
+                for member in set(members)
+            ]
+
+            models.ChannelMember.objects.bulk_create(member_objs)
+
+            instance.version = F("version") + 1
+            instance.save()
+
+            after = {member.pk for member in members}
+            changes.record_channel(instance, changes.ChangeLog.UPDATED)
+            changes.record_membership(
+                changes.ChangeLog.CHANNEL,
+                instance.pk,
+                instance.team_id,
+                joined=after - before,
+                left=before - after,
+            )
+        instance.refresh_from_db(fields=["version"])
         return instance
 
+    @staticmethod
+    def eager_loading_lookups(fieldset=None):
+        """チャネルメンバを選択したとき、先読みの指定を返す"""
+        if fieldset is not None and not fieldset.includes("members"):
+            return []
+        # 表示するのはユーザ名(主キー)のみのため、他のカラムは取得しない
+        users = models.User.objects.only("username")
+        return [Prefetch("members", queryset=users)]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fieldset=None):
+        """
+        チャネルメンバを先読みするクエリセットを返す
+        チャネルの件数に関わらずクエリ数が一定になる
+        """
+        return queryset.prefetch_related(*cls.eager_loading_lookups(fieldset))
+
     class Meta:
         model = models.Channel
-        fields = "__all__"
+        # version はETagで返すため含めない
+        fields = (
+            "id",
+            "name",
+            "team",
+            "description",
+            "creator",
+            "members",
+            "created_at",
+            "changed_at",
+            "operator_user",
+        )
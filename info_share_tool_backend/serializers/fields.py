@@ -0,0 +1,51 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    主キーのリストを1回のクエリでまとめて解決する ManyRelatedField
+    存在しない主キーはまとめて1つのエラーにする
+    """
+
+    default_error_messages = {
+        "does_not_exist": "Invalid pk(s) {pk_values} - object does not exist.",
+        "incorrect_type": "Incorrect type. Expected pk value, received {data_type}.",
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        queryset = self.child_relation.get_queryset()
+        pk_field = queryset.model._meta.pk
+        try:
+            # 重複を除き、指定された順序を保つ
+            pks = list(dict.fromkeys(pk_field.to_python(value) for value in data))
+        except (TypeError, DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        # in_bulkはバックエンドのパラメタ数上限に合わせて分割して取得する
+        objects = queryset.in_bulk(pks)
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            self.fail(
+                "does_not_exist",
+                pk_values=", ".join(f'"{pk}"' for pk in missing),
+            )
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """many=True のとき BulkManyRelatedField を使う PrimaryKeyRelatedField"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
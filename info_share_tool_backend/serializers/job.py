@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from ..models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "name",
+            "status",
+            "attempts",
+            "error",
+            "created_at",
+            "finished_at",
+        )
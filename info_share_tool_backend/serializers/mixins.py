@@ -0,0 +1,31 @@
+from ..metrics import timer
+
+
+class SparseFieldsMixin:
+    """
+    context の fieldset で選択した項目のみシリアライズする
+    fieldset がないときはすべての項目をシリアライズする
+    """
+
+    # ?expand= で指定できる関連
+    expandable_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # context=None を指定して生成されることがある
+        fieldset = (self.context or {}).get("fieldset")
+        if fieldset is None:
+            return fields
+        return {
+            name: field
+            for name, field in fields.items()
+            if field.write_only or fieldset.includes(name)
+        }
+
+
+class TimedValidationMixin:
+    """シリアライザの検証時間をリクエストの計測値に加算する"""
+
+    def is_valid(self, *, raise_exception=False):
+        with timer("validate"):
+            return super().is_valid(raise_exception=raise_exception)
@@ -1,22 +1,122 @@
+from django.db import connection, transaction
+from django.db.models import F, Prefetch
+from django.utils import timezone
 from rest_framework import fields, serializers
 from rest_framework.exceptions import ValidationError, NotFound, PermissionDenied
 from ..models import Team, User, TeamAdministrator, TeamMember
-from .. import models
+from .. import changes, jobs, models
+from ..counters import adjusted
+from ..permissions import get_membership_resolver
+from .fields import BulkPrimaryKeyRelatedField
+from .mixins import SparseFieldsMixin, TimedValidationMixin
 
 
-class TeamAdministratorSerializer(serializers.PrimaryKeyRelatedField):
+def sync_team_users(model, field, team, users):
+    """
+    チームの管理者・メンバを users に一致させる
+    差分の行のみ追加・削除し、追加・削除したユーザ名を返す
+    """
+    column = f"{field}_id"
+    current = set(model.objects.filter(team=team).values_list(column, flat=True))
+    target = {user.pk for user in users}
+
+    removed = current - target
+    added = target - current
+    if removed:
+        model.objects.filter(team=team, **{f"{column}__in": removed}).delete()
+    model.objects.bulk_create(
+        [model(team=team, **{column: username}) for username in added]
+    )
+    return added, removed
+
+
+def propagate_channel_members(team):
+    """
+    チームに所属するチャネルのメンバーをチームの管理者・メンバに一致させる
+    チャネル×メンバの行を読み込まず、差分のみSQLで削除・追加する
+    同期の更新と同じく、削除・追加したチャネルメンバごとに変更履歴を記録する
+    変更した行数を返す
+    """
+    channel_member_table = models.ChannelMember._meta.db_table
+    channel_table = models.Channel._meta.db_table
+    admin_table = TeamAdministrator._meta.db_table
+    member_table = TeamMember._meta.db_table
+    team_users = f"""
+        SELECT admin_id AS username FROM {admin_table} WHERE team_id = %s
+        UNION
+        SELECT member_id AS username FROM {member_table} WHERE team_id = %s
+    """
+    # チームに所属しなくなったユーザのチャネルメンバ
+    removed = (
+        f"""
+        SELECT cm.id, cm.channel_id, cm.member_id AS username
+        FROM {channel_member_table} cm
+        INNER JOIN {channel_table} c ON c.id = cm.channel_id
+        WHERE c.team_id = %s AND cm.member_id NOT IN ({team_users})
+        """,
+        [team.pk, team.pk, team.pk],
+    )
+    # チャネルメンバでないチームの管理者・メンバ
+    added = (
+        f"""
+        SELECT c.id AS channel_id, u.username
+        FROM {channel_table} c
+        CROSS JOIN ({team_users}) u
+        WHERE c.team_id = %s
+        AND NOT EXISTS (
+            SELECT 1 FROM {channel_member_table} cm
+            WHERE cm.channel_id = c.id AND cm.member_id = u.username
+        )
+        """,
+        [team.pk, team.pk, team.pk],
+    )
+
+    changes.record_channel_memberships(team.pk, changes.ChangeLog.LEFT, *removed)
+    changes.record_channel_memberships(team.pk, changes.ChangeLog.JOINED, *added)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {channel_member_table} "
+            f"WHERE id IN (SELECT id FROM ({removed[0]}) s)",
+            removed[1],
+        )
+        deleted = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {channel_member_table} (channel_id, member_id) "
+            f"SELECT channel_id, username FROM ({added[0]}) s",
+            added[1],
+        )
+        inserted = cursor.rowcount
+    return deleted + inserted
+
+
+def delete_team(team, operator_user):
+    """
+    チームを削除済みにし、管理者・メンバごとに削除を記録する
+    チャネル・所属の削除は操作者のジョブとして行い、登録したジョブを返す
+    """
+    with transaction.atomic():
+        changes.record_team_deleted(team)
+        Team.objects.filter(pk=team.pk).update(
+            deleted_at=timezone.now(), version=F("version") + 1
+        )
+        return jobs.enqueue("delete_team", operator=operator_user, team_id=team.pk)
+
+
+class TeamAdministratorSerializer(BulkPrimaryKeyRelatedField):
     class Meta:
         model = TeamAdministrator
         fields = ("admin",)
 
 
-class TeamMemberSerializer(serializers.PrimaryKeyRelatedField):
+class TeamMemberSerializer(BulkPrimaryKeyRelatedField):
     class Meta:
         model = TeamMember
         fields = ("member",)
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(
+    SparseFieldsMixin, TimedValidationMixin, serializers.ModelSerializer
+):
     administrators = TeamAdministratorSerializer(
         many=True, queryset=User.objects.all(), required=False
     )
@@ -26,98 +126,152 @@ class TeamSerializer(serializers.ModelSerializer):
         queryset=User.objects.all(), write_only=True
     )
 
+    expandable_fields = ("administrators", "members")
+
+    # 更新で登録したチャネルメンバ反映のジョブ
+    job = None
+
     def create(self, validated_data):
         admins = validated_data.pop("administrators")
         members = validated_data.pop("members")
         operator_user = validated_data.pop("operator_user")
 
-        team = Team.objects.create(**validated_data)
-
         # 操作者が管理者に含まれないとき追加する
         if operator_user not in admins:
             admins.append(operator_user)
-        admin_objs = []
         admins = list(set(admins))
-        for admin in admins:
-            admin_objs.append(TeamAdministrator(team=team, admin=admin))
-        TeamAdministrator.objects.bulk_create(admin_objs)
-
-        member_objs = []
         members = list(set(members))
-        for member in members:
-            member_objs.append(TeamMember(team=team, member=member))
-        TeamMember.objects.bulk_create(member_objs)
+
+        with transaction.atomic():
+            team = Team.objects.create(
+                **validated_data, admin_count=len(admins), member_count=len(members)
+            )
+
+            admin_objs = []
+            for admin in admins:
+                admin_objs.append(TeamAdministrator(team=team, admin=admin))
+            TeamAdministrator.objects.bulk_create(admin_objs)
+
+            member_objs = []
+            for member in members:
+                member_objs.append(TeamMember(team=team, member=member))
+            TeamMember.objects.bulk_create(member_objs)
+
+            changes.record_team(team, changes.ChangeLog.CREATED)
+            changes.record_membership(
+                changes.ChangeLog.TEAM,
+                team.pk,
+                team.pk,
+                joined={user.pk for user in admins + members},
+            )
         return team
 
     def update(self, instance: Team, validated_data: dict):
         operator_user = validated_data.pop("operator_user")
-        _operator_user = User.objects.filter(username=operator_user).first()
 
-        admins = [
-            admin.admin for admin in TeamAdministrator.objects.filter(team=instance)
-        ]
-        if _operator_user not in admins:
+        resolver = get_membership_resolver(self.context.get("request"))
+        if not resolver.is_team_admin(instance, operator_user.pk):
             msg = f"operator: {operator_user} has no permission"
             raise PermissionDenied(msg)
 
-        admins = validated_data.pop("administrators")
-        members = validated_data.pop("members")
+        admins = set(validated_data.pop("administrators"))
+        members = set(validated_data.pop("members"))
 
         instance.name = validated_data.get("name")
         instance.description = validated_data.get("description")
 
-        if operator_user not in admins:
-            admins.append(operator_user)
+        admins.add(operator_user)
+
+        with transaction.atomic():
+            # 差分の管理者・メンバのみ追加・削除する
+            added_admins, removed_admins = sync_team_users(
+                TeamAdministrator, "admin", instance, admins
+            )
+            added_members, removed_members = sync_team_users(
+                TeamMember, "member", instance, members
+            )
+
+            # チーム更新をしたとき、チームに所属するチャネルのメンバーの更新をジョブで行う
+            # 実行前に続けて更新したときは、待機中のジョブにまとめる
+            self.job = jobs.enqueue(
+                "propagate_team_members",
+                key=f"propagate_team_members:{instance.pk}",
+                operator=operator_user.pk,
+                team_id=instance.pk,
+            )
+
+            # 管理者・メンバのどちらかとして所属した・所属しなくなったユーザを記録する
+            after_admins = {user.pk for user in admins}
+            after_members = {user.pk for user in members}
+            before = ((after_admins - added_admins) | removed_admins) | (
+                (after_members - added_members) | removed_members
+            )
+            after = after_admins | after_members
+            changes.record_team(instance, changes.ChangeLog.UPDATED)
+            changes.record_membership(
+                changes.ChangeLog.TEAM,
+                instance.pk,
+                instance.pk,
+                joined=after - before,
+                left=before - after,
+            )
 
-        admin_objs = []
-        old_admin_objs = TeamAdministrator.objects.filter(
-            team=instance
-        ).select_related()
-        old_admins = [old_admin_obj.admin for old_admin_obj in old_admin_objs]
-        for admin in admins:
-            admin_objs.append(TeamAdministrator(team=instance, admin=admin))
-        deleted_admins = list(set(old_admins) - set(admins))
-
-        old_admin_objs.delete()
-
-        TeamAdministrator.objects.bulk_create(admin_objs)
-
-        member_objs = []
-        old_member_objs = TeamMember.objects.filter(team=instance).select_related()
-        old_members = [old_member_obj.member for old_member_obj in old_member_objs]
-        for member in members:
-            member_objs.append(TeamMember(team=instance, member=member))
-        # 差分で削除されるメンバーを算出
-        deleted_members = list(set(old_members) - set(members))
-
-        old_member_objs.delete()
-
-        TeamMember.objects.bulk_create(member_objs)
-
-        # チャネルのメンバスコープがlimitedのとき、
-        # チーム更新で削除された管理者・メンバをチャネルメンバでも削除
-        models.ChannelMember.objects.filter(
-            channel__team=instance,
-            member__in=[*deleted_admins, *deleted_members],
-        ).select_related().delete()
-
-        # チャネルのメンバスコープがdefaultのとき、
-        # チーム更新をしたとき、チームに所属するチャネルのメンバーを更新する
-        channel_member_objs = []
-        channels = models.Channel.objects.filter(
-            team=instance
-        ).select_related()
-        for channel in channels:
-            models.ChannelMember.objects.filter(channel=channel).delete()
-            for member in [*members, *admins]:
-                channel_member_objs.append(
-                    models.ChannelMember(channel=channel, member=member)
-                )
-        models.ChannelMember.objects.bulk_create(channel_member_objs)
-
-        instance.save()
+            # 件数は差分で更新し、同時の更新を上書きしない
+            instance.admin_count = adjusted(
+                "admin_count", len(added_admins) - len(removed_admins)
+            )
+            instance.member_count = adjusted(
+                "member_count", len(added_members) - len(removed_members)
+            )
+            instance.version = F("version") + 1
+            # チャネル数など、このリクエストで変更しない項目は上書きしない
+            instance.save(
+                update_fields=[
+                    "name",
+                    "description",
+                    "changed_at",
+                    "admin_count",
+                    "member_count",
+                    "version",
+                ]
+            )
+        instance.refresh_from_db(fields=["version", "admin_count", "member_count"])
         return instance
 
+    @staticmethod
+    def eager_loading_lookups(fieldset=None):
+        """管理者・メンバのうち、選択した関連の先読みの指定を返す"""
+        # 表示するのはユーザ名(主キー)のみのため、他のカラムは取得しない
+        users = User.objects.only("username")
+        lookups = [
+            Prefetch("administrators", queryset=users),
+            Prefetch("members", queryset=users),
+        ]
+        if fieldset is None:
+            return lookups
+        return [lookup for lookup in lookups if fieldset.includes(lookup.prefetch_to)]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fieldset=None):
+        """
+        管理者・メンバを先読みするクエリセットを返す
+        チームの件数に関わらずクエリ数が一定になる
+        """
+        return queryset.prefetch_related(*cls.eager_loading_lookups(fieldset))
+
     class Meta:
         model = Team
-        fields = "__all__"
+        # 論理削除の日時・ETag用の version は内部の管理用のため返さない
+        fields = (
+            "id",
+            "name",
+            "description",
+            "administrators",
+            "members",
+            "created_at",
+            "changed_at",
+            "admin_count",
+            "member_count",
+            "channel_count",
+            "operator_user",
+        )
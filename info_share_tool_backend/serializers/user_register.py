@@ -1,8 +1,10 @@
+from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 from ..models import User
+from .mixins import TimedValidationMixin
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -16,6 +18,6 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         extra_kwargs = {"password": {"write_only": True}}
 
-        def create(self, validated_data):
-            user = User.objects.create_user(**validated_data)
-            return user
+    def validate_password(self, value):
+        # ハッシュ化はCPU時間がかかるため、書き込みのトランザクションの前の検証で行う
+        return make_password(value)
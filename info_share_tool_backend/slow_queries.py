@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .metrics import untimed
+
+
+# 閾値を超えたクエリを1行1件のJSONで出力するロガー
+# 出力先(ローテーションするファイル)は settings.LOGGING で設定する
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 呼び出し元として扱わない、このパッケージのファイル
+IGNORED_FILES = {os.path.join(PACKAGE_DIR, name) for name in ("slow_queries.py", "metrics.py")}
+
+# パラメタを出力するときの1件あたりの最大文字数
+MAX_PARAM_LENGTH = 200
+
+_local = threading.local()
+
+
+def get_threshold():
+    """閾値(秒)。SLOW_QUERY_THRESHOLD_MS が None のときは記録しない"""
+    threshold_ms = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+    return None if threshold_ms is None else threshold_ms / 1000
+
+
+def _origin():
+    """
+    クエリを発行したこのパッケージのコードの位置を返す
+    origin は最も内側のフレーム、view はビューのフレーム
+    """
+    origin = view = None
+    for frame in traceback.extract_stack():
+        filename = os.path.abspath(frame.filename)
+        if not filename.startswith(PACKAGE_DIR) or filename in IGNORED_FILES:
+            continue
+        location = (
+            f"{os.path.relpath(filename, PACKAGE_DIR)}:{frame.lineno} in {frame.name}"
+        )
+        origin = location
+        if view is None and os.path.sep + "views" + os.path.sep in filename:
+            view = location
+    return origin, view
+
+
+def _format_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        params = params.values()
+    formatted = []
+    for param in params:
+        text = param if isinstance(param, (int, float, type(None))) else str(param)
+        if isinstance(text, str) and len(text) > MAX_PARAM_LENGTH:
+            text = text[:MAX_PARAM_LENGTH] + "..."
+        formatted.append(text)
+    return formatted
+
+
+def _explain(connection, sql, params):
+    """データベースの実行計画を返す。取得できないときは None"""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    _local.explaining = True
+    try:
+        # アプリケーションのクエリとしてリクエストのクエリ数・時間に含めない
+        with untimed(), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception:
+        return None
+    finally:
+        _local.explaining = False
+
+
+def _record_slow_query(execute, sql, params, many, context):
+    threshold = get_threshold()
+    if threshold is None or getattr(_local, "explaining", False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration >= threshold:
+        connection = context["connection"]
+        origin, view = _origin()
+        entry = {
+            "time": timezone.now().isoformat(),
+            "database": connection.alias,
+            "duration_ms": round(duration * 1000, 3),
+            "sql": sql,
+            "params": None if many else _format_params(params),
+            "origin": origin,
+            "view": view,
+            "plan": None if many else _explain(connection, sql, params),
+        }
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+    return result
+
+
+@receiver(connection_created)
+def install_slow_query_recorder(sender, connection, **kwargs):
+    if _record_slow_query not in connection.execute_wrappers:
+        # 最も外側で実行し、実行計画の取得の時間をリクエストのクエリの時間に含めない
+        connection.execute_wrappers.insert(0, _record_slow_query)
+
+
+def read_entries(path):
+    """ログファイルとローテーションしたファイル(path.1, path.2, ...)の記録を返す"""
+    paths = [path]
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        paths.append(f"{path}.{index}")
+        index += 1
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries, top=10):
+    """
+    同じSQLの記録をまとめ、合計時間の長い順に返す
+    実行計画と呼び出し元は最も遅かった記録のもの
+    """
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[entry["sql"]].append(entry)
+
+    summaries = []
+    for sql, group in groups.items():
+        durations = sorted(entry["duration_ms"] for entry in group)
+        worst = max(group, key=lambda entry: entry["duration_ms"])
+        summaries.append(
+            {
+                "sql": sql,
+                "count": len(group),
+                "total_ms": round(sum(durations), 3),
+                "mean_ms": round(sum(durations) / len(durations), 3),
+                "max_ms": durations[-1],
+                "origins": sorted({entry["origin"] for entry in group if entry["origin"]}),
+                "view": worst["view"],
+                "params": worst["params"],
+                "plan": worst["plan"],
+            }
+        )
+    summaries.sort(key=lambda summary: summary["total_ms"], reverse=True)
+    return summaries[:top]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db.models import F
+
+from . import changes
+from .db import retry_on_busy
+from .jobs import task
+from .models import Channel, Team
+from .serializers.team import propagate_channel_members
+
+
+@task("propagate_team_members")
+@retry_on_busy
+def propagate_team_members(team_id):
+    """チームの管理者・メンバをチームのチャネルのメンバに反映する"""
+    team = Team.objects.filter(pk=team_id).first()
+    if team is None:
+        # 削除済み
+        return
+    if propagate_channel_members(team):
+        # メンバーが変わったチャネルのETagを無効にする
+        Channel.objects.filter(team=team).update(version=F("version") + 1)
+        changes.record_team_channels_updated(team.pk)
+
+
+@retry_on_busy
+def _delete_channels(team_id, batch_size):
+    ids = list(
+        Channel.all_objects.filter(team_id=team_id)
+        .order_by("id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    # チャネルメンバの行は連鎖して削除される
+    Channel.all_objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+@retry_on_busy
+def _delete_team(team_id):
+    team = Team.all_objects.filter(pk=team_id, deleted_at__isnull=False).first()
+    if team is not None:
+        # 管理者・メンバの行は連鎖して削除される
+        team.delete()
+
+
+@task("delete_team")
+def delete_team(team_id):
+    """
+    削除済みにしたチームのチャネル・所属を削除し、最後にチームの行を削除する
+    書き込みのロックを長く持たないよう、チャネルは少しずつ削除する
+    """
+    batch_size = getattr(settings, "JOB_DELETE_BATCH_SIZE", 100)
+    while _delete_channels(team_id, batch_size):
+        pass
+    _delete_team(team_id)
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from ...models import (
+    Channel,
+    ChannelMember,
+    Team,
+    TeamAdministrator,
+    TeamMember,
+    User,
+)
+
+
+class GenerateSyntheticDataTestCase(TestCase):
+    def generate(self, seed=0):
+        out = StringIO()
+        call_command(
+            "generate_synthetic_data",
+            "--users",
+            "30",
+            "--teams",
+            "5",
+            "--channels",
+            "8",
+            "--batch-size",
+            "7",
+            "--seed",
+            str(seed),
+            stdout=out,
+        )
+        return out.getvalue()
+
+    @staticmethod
+    def snapshot():
+        """主キーに依存しない登録内容"""
+        return {
+            "users": sorted(User.objects.values_list("username", flat=True)),
+            "teams": sorted(
+                Team.objects.values_list(
+                    "name", "description", "admin_count", "member_count", "channel_count"
+                )
+            ),
+            "administrators": sorted(
+                TeamAdministrator.objects.values_list("team__name", "admin_id")
+            ),
+            "members": sorted(TeamMember.objects.values_list("team__name", "member_id")),
+            "channels": sorted(
+                Channel.objects.values_list("name", "team__name", "creator_id")
+            ),
+            "channel_members": sorted(
+                ChannelMember.objects.values_list("channel__name", "member_id")
+            ),
+        }
+
+    @staticmethod
+    def clear():
+        Team.all_objects.all().delete()
+        User.objects.all().delete()
+
+    def test_generate_synthetic_data(self):
+        """
+        指定した件数の合成データを登録する
+        """
+        self.assertIn("done in", self.generate())
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Team.objects.count(), 5)
+        self.assertEqual(Channel.objects.count(), 8)
+
+        # 各チームに管理者が1人以上おり、件数は所属の行と一致する
+        for team in Team.objects.all():
+            self.assertGreaterEqual(team.admin_count, 1)
+            self.assertEqual(team.admin_count, team.teamadministrator_set.count())
+            self.assertEqual(team.member_count, team.teammember_set.count())
+            self.assertEqual(team.channel_count, team.channel_set.count())
+        # チャネルメンバはチームの管理者・メンバから選ぶ
+        for channel_member in ChannelMember.objects.select_related("channel"):
+            team_id = channel_member.channel.team_id
+            self.assertTrue(
+                TeamAdministrator.objects.filter(
+                    team_id=team_id, admin_id=channel_member.member_id
+                ).exists()
+                or TeamMember.objects.filter(
+                    team_id=team_id, member_id=channel_member.member_id
+                ).exists()
+            )
+
+    def test_generate_synthetic_data_seed(self):
+        """
+        同じシードからは同じデータを生成する
+        """
+        self.generate(seed=1)
+        first = self.snapshot()
+        self.assertGreater(len(first["members"]), 0)
+        self.assertGreater(len(first["channel_members"]), 0)
+
+        self.clear()
+        self.generate(seed=1)
+        self.assertEqual(self.snapshot(), first)
+
+        self.clear()
+        self.generate(seed=2)
+        self.assertNotEqual(self.snapshot(), first)
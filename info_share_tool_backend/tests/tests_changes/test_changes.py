@@ -0,0 +1,244 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...changes import compacted_seq
+from ...models import User, ChangeLog
+from ..utils import query_plan
+
+
+class ChangeListTestCase(TestCase):
+    @staticmethod
+    def setUpTestData():
+        User.objects.bulk_create(
+            [
+                User(username=f"user00{i}", email=f"user00{i}@sample.com")
+                for i in range(1, 6)
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_team(self):
+        request_data = {
+            "name": "チーム",
+            "description": "説明",
+            "operator_user": "user001",
+            "administrators": [],
+            "members": ["user002", "user003"],
+        }
+        response = self.client.post("/team/", request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["id"]
+
+    def create_channel(self, team_id, members):
+        request_data = {
+            "name": "チャネル",
+            "team": team_id,
+            "description": "説明",
+            "operator_user": "user001",
+            "members": members,
+        }
+        response = self.client.post("/channel/", request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["id"]
+
+    def get_changes(self, operator_user, since=0, **params):
+        response = self.client.get(
+            "/changes", {"operator_user": operator_user, "since": since, **params}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    @staticmethod
+    def summarize(data):
+        return [
+            (change["object_type"], change["object_id"], change["action"])
+            for change in data["changes"]
+        ]
+
+    def test_get_changes(self):
+        """
+        所属するチーム・チャネルの変更のみ取得する
+        """
+        team_id = self.create_team()
+        channel_id = self.create_channel(team_id, ["user002"])
+
+        data = self.get_changes("user002")
+        self.assertEqual(
+            self.summarize(data),
+            [
+                ("team", team_id, "created"),
+                ("team", team_id, "joined"),
+                ("channel", channel_id, "created"),
+                ("team", team_id, "updated"),
+            ],
+        )
+        self.assertFalse(data["has_more"])
+
+        # チャネルメンバでないユーザにはチャネルの変更は見えない
+        data = self.get_changes("user003")
+        self.assertEqual(
+            self.summarize(data),
+            [
+                ("team", team_id, "created"),
+                ("team", team_id, "joined"),
+                ("team", team_id, "updated"),
+            ],
+        )
+
+        # チームに所属しないユーザには何も見えない
+        data = self.get_changes("user004")
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["next_since"], 0)
+
+    def test_get_changes_incremental(self):
+        """
+        next_since より後の変更のみ取得する
+        """
+        team_id = self.create_team()
+        since = self.get_changes("user002")["next_since"]
+
+        channel_id = self.create_channel(team_id, ["user002"])
+        data = self.get_changes("user002", since)
+        self.assertEqual(
+            self.summarize(data),
+            [("channel", channel_id, "created"), ("team", team_id, "updated")],
+        )
+
+        since = data["next_since"]
+        data = self.get_changes("user002", since)
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["next_since"], since)
+
+    def test_get_changes_pagination(self):
+        """
+        page_size ずつ取得し、続きがあれば has_more を返す
+        """
+        team_id = self.create_team()
+        self.create_channel(team_id, ["user002"])
+
+        data = self.get_changes("user002", page_size=2)
+        self.assertEqual(len(data["changes"]), 2)
+        self.assertTrue(data["has_more"])
+
+        data = self.get_changes("user002", data["next_since"], page_size=2)
+        self.assertEqual(len(data["changes"]), 2)
+        self.assertFalse(data["has_more"])
+
+    def test_get_changes_membership(self):
+        """
+        所属した・所属しなくなったユーザに所属の変更を返す
+        """
+        team_id = self.create_team()
+        channel_id = self.create_channel(team_id, ["user002", "user003"])
+        since = self.get_changes("user003")["next_since"]
+
+        request_data = {
+            "name": "チーム",
+            "description": "説明",
+            "operator_user": "user001",
+            "administrators": ["user002"],
+            "members": ["user004"],
+        }
+        response = self.client.put(f"/team/{team_id}", request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # チャネルメンバはジョブで反映する
+        call_command("run_jobs", "--burst", stdout=StringIO())
+
+        # user002 は管理者になったが、所属は変わらない
+        self.assertNotIn(
+            ("team", team_id, "joined"),
+            self.summarize(self.get_changes("user002", since)),
+        )
+        # ジョブで反映したチャネルメンバの変更も、ユーザごとに返す
+        self.assertEqual(
+            self.summarize(self.get_changes("user003", since)),
+            [("team", team_id, "left"), ("channel", channel_id, "left")],
+        )
+        self.assertEqual(
+            self.summarize(self.get_changes("user004", since)),
+            [
+                ("team", team_id, "updated"),
+                ("team", team_id, "joined"),
+                ("channel", channel_id, "joined"),
+                ("channel", channel_id, "updated"),
+            ],
+        )
+
+    def test_get_changes_deleted(self):
+        """
+        削除したチーム・チャネルは、削除したときの所属していたユーザに返す
+        """
+        team_id = self.create_team()
+        channel_id = self.create_channel(team_id, ["user002"])
+        since = self.get_changes("user002")["next_since"]
+
+        response = self.client.delete(
+            f"/channel/{channel_id}", {"operator_user": "user001"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(f"/team/{team_id}", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # チームの更新は所属しなくなったユーザには見えず、削除のみ返す
+        self.assertEqual(
+            self.summarize(self.get_changes("user002", since)),
+            [("channel", channel_id, "deleted"), ("team", team_id, "deleted")],
+        )
+        self.assertEqual(
+            self.summarize(self.get_changes("user003", since)),
+            [("team", team_id, "deleted")],
+        )
+
+    def test_get_changes_invalid(self):
+        """
+        操作者の指定がない、since が不正なときはエラー
+        """
+        response = self.client.get("/changes", {"since": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/changes", {"operator_user": "user001", "since": "a"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compact_changes(self):
+        """
+        保持期間より古い変更履歴を削除し、それより前の since は410を返す
+        410には全件を取得し直したあとに使う最新の位置を含める
+        """
+        team_id = self.create_team()
+        self.create_channel(team_id, ["user002"])
+        ChangeLog.objects.update(created_at=timezone.now() - datetime.timedelta(days=31))
+        since = self.get_changes("user002")["next_since"]
+        self.create_channel(team_id, ["user002"])
+
+        out = StringIO()
+        call_command("compact_changes", "--batch-size", "1", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "5 changes deleted")
+
+        response = self.client.get("/changes", {"operator_user": "user002", "since": 0})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        latest = ChangeLog.objects.order_by("-seq").first().seq
+        self.assertEqual(response.data["latest_seq"], latest)
+        self.assertLess(response.data["compacted_seq"], latest)
+        data = self.get_changes("user002", response.data["latest_seq"])
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["next_since"], latest)
+
+        data = self.get_changes("user002", since)
+        self.assertEqual(len(data["changes"]), 2)
+
+    def test_compacted_seq_query_plan(self):
+        """
+        圧縮した位置はインデックスから取得し、変更履歴を全件走査しない
+        """
+        with CaptureQueriesContext(connection) as context:
+            compacted_seq()
+        plan = query_plan(context.captured_queries[0]["sql"])
+        self.assertTrue(any("changelog_action_seq_idx" in line for line in plan), plan)
@@ -0,0 +1,74 @@
+from django.test import AsyncClient, TransactionTestCase
+from rest_framework import status
+from ...models import User, Team, TeamAdministrator, TeamMember
+
+
+class AsyncChannelTestCase(TransactionTestCase):
+    # 同期処理は別スレッドの接続で実行するため、トランザクションで囲まない
+    def setUp(self):
+        users = []
+        for i in range(0, 10):
+            users.append(
+                User(
+                    username=f"user{str(i).zfill(3)}",
+                    password="password",
+                    first_name="田中",
+                    last_name=f"{i}太郎",
+                    email=f"user{str(i).zfill(3)}@sample.com",
+                )
+            )
+        User.objects.bulk_create(users)
+
+        team = Team.objects.create(name="チーム", description="説明")
+        TeamAdministrator.objects.create(team=team, admin_id="user001")
+        TeamMember.objects.bulk_create(
+            [TeamMember(team=team, member_id=f"user00{i}") for i in range(2, 6)]
+        )
+        self.team_id = team.id
+        self.client = AsyncClient()
+
+    async def test_channel(self):
+        """
+        チャネルを作成・取得・更新・削除する
+        """
+
+        request_data = {
+            "name": "チャネル",
+            "team": self.team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user002",
+            "members": ["user003", "user004"],
+        }
+        response = await self.client.post(
+            "/async/channel/", request_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["creator"], "user002")
+        channel_id = response.json()["id"]
+
+        url = f"/async/channel/{channel_id}"
+        response = await self.client.get(url, {"operator_user": "user005"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.client.get(url, {"operator_user": "user003"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.json()["members"]), {"user003", "user004"})
+        etag = response["ETag"]
+
+        request_data["operator_user"] = "user001"
+        request_data["members"] = ["user003"]
+        response = await self.client.put(
+            url, request_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = await self.client.delete(
+            url, {"operator_user": "user003"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.client.delete(
+            url, {"operator_user": "user001"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,127 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...models import User, Team, TeamAdministrator, TeamMember, Channel, ChannelMember
+from ..utils import QueryBudgetMixin, query_plan
+
+
+class ChannelListTestCase(QueryBudgetMixin, TestCase):
+    @staticmethod
+    def setUpTestData():
+        users = []
+        for i in range(0, 10):
+            users.append(
+                User(
+                    username=f"user{str(i).zfill(3)}",
+                    password="password",
+                    first_name="田中",
+                    last_name=f"{i}太郎",
+                    email=f"user{str(i).zfill(3)}@sample.com",
+                )
+            )
+        User.objects.bulk_create(users)
+
+        # チームごとに3つのチャネルを作成し、user001 は偶数番目のチャネルのメンバ
+        for i in range(0, 2):
+            team = Team.objects.create(name=f"チーム{i}", description="説明")
+            TeamAdministrator.objects.create(team=team, admin_id="user000")
+            TeamMember.objects.bulk_create(
+                [TeamMember(team=team, member_id=f"user00{j}") for j in range(1, 4)]
+            )
+            for j in range(0, 3):
+                channel = Channel.objects.create(
+                    name=f"チャネル{i}-{j}",
+                    team=team,
+                    description="説明",
+                    creator_id="user000",
+                )
+                members = ["user002"] + (["user001"] if j % 2 == 0 else [])
+                ChannelMember.objects.bulk_create(
+                    [ChannelMember(channel=channel, member_id=m) for m in members]
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_get_channel_list(self):
+        """
+        操作者がメンバのチャネルの一覧を取得する DESC は作成の新しい順
+        """
+        url = "/channel/list"
+        response = self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [channel["name"] for channel in response.data["results"]]
+        self.assertEqual(
+            names, ["チャネル0-0", "チャネル0-2", "チャネル1-0", "チャネル1-2"]
+        )
+
+        response = self.client.get(url, {"operator_user": "user001", "order": "DESC"})
+        names = [channel["name"] for channel in response.data["results"]]
+        self.assertEqual(
+            names, ["チャネル1-2", "チャネル1-0", "チャネル0-2", "チャネル0-0"]
+        )
+
+    def test_get_channel_list_pagination(self):
+        """
+        チャネルの一覧をページ分割して取得する ページによらずクエリ数が一定
+        """
+        url = "/channel/list"
+        names = []
+        params = {"operator_user": "user002", "page_size": 2}
+        while url is not None:
+            with self.assertQueryBudget(2):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [channel["name"] for channel in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(len(names), 6)
+        self.assertEqual(len(set(names)), 6)
+
+    def test_get_channel_list_query_plan(self):
+        """
+        チャネルの一覧はページごとにインデックスを範囲検索し、一時的なソートをしない
+        """
+        team = Team.objects.get(name="チーム1")
+        # チームのチャネルの一覧はチームの取得を含む
+        for url, budget in [("/channel/list", 2), (f"/team/{team.id}/channels", 3)]:
+            for order in ["ASC", "DESC"]:
+                params = {"operator_user": "user002", "page_size": 1, "order": order}
+                response = self.client.get(url, params)
+                # 2ページ目(キーセットの範囲の条件を含む)のクエリの実行計画を確認する
+                with self.assertQueryBudget(budget) as context:
+                    response = self.client.get(response.data["next"])
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                sql = next(
+                    query["sql"]
+                    for query in context.captured_queries
+                    if 'FROM "info_share_tool_backend_channel"' in query["sql"]
+                )
+                plan = query_plan(sql)
+                self.assertFalse(
+                    any(line.startswith(("SCAN", "USE TEMP")) for line in plan), plan
+                )
+
+    def test_get_channel_list_no_operator(self):
+        """
+        操作者を指定せずにチャネルの一覧を取得する
+        """
+        response = self.client.get("/channel/list")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_team_channel_list(self):
+        """
+        チームのチャネルのうち、操作者がメンバのチャネルの一覧を取得する
+        """
+        team = Team.objects.get(name="チーム1")
+        url = f"/team/{team.id}/channels"
+        response = self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [channel["name"] for channel in response.data["results"]]
+        self.assertEqual(names, ["チャネル1-0", "チャネル1-2"])
+
+        # チームに所属しない操作者
+        response = self.client.get(url, {"operator_user": "user005"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get("/team/0/channels", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
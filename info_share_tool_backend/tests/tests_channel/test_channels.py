@@ -169,4 +169,128 @@ class ChannelTestCase(TestCase):
             if isinstance(request_data[param], list):
                 self.assertEqual(set(response.data[param]), set(request_data[param]))
             else:
-                self.assertEqual(response.data[param], request_data[param])
\ No newline at end of file
+                self.assertEqual(response.data[param], request_data[param])
+
+    def test_get_channel_no_permission(self):
+        """
+        チャネルを取得する チャネルメンバではない
+        """
+
+        request_data = {
+            "name": "チャネル",
+            "team": ChannelTestCase.created_team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": [
+                "user003",
+                "user004",
+            ],
+        }
+        url = "/channel/"
+        response = self.client.post(url, request_data, format="json")
+        channel_id = response.data.get("id")
+
+        url = f"/channel/{channel_id}"
+        response = self.client.get(url, {"operator_user": "user003"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 内部の管理用のカラムは返さない
+        self.assertNotIn("version", response.data)
+
+        response = self.client.get(url, {"operator_user": "user005"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_channel_no_permission(self):
+        """
+        チャネルを削除する チーム管理者ではない
+        """
+
+        request_data = {
+            "name": "チャネル",
+            "team": ChannelTestCase.created_team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": [
+                "user003",
+                "user004",
+            ],
+        }
+        url = "/channel/"
+        response = self.client.post(url, request_data, format="json")
+        channel_id = response.data.get("id")
+
+        url = f"/channel/{channel_id}"
+        response = self.client.delete(url, {"operator_user": "user003"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.delete(url, {"operator_user": "user002"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(models.Channel.objects.filter(id=channel_id).exists())
+
+    def test_get_channel_etag(self):
+        """
+        チャネルを取得する
+        ETagが一致すれば304、更新後は200を返す
+        """
+
+        request_data = {
+            "name": "チャネル",
+            "team": ChannelTestCase.created_team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": [
+                "user003",
+                "user004",
+            ],
+        }
+        response = self.client.post("/channel/", request_data, format="json")
+        channel_id = response.data.get("id")
+
+        url = f"/channel/{channel_id}"
+        response = self.client.get(url, {"operator_user": "user003"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        response = self.client.get(
+            url, {"operator_user": "user003"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        request_data["members"] = ["user003"]
+        response = self.client.put(url, request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = self.client.get(
+            url, {"operator_user": "user003"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["members"], ["user003"])
+
+    def test_get_channel_fields(self):
+        """
+        項目を選択してチャネルを取得する
+        """
+
+        request_data = {
+            "name": "チャネル",
+            "team": ChannelTestCase.created_team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": ["user003"],
+        }
+        response = self.client.post("/channel/", request_data, format="json")
+        url = f"/channel/{response.data['id']}"
+
+        response = self.client.get(url, {"operator_user": "user003", "fields": "name"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"id", "name"})
+
+        response = self.client.get(
+            url, {"operator_user": "user003", "fields": "name", "expand": "members"}
+        )
+        self.assertEqual(response.data["members"], ["user003"])
+
+        response = self.client.get(
+            url, {"operator_user": "user003", "expand": "team"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,199 @@
+import gzip
+import unittest
+import zlib
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from ... import compression
+from ...middleware import CompressionMiddleware
+from ...models import User, Team, TeamAdministrator, TeamMember
+
+
+class SelectEncodingTestCase(SimpleTestCase):
+    def test_select_encoding(self):
+        """
+        q値の最も大きい形式を選ぶ 同じときはサーバの優先順
+        """
+        encodings = ["zstd", "br", "gzip"]
+        self.assertEqual(compression.select_encoding("gzip, br", encodings), "br")
+        self.assertEqual(
+            compression.select_encoding("gzip;q=1.0, br;q=0.5", encodings), "gzip"
+        )
+        self.assertEqual(compression.select_encoding("*", encodings), "zstd")
+        self.assertEqual(
+            compression.select_encoding("*;q=0.5, zstd;q=0, gzip", encodings), "gzip"
+        )
+        # 受け付けないときは圧縮しない
+        self.assertIsNone(compression.select_encoding("", encodings))
+        self.assertIsNone(compression.select_encoding("identity", encodings))
+        self.assertIsNone(compression.select_encoding("gzip;q=0", encodings))
+        self.assertIsNone(compression.select_encoding("gzip;q=x", encodings))
+
+
+@override_settings(COMPRESSION_ENCODINGS=["gzip"], COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTestCase(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, **headers):
+        request = self.factory.get("/", headers=headers)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compress(self):
+        """
+        gzipで圧縮し、Content-Length・Vary を更新する 強いETagは弱いETagにする
+        """
+        content = b'{"members": [' + b'"user001", ' * 100 + b"]}"
+        response = HttpResponse(content, content_type="application/json")
+        response["ETag"] = '"team-1-v1"'
+        response = self.run_middleware(response, accept_encoding="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"team-1-v1"')
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(content))
+        self.assertEqual(gzip.decompress(response.content), content)
+
+    def test_not_compressed(self):
+        """
+        閾値より小さいもの、受け付けないもの、圧縮済みのものは圧縮しない
+        """
+        content = b"a" * 200
+        response = self.run_middleware(HttpResponse(b"a" * 99), accept_encoding="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertFalse(response.has_header("Vary"))
+
+        response = self.run_middleware(HttpResponse(content), accept_encoding="identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response.content, content)
+
+        response = HttpResponse(content)
+        response["Content-Encoding"] = "br"
+        response = self.run_middleware(response, accept_encoding="gzip")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response.content, content)
+
+        response = HttpResponse(content)
+        response["Cache-Control"] = "no-transform"
+        response = self.run_middleware(response, accept_encoding="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_incompressible(self):
+        """
+        圧縮しても小さくならないときはそのまま送る
+        """
+        content = zlib.compress(bytes(range(256)) * 4)
+        response = self.run_middleware(HttpResponse(content), accept_encoding="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, content)
+
+    def test_streaming(self):
+        """
+        ストリーミングのレスポンスはチャンクごとに復元できる形で送る
+        """
+        chunks = [b"data: %d\n\n" % i for i in range(3)]
+        response = StreamingHttpResponse(iter(chunks))
+        response = self.run_middleware(response, accept_encoding="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+
+        decompressor = zlib.decompressobj(31)
+        received = []
+        for chunk in response.streaming_content:
+            received.append(decompressor.decompress(chunk))
+            if len(received) <= len(chunks):
+                # 次のチャンクを待たずに、送ったチャンクを復元できる
+                self.assertEqual(received[-1], chunks[len(received) - 1])
+        self.assertEqual(b"".join(received), b"".join(chunks))
+        self.assertTrue(decompressor.eof)
+
+    async def test_async_streaming(self):
+        """
+        非同期のストリーミングのレスポンスも圧縮する
+        """
+        chunks = [b"data: %d\n\n" % i for i in range(3)]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        response = self.run_middleware(
+            StreamingHttpResponse(stream()), accept_encoding="gzip"
+        )
+        self.assertTrue(response.is_async)
+        received = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(gzip.decompress(b"".join(received)), b"".join(chunks))
+
+    @unittest.skipIf("br" not in compression.CODECS, "brotli is not installed")
+    @override_settings(COMPRESSION_ENCODINGS=["zstd", "br", "gzip"])
+    def test_brotli(self):
+        import brotli
+
+        content = b"a" * 200
+        response = self.run_middleware(HttpResponse(content), accept_encoding="br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), content)
+
+    @unittest.skipIf("zstd" not in compression.CODECS, "zstandard is not installed")
+    @override_settings(COMPRESSION_ENCODINGS=["zstd", "br", "gzip"])
+    def test_zstd(self):
+        import zstandard
+
+        content = b"a" * 200
+        response = self.run_middleware(HttpResponse(content), accept_encoding="zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertEqual(
+            zstandard.ZstdDecompressor().decompress(
+                response.content, max_output_size=len(content)
+            ),
+            content,
+        )
+
+
+@override_settings(COMPRESSION_ENCODINGS=["gzip"])
+class CompressionTestCase(TestCase):
+    @staticmethod
+    def setUpTestData():
+        User.objects.bulk_create(
+            [
+                User(username=f"user{i:03}", email=f"user{i:03}@sample.com")
+                for i in range(200)
+            ]
+        )
+        team = Team.objects.create(name="チーム", description="説明", admin_count=1)
+        TeamAdministrator.objects.create(team=team, admin_id="user000")
+        TeamMember.objects.bulk_create(
+            [TeamMember(team=team, member_id=f"user{i:03}") for i in range(200)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_compress_team(self):
+        """
+        メンバーの多いチームを圧縮して返す 弱いETagで304を返す
+        """
+        team = Team.objects.get()
+        url = f"/team/{team.id}"
+        raw = self.client.get(url, {"operator_user": "user000"})
+        self.assertFalse(raw.has_header("Content-Encoding"))
+
+        response = self.client.get(
+            url, {"operator_user": "user000"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), raw.content)
+        self.assertLess(len(response.content), len(raw.content) // 3)
+        self.assertIn("compress;dur=", response["Server-Timing"])
+
+        response = self.client.get(
+            url,
+            {"operator_user": "user000"},
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
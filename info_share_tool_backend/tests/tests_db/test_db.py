@@ -0,0 +1,84 @@
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from ...db import configure_sqlite, retry_on_busy
+from ...models import Team
+
+
+def failing(message):
+    """常に OperationalError になる関数と、呼び出し回数のリストを返す"""
+    calls = []
+
+    def func():
+        calls.append(1)
+        raise OperationalError(message)
+
+    return func, calls
+
+
+@override_settings(DATABASE_BUSY_RETRIES=2, DATABASE_BUSY_RETRY_DELAY=0)
+class RetryOnBusyTestCase(TransactionTestCase):
+    def test_retry_on_busy(self):
+        """
+        ロック待ちで失敗したトランザクションは巻き戻して再試行する
+        """
+        calls = []
+
+        @retry_on_busy
+        def create_team():
+            calls.append(connection.in_atomic_block)
+            Team.objects.create(name=f"チーム{len(calls)}", description="説明")
+            if len(calls) < 3:
+                raise OperationalError("database is locked")
+
+        with self.assertLogs("info_share_tool_backend.db", "WARNING") as logs:
+            create_team()
+        self.assertEqual(calls, [True, True, True])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(list(Team.objects.values_list("name", flat=True)), ["チーム3"])
+
+    def test_retry_on_busy_exhausted(self):
+        """
+        再試行の回数を超えたときはエラーになる
+        """
+        func, calls = failing("database is locked")
+        with self.assertLogs("info_share_tool_backend.db", "WARNING") as logs:
+            with self.assertRaises(OperationalError):
+                retry_on_busy(func)()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(logs.records), 2)
+
+    def test_retry_on_busy_other_error(self):
+        """
+        ロック待ち以外のエラーは再試行しない
+        """
+        func, calls = failing("no such table: team")
+        with self.assertRaises(OperationalError):
+            retry_on_busy(func)()
+        self.assertEqual(len(calls), 1)
+
+    def test_retry_on_busy_in_transaction(self):
+        """
+        外側のトランザクションの中では再試行しない
+        """
+        func, calls = failing("database is locked")
+        with self.assertRaises(OperationalError):
+            with transaction.atomic():
+                retry_on_busy(func)()
+        self.assertEqual(len(calls), 1)
+
+
+class SQLitePragmaTestCase(TestCase):
+    @override_settings(SQLITE_PRAGMAS={"cache_size": -4096})
+    def test_configure_sqlite(self):
+        """
+        接続時に設定のPRAGMAを適用する
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            (default,) = cursor.fetchone()
+            try:
+                configure_sqlite(sender=connection.__class__, connection=connection)
+                cursor.execute("PRAGMA cache_size")
+                self.assertEqual(cursor.fetchone(), (-4096,))
+            finally:
+                cursor.execute(f"PRAGMA cache_size = {default}")
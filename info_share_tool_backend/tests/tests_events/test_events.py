@@ -0,0 +1,183 @@
+import asyncio
+import gc
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...events import ChangeLogBroker, Event, LocalBroker, get_broker
+from ...models import User, ChangeLog
+from ...views.events import AsyncEventStreamView
+
+
+def parse_event(chunk):
+    fields = dict(
+        line.split(": ", 1) for line in chunk.decode().strip().split("\n")
+    )
+    return int(fields["id"]), json.loads(fields["data"])
+
+
+class EventStreamTestCase(TransactionTestCase):
+    # 同期処理は別スレッドの接続で実行するため、トランザクションで囲まない
+    def setUp(self):
+        User.objects.bulk_create(
+            [
+                User(username=f"user00{i}", email=f"user00{i}@sample.com")
+                for i in range(1, 6)
+            ]
+        )
+        self.client = AsyncClient()
+
+    @staticmethod
+    def create_team():
+        request_data = {
+            "name": "チーム",
+            "description": "説明",
+            "operator_user": "user001",
+            "administrators": [],
+            "members": ["user002"],
+        }
+        return APIClient().post("/team/", request_data, format="json").data["id"]
+
+    @staticmethod
+    def update_team(team_id, members):
+        request_data = {
+            "name": "チーム",
+            "description": "説明",
+            "operator_user": "user001",
+            "administrators": [],
+            "members": members,
+        }
+        APIClient().put(f"/team/{team_id}", request_data, format="json")
+
+    async def next_chunk(self, chunks):
+        return await asyncio.wait_for(anext(chunks), 5)
+
+    async def test_stream_changes(self):
+        """
+        接続前の変更を送ったあと、所属するチームの変更を通知されるたびに送る
+        """
+        team_id = await sync_to_async(self.create_team)()
+
+        response = await self.client.get(
+            "/async/events", {"operator_user": "user002", "since": 0}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await self.next_chunk(chunks), b"retry: 1000\n\n")
+
+        actions = []
+        for _ in range(2):
+            _, data = parse_event(await self.next_chunk(chunks))
+            actions.append((data["object_type"], data["action"]))
+        self.assertEqual(actions, [("team", "created"), ("team", "joined")])
+
+        await sync_to_async(self.update_team)(team_id, ["user002", "user003"])
+        _, data = parse_event(await self.next_chunk(chunks))
+        self.assertEqual((data["team"], data["action"]), (team_id, "updated"))
+
+        # 切断してレスポンスを破棄すると購読をやめる
+        await chunks.aclose()
+        del chunks, response
+        gc.collect()
+        await asyncio.sleep(0.1)
+        self.assertEqual(get_broker().subscriber_count, 0)
+
+    async def test_stream_joined_team(self):
+        """
+        接続後に所属したチームの変更も送り、所属しないチームの変更は送らない
+        """
+        team_id = await sync_to_async(self.create_team)()
+
+        with mock.patch.object(AsyncEventStreamView, "keepalive_interval", 0.2):
+            response = await self.client.get(
+                "/async/events", {"operator_user": "user004"}
+            )
+            chunks = aiter(response.streaming_content)
+            await self.next_chunk(chunks)
+
+            await sync_to_async(self.create_team)()
+            self.assertEqual(await self.next_chunk(chunks), b": keepalive\n\n")
+
+            await sync_to_async(self.update_team)(team_id, ["user004"])
+            _, data = parse_event(await self.next_chunk(chunks))
+            self.assertEqual((data["team"], data["action"]), (team_id, "updated"))
+            _, data = parse_event(await self.next_chunk(chunks))
+            self.assertEqual((data["team"], data["action"]), (team_id, "joined"))
+            await chunks.aclose()
+
+    async def test_stream_last_event_id(self):
+        """
+        Last-Event-ID より後の変更から再開する
+        """
+        await sync_to_async(self.create_team)()
+        seq = await ChangeLog.objects.filter(action="joined").order_by("-seq").afirst()
+
+        response = await self.client.get(
+            "/async/events",
+            {"operator_user": "user002"},
+            headers={"Last-Event-ID": str(seq.seq - 1)},
+        )
+        chunks = aiter(response.streaming_content)
+        await self.next_chunk(chunks)
+        event_id, data = parse_event(await self.next_chunk(chunks))
+        self.assertEqual(event_id, seq.seq)
+        await chunks.aclose()
+
+    async def test_stream_max_duration(self):
+        """
+        最長時間を過ぎたら終了し、購読をやめる
+        """
+        with mock.patch.object(AsyncEventStreamView, "max_duration", 0.1):
+            response = await self.client.get(
+                "/async/events", {"operator_user": "user002"}
+            )
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(chunks, [b"retry: 1000\n\n"])
+        self.assertEqual(get_broker().subscriber_count, 0)
+
+    async def test_stream_no_operator(self):
+        """
+        操作者の指定がないときはエラー
+        """
+        response = await self.client.get("/async/events")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BrokerTestCase(TransactionTestCase):
+    async def test_local_broker_overflow(self):
+        """
+        受け取りが追いつかないときは、通知をまとめて None を返す
+        """
+        broker = LocalBroker()
+        broker.queue_size = 1
+        with broker.subscribe() as subscription:
+            broker.publish(Event(frozenset({1})))
+            self.assertEqual(await subscription.get(), [Event(frozenset({1}))])
+
+            for team_id in range(3):
+                broker.publish(Event(frozenset({team_id})))
+            self.assertIsNone(await subscription.get())
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_change_log_broker(self):
+        """
+        他のプロセスで記録した変更を、変更履歴から読んで配信する
+        """
+        broker = ChangeLogBroker()
+        broker.poll_interval = 0.05
+        with broker.subscribe() as subscription:
+            # 最初の確認で購読前の位置を記録するまで待つ
+            await asyncio.sleep(0.2)
+            await ChangeLog.objects.acreate(
+                object_type=ChangeLog.TEAM,
+                object_id=1,
+                team_id=1,
+                action=ChangeLog.JOINED,
+                username="user001",
+            )
+            events = await asyncio.wait_for(subscription.get(), 5)
+        self.assertEqual(events, [Event(frozenset({1}), frozenset({"user001"}))])
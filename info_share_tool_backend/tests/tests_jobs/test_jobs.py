@@ -0,0 +1,210 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from ... import jobs
+from ...models import Channel, ChannelMember, Job, Team, TeamAdministrator, User
+
+# 失敗させる回数
+failures = {"count": 0}
+
+
+@jobs.task("test_flaky")
+def flaky():
+    if failures["count"] > 0:
+        failures["count"] -= 1
+        raise RuntimeError("flaky")
+
+
+class JobTestCase(TestCase):
+    @staticmethod
+    def setUpTestData():
+        User.objects.bulk_create(
+            [
+                User(username=f"user{i:03}", email=f"user{i:03}@sample.com")
+                for i in range(1, 4)
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        failures["count"] = 0
+
+    def run_due(self, worker="worker"):
+        """実行できるジョブを1件実行する"""
+        job = jobs.claim(worker, visibility_timeout=300)
+        self.assertIsNotNone(job)
+        return jobs.run_job(job, worker)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=10)
+    def test_retry(self):
+        """
+        失敗したジョブは待ち時間をおいて再試行し、最大回数で失敗にする
+        """
+        failures["count"] = 5
+        job = jobs.enqueue("test_flaky")
+
+        with self.assertLogs("info_share_tool_backend.jobs", "WARNING"):
+            self.assertFalse(self.run_due())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn("RuntimeError", job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + datetime.timedelta(seconds=9))
+        # 待ち時間の間は取り出さない
+        self.assertIsNone(jobs.claim("worker", visibility_timeout=300))
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs("info_share_tool_backend.jobs", "WARNING"):
+            self.assertFalse(self.run_due())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_succeeded(self):
+        """
+        再試行で成功したジョブは成功にする
+        """
+        failures["count"] = 1
+        job = jobs.enqueue("test_flaky")
+        with self.assertLogs("info_share_tool_backend.jobs", "WARNING"):
+            self.assertFalse(self.run_due())
+        Job.objects.update(run_after=timezone.now())
+        self.assertTrue(self.run_due())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_visibility_timeout(self):
+        """
+        確保の期限を過ぎたジョブは他のワーカーが取り出し、元のワーカーは結果を書き込まない
+        """
+        job = jobs.enqueue("test_flaky")
+        claimed = jobs.claim("worker1", visibility_timeout=300)
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(jobs.claim("worker2", visibility_timeout=300))
+
+        Job.objects.update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        reclaimed = jobs.claim("worker2", visibility_timeout=300)
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+
+        jobs.run_job(claimed, "worker1")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.locked_by, "worker2")
+
+        jobs.run_job(reclaimed, "worker2")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_enqueue_key(self):
+        """
+        同じキーの待機中のジョブがあれば新たに登録しない
+        """
+        job = jobs.enqueue("test_flaky", key="a")
+        self.assertEqual(jobs.enqueue("test_flaky", key="a").pk, job.pk)
+        self.assertNotEqual(jobs.enqueue("test_flaky", key="b").pk, job.pk)
+        # 他の操作者のジョブにはまとめない
+        self.assertNotEqual(
+            jobs.enqueue("test_flaky", key="a", operator="user001").pk, job.pk
+        )
+        self.assertRaises(LookupError, jobs.enqueue, "unknown")
+
+    def test_enqueue_key_claimed(self):
+        """
+        読み取りの後にワーカーが確保したジョブにはまとめず、新たに登録する
+        """
+        job = jobs.enqueue("test_flaky", key="a", value=1)
+        original = Job.objects.filter
+        claimed = []
+
+        def filter_then_claim(*args, **kwargs):
+            queryset = original(*args, **kwargs)
+            # 待機中のジョブを読み取った直後にワーカーが確保する
+            if "key" in kwargs:
+                queued = queryset.first()
+                claimed.append(jobs.claim("worker", 60))
+                return mock.Mock(first=mock.Mock(return_value=queued))
+            return queryset
+
+        with mock.patch.object(Job.objects, "filter", side_effect=filter_then_claim):
+            queued = jobs.enqueue("test_flaky", key="a", value=2)
+        self.assertEqual(claimed[0].pk, job.pk)
+        self.assertNotEqual(queued.pk, job.pk)
+        self.assertEqual(queued.payload, {"value": 2})
+        job.refresh_from_db()
+        self.assertEqual(job.payload, {"value": 1})
+
+        # 待機中のままならペイロードを更新してまとめる
+        self.assertEqual(jobs.enqueue("test_flaky", key="a", value=3).pk, queued.pk)
+        queued.refresh_from_db()
+        self.assertEqual(queued.payload, {"value": 3})
+
+    def test_get_job(self):
+        """
+        ジョブの状態を取得する 登録した操作者のみ参照できる
+        """
+        job = jobs.enqueue("test_flaky", operator="user001")
+        url = f"/job/{job.pk}"
+        response = self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Job.QUEUED)
+
+        out = StringIO()
+        call_command("run_jobs", "--burst", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "1 jobs processed")
+        response = self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.data["status"], Job.SUCCEEDED)
+        self.assertEqual(response.data["attempts"], 1)
+
+        response = self.client.get(url, {"operator_user": "user002"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(f"/job/{job.pk + 1}", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_failed_job(self):
+        """
+        失敗したジョブはトレースバックではなく例外の種類のみ返す
+        """
+        failures["count"] = 1
+        job = jobs.enqueue("test_flaky", operator="user001")
+        with self.assertLogs("info_share_tool_backend.jobs", "WARNING"):
+            self.run_due()
+
+        response = self.client.get(f"/job/{job.pk}", {"operator_user": "user001"})
+        self.assertEqual(response.data["status"], Job.QUEUED)
+        self.assertEqual(response.data["error"], "RuntimeError")
+        self.assertNotIn("last_error", response.data)
+
+    @override_settings(JOB_DELETE_BATCH_SIZE=2)
+    def test_delete_team(self):
+        """
+        削除したチームはすぐに見えなくなり、チャネル・所属はジョブで削除する
+        """
+        team = Team.objects.create(name="チーム", description="説明", admin_count=1)
+        TeamAdministrator.objects.create(team=team, admin_id="user001")
+        for i in range(5):
+            channel = Channel.objects.create(
+                name=f"チャネル{i}", team=team, creator_id="user001"
+            )
+            ChannelMember.objects.create(channel=channel, member_id="user001")
+
+        response = self.client.delete(f"/team/{team.pk}", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f"/team/{team.pk}", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Channel.objects.filter(team_id=team.pk).exists())
+        self.assertEqual(Channel.all_objects.filter(team_id=team.pk).count(), 5)
+
+        call_command("run_jobs", "--burst", stdout=StringIO())
+        self.assertFalse(Team.all_objects.filter(pk=team.pk).exists())
+        self.assertFalse(Channel.all_objects.filter(team_id=team.pk).exists())
+        self.assertFalse(ChannelMember.objects.exists())
+        self.assertFalse(TeamAdministrator.objects.exists())
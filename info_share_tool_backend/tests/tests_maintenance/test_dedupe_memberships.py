@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, models
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import isolate_apps
+from ...maintenance import apply_constraints, delete_duplicates
+from ...models import User, Team, TeamMember
+
+
+class MembershipConstraintTestCase(TestCase):
+    def test_unique_team_member(self):
+        """
+        同じチーム・メンバの行は登録できない
+        """
+        User.objects.create(username="user001", email="user001@sample.com")
+        team = Team.objects.create(name="チーム", description="説明")
+        TeamMember.objects.create(team=team, member_id="user001")
+        with self.assertRaises(IntegrityError):
+            TeamMember.objects.create(team=team, member_id="user001")
+
+
+@isolate_apps("info_share_tool_backend")
+class DedupeMembershipsTestCase(TransactionTestCase):
+    def setUp(self):
+        # 一意制約・インデックスがない以前のテーブルを再現する
+        class LegacyTeamMember(models.Model):
+            team_id = models.BigIntegerField()
+            member_id = models.CharField(max_length=150)
+
+            class Meta:
+                app_label = "info_share_tool_backend"
+                db_table = TeamMember._meta.db_table
+
+        self.legacy_model = LegacyTeamMember
+        with connection.schema_editor() as editor:
+            editor.delete_model(TeamMember)
+            editor.create_model(LegacyTeamMember)
+
+        User.objects.bulk_create(
+            [
+                User(username=f"user00{i}", email=f"user00{i}@sample.com")
+                for i in range(1, 4)
+            ]
+        )
+        self.team = Team.objects.create(name="チーム", description="説明")
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(self.legacy_model)
+            editor.create_model(TeamMember)
+
+    def test_dedupe_memberships(self):
+        """
+        重複した行を削除し、一意制約・インデックスを作成する
+        """
+        rows = ["user001", "user002", "user001", "user003", "user001", "user002"]
+        self.legacy_model.objects.bulk_create(
+            [self.legacy_model(team_id=self.team.id, member_id=row) for row in rows]
+        )
+        first_ids = {
+            member_id: min(
+                self.legacy_model.objects.filter(member_id=member_id).values_list(
+                    "id", flat=True
+                )
+            )
+            for member_id in set(rows)
+        }
+
+        self.assertEqual(delete_duplicates(TeamMember, batch_size=2), 3)
+        self.assertEqual(
+            dict(TeamMember.objects.values_list("member_id", "id")), first_ids
+        )
+
+        created = apply_constraints(TeamMember)
+        self.assertEqual(
+            sorted(created), ["team_member_member_team_idx", "unique_team_member"]
+        )
+        with self.assertRaises(IntegrityError):
+            TeamMember.objects.create(team=self.team, member_id="user001")
+
+        # 作成済みのときは何もしない
+        out = StringIO()
+        call_command("dedupe_memberships", stdout=out)
+        self.assertIn(f"{TeamMember._meta.db_table}: 0 duplicate rows deleted", out.getvalue())
+        self.assertNotIn("created", out.getvalue())
@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from ...models import User, Team, TeamAdministrator, TeamMember, Channel
+
+
+class RepairTeamCountersTestCase(TestCase):
+    def test_repair_team_counters(self):
+        """
+        件数が一致しないチームのみ修正する
+        """
+        User.objects.bulk_create(
+            [
+                User(username=f"user00{i}", email=f"user00{i}@sample.com")
+                for i in range(1, 4)
+            ]
+        )
+        # ORMで直接登録したため、件数が一致しない
+        team = Team.objects.create(name="チーム", description="説明")
+        TeamAdministrator.objects.create(team=team, admin_id="user001")
+        TeamMember.objects.bulk_create(
+            [TeamMember(team=team, member_id=f"user00{i}") for i in range(2, 4)]
+        )
+        Channel.objects.create(name="チャネル", team=team, description="説明")
+        consistent = Team.objects.create(name="チーム", description="説明")
+
+        out = StringIO()
+        call_command("repair_team_counters", "--batch-size", "1", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "1 teams repaired")
+
+        team.refresh_from_db()
+        self.assertEqual(
+            (team.admin_count, team.member_count, team.channel_count), (1, 2, 1)
+        )
+        self.assertEqual(team.version, 2)
+        consistent.refresh_from_db()
+        self.assertEqual(consistent.version, 1)
+
+        out = StringIO()
+        call_command("repair_team_counters", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "0 teams repaired")
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import TransactionTestCase
+from django.test.utils import isolate_apps
+from ...maintenance import add_missing_columns
+from ...models import Channel, Job, Team, TeamMember, User
+
+
+@isolate_apps("info_share_tool_backend")
+class UpgradeSchemaTestCase(TransactionTestCase):
+    def setUp(self):
+        # 件数・バージョン・論理削除のカラムがない以前のチームのテーブルを再現する
+        class LegacyTeam(models.Model):
+            name = models.CharField(max_length=64)
+            description = models.CharField(max_length=200)
+            created_at = models.TimeField(auto_now_add=True)
+            changed_at = models.TimeField(auto_now=True)
+
+            class Meta:
+                app_label = "info_share_tool_backend"
+                db_table = Team._meta.db_table
+
+        self.legacy_model = LegacyTeam
+        with connection.schema_editor() as editor:
+            editor.delete_model(Team)
+            editor.create_model(LegacyTeam)
+            # ジョブのテーブルもまだない
+            editor.delete_model(Job)
+
+        User.objects.bulk_create(
+            [
+                User(username=f"user00{i}", email=f"user00{i}@sample.com")
+                for i in range(1, 4)
+            ]
+        )
+        self.team = LegacyTeam.objects.create(name="チーム", description="説明")
+        TeamMember.objects.bulk_create(
+            [TeamMember(team_id=self.team.id, member_id=f"user00{i}") for i in range(1, 4)]
+        )
+        Channel.objects.bulk_create(
+            [Channel(name="チャネル", team_id=self.team.id, description="説明")]
+        )
+
+    def tearDown(self):
+        # チームを参照する行を削除してから、チームのテーブルを作り直す
+        with connection.cursor() as cursor:
+            for model in (TeamMember, Channel):
+                cursor.execute(f"DELETE FROM {model._meta.db_table}")
+        with connection.schema_editor() as editor:
+            editor.delete_model(Team)
+            editor.create_model(Team)
+        add_missing_columns(Job)
+
+    def test_upgrade_schema(self):
+        """
+        ないカラム・テーブルを作成し、既存のチームの件数を集計し直す
+        """
+        out = StringIO()
+        call_command("upgrade_schema", stdout=out)
+        output = out.getvalue()
+        self.assertIn(f"{Team._meta.db_table}: admin_count created", output)
+        self.assertIn(f"{Team._meta.db_table}: deleted_at created", output)
+        self.assertIn(f"{Job._meta.db_table}: {Job._meta.db_table} created", output)
+        self.assertIn("1 teams repaired", output)
+
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertEqual(
+            (team.admin_count, team.member_count, team.channel_count), (0, 3, 1)
+        )
+        self.assertIsNone(team.deleted_at)
+        self.assertEqual(Job.objects.count(), 0)
+
+        # 作成済みのときは何もしない
+        self.assertEqual(add_missing_columns(Team), [])
+        out = StringIO()
+        call_command("upgrade_schema", stdout=out)
+        self.assertNotIn(" created", out.getvalue())
+        self.assertIn("0 teams repaired", out.getvalue())
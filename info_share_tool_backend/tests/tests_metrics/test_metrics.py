@@ -0,0 +1,136 @@
+import re
+
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...cache import get_team_cache
+from ...metrics import Histogram
+from ...models import User, Team, TeamAdministrator, TeamMember
+
+
+def server_timing(response):
+    """Server-Timing ヘッダを {名前: (ミリ秒, 説明)} にする"""
+    result = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        params = dict(param.split("=", 1) for param in params)
+        result[name] = (float(params["dur"]), params.get("desc"))
+    return result
+
+
+def metric_value(text, name, labels):
+    pattern = re.escape(f"{name}{{{labels}}}") + r" (\S+)"
+    match = re.search(pattern, text)
+    return float(match.group(1)) if match else 0
+
+
+def create_team():
+    User.objects.bulk_create(
+        [User(username=f"user00{i}", email=f"user00{i}@sample.com") for i in range(1, 4)]
+    )
+    team = Team.objects.create(name="チーム", description="説明", admin_count=1)
+    TeamAdministrator.objects.create(team=team, admin_id="user001")
+    TeamMember.objects.create(team=team, member_id="user002")
+    return team
+
+
+class TimingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.team = create_team()
+        self.client = APIClient()
+        get_team_cache().clear()
+
+    def test_server_timing(self):
+        """
+        SQLのクエリ数・時間、描画時間、全体の時間を Server-Timing ヘッダで返す
+        """
+        response = self.client.get(f"/team/{self.team.pk}", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = server_timing(response)
+        # チーム(権限判定を含む)と、管理者・メンバの先読み
+        self.assertEqual(timing["db"][1], '"3 queries"')
+        self.assertIn("render", timing)
+        self.assertGreaterEqual(timing["total"][0], timing["db"][0])
+
+    def test_server_timing_validate(self):
+        """
+        シリアライザで検証したときは検証時間も返す
+        """
+        request_data = {
+            "name": "チーム",
+            "description": "説明",
+            "operator_user": "user001",
+            "administrators": [],
+            "members": ["user002"],
+        }
+        response = self.client.post("/team/", request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("validate", server_timing(response))
+
+    def test_metrics(self):
+        """
+        URLのパターンごとに集計した計測値をPrometheusのテキスト形式で返す
+        """
+        labels = 'route="team/<int:team_id>",method="GET"'
+        before = metric_value(
+            self.client.get("/metrics").content.decode(),
+            "http_request_duration_seconds_count",
+            labels,
+        )
+        for _ in range(2):
+            self.client.get(f"/team/{self.team.pk}", {"operator_user": "user001"})
+        self.client.get("/not-found")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+        self.assertEqual(
+            metric_value(text, "http_request_duration_seconds_count", labels),
+            before + 2,
+        )
+        self.assertIn(
+            f'http_request_db_queries_bucket{{{labels},le="+Inf"}}', text
+        )
+        self.assertIn('route="<unmatched>",method="GET",status="404"', text)
+
+
+class AsyncTimingMiddlewareTestCase(TransactionTestCase):
+    # 同期処理は別スレッドの接続で実行するため、トランザクションで囲まない
+    def setUp(self):
+        self.team = create_team()
+        self.client = AsyncClient()
+
+    async def test_server_timing_async(self):
+        """
+        非同期のビューがスレッドで実行したクエリも計測する
+        """
+        response = await self.client.get(
+            f"/async/team/{self.team.pk}", {"operator_user": "user001"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = server_timing(response)
+        self.assertNotEqual(timing["db"][1], '"0 queries"')
+        self.assertIn("render", timing)
+
+
+class HistogramTestCase(TestCase):
+    def test_histogram(self):
+        """
+        バケットごとの件数を累積して出力する
+        """
+        histogram = Histogram("test_seconds", "Test.", ("route",), (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(("a",), value)
+        self.assertEqual(
+            list(histogram.collect()),
+            [
+                "# HELP test_seconds Test.",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{route="a",le="0.1"} 2',
+                'test_seconds_bucket{route="a",le="1"} 3',
+                'test_seconds_bucket{route="a",le="+Inf"} 4',
+                'test_seconds_sum{route="a"} 2.65',
+                'test_seconds_count{route="a"} 4',
+            ],
+        )
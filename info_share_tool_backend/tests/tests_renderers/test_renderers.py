@@ -0,0 +1,103 @@
+import datetime
+import io
+import unittest
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from ... import renderers
+from ...models import User, Team, TeamAdministrator
+
+
+class RendererTestCase(TestCase):
+    @staticmethod
+    def setUpTestData():
+        User.objects.create(username="user001", email="user001@sample.com")
+        team = Team.objects.create(
+            name="チーム\u2028", description="説明", admin_count=1
+        )
+        TeamAdministrator.objects.create(team=team, admin_id="user001")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_render_json(self):
+        """
+        DRFのJSONRendererと同じJSONを出力する
+        """
+        data = {
+            "name": "チーム\u2028\u2029",
+            "lazy": gettext_lazy("name"),
+            "decimal": Decimal("1.5"),
+            "time": datetime.time(12, 30),
+            "results": {1: [1, 2.5, None, True]},
+        }
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+        # インデントを指定したときも同じ
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+    def test_parse_json(self):
+        """
+        JSONを解析する 不正なJSONは400
+        """
+        parser = renderers.FastJSONParser()
+        data = parser.parse(io.BytesIO('{"a": [1, "あ"]}'.encode()))
+        self.assertEqual(data, {"a": [1, "あ"]})
+
+        response = self.client.post(
+            "/team/", b'{"name": ', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data["detail"])
+
+        response = self.client.post(
+            "/async/team/", b'{"name": ', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_team_list_json(self):
+        """
+        チーム一覧をJSONで返す
+        """
+        response = self.client.get("/team/list", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn(b"\\u2028", response.content)
+        self.assertEqual(response.json()["results"][0]["name"], "チーム\u2028")
+
+    @unittest.skipIf(renderers.msgpack is None, "msgpack is not installed")
+    def test_team_list_msgpack(self):
+        """
+        Accept で MessagePack を指定したときは MessagePack で返す
+        """
+        response = self.client.get(
+            "/team/list",
+            {"operator_user": "user001"},
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        data = renderers.msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data["results"][0]["name"], "チーム\u2028")
+
+        body = renderers.MessagePackRenderer().render(
+            {
+                "name": "チーム",
+                "description": "説明",
+                "operator_user": "user001",
+                "administrators": ["user001"],
+                "members": [],
+            }
+        )
+        response = self.client.post(
+            "/team/", body, content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
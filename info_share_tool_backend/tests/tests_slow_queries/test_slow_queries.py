@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...models import User, Team, TeamAdministrator
+
+
+class SlowQueryTestCase(TestCase):
+    @staticmethod
+    def setUpTestData():
+        User.objects.create(username="user001", email="user001@sample.com")
+        team = Team.objects.create(name="チーム", description="説明", admin_count=1)
+        TeamAdministrator.objects.create(team=team, admin_id="user001")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_record_slow_query(self):
+        """
+        閾値を超えたクエリを、パラメタ・呼び出し元・実行計画と一緒に記録する
+        """
+        with self.assertLogs("info_share_tool_backend.slow_queries") as logs:
+            response = self.client.get("/team/list", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        entry = next(e for e in entries if "info_share_tool_backend_team" in e["sql"])
+        self.assertIn("user001", entry["params"])
+        self.assertTrue(entry["view"].startswith("views/teams.py:"))
+        self.assertTrue(entry["plan"])
+        # 実行計画を取得するクエリは記録しない
+        self.assertFalse(any(e["sql"].startswith("EXPLAIN") for e in entries))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_explain_not_timed(self):
+        """
+        実行計画を取得するクエリは、リクエストのクエリ数に含めない
+        """
+        with self.assertLogs("info_share_tool_backend.slow_queries") as logs:
+            response = self.client.get("/team/list", {"operator_user": "user001"})
+        db_timing = response["Server-Timing"].split(", ")[0]
+        self.assertIn(f'desc="{len(logs.records)} queries"', db_timing)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_record_slow_query_disabled(self):
+        """
+        閾値が None のときは記録しない
+        """
+        with self.assertNoLogs("info_share_tool_backend.slow_queries"):
+            self.client.get("/team/list", {"operator_user": "user001"})
+
+    def test_slow_query_report(self):
+        """
+        同じSQLの記録をまとめ、合計時間の長い順に出力する
+        """
+        entries = [
+            {"sql": "SELECT a", "duration_ms": 300, "origin": "views/teams.py:1 in get"},
+            {"sql": "SELECT b", "duration_ms": 200, "origin": "views/teams.py:2 in get"},
+            {"sql": "SELECT b", "duration_ms": 150, "origin": "cache.py:3 in get"},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "slow_queries.log")
+            # ローテーションしたファイルも読む
+            for log_path, lines in ((path, entries[:2]), (path + ".1", entries[2:])):
+                with open(log_path, "w", encoding="utf-8") as f:
+                    for entry in lines:
+                        entry = {**entry, "view": None, "params": [], "plan": ["SCAN t"]}
+                        f.write(json.dumps(entry) + "\n")
+
+            out = StringIO()
+            call_command("slow_query_report", "--log", path, "--json", stdout=out)
+
+        summaries = json.loads(out.getvalue())
+        self.assertEqual(
+            [(s["sql"], s["count"], s["total_ms"], s["max_ms"]) for s in summaries],
+            [("SELECT b", 2, 350, 200), ("SELECT a", 1, 300, 300)],
+        )
+        self.assertEqual(
+            summaries[0]["origins"], ["cache.py:3 in get", "views/teams.py:2 in get"]
+        )
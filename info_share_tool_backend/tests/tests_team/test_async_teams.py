@@ -0,0 +1,159 @@
+from django.test import AsyncClient, TransactionTestCase
+from rest_framework import status
+from ...models import User, Team, TeamAdministrator, TeamMember
+
+
+class AsyncTeamTestCase(TransactionTestCase):
+    # 同期処理は別スレッドの接続で実行するため、トランザクションで囲まない
+    def setUp(self):
+        users = []
+        for i in range(0, 10):
+            users.append(
+                User(
+                    username=f"user{str(i).zfill(3)}",
+                    password="password",
+                    first_name="田中",
+                    last_name=f"{i}太郎",
+                    email=f"user{str(i).zfill(3)}@sample.com",
+                )
+            )
+        User.objects.bulk_create(users)
+        self.client = AsyncClient()
+
+    async def test_create_get_team(self):
+        """
+        チームを作成・取得する
+        """
+
+        request_data = {
+            "name": "チーム",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user002"],
+            "members": ["user003", "user004"],
+        }
+        response = await self.client.post(
+            "/async/team/", request_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        team_id = response.json()["id"]
+        self.assertEqual(
+            set(response.json()["administrators"]), {"user001", "user002"}
+        )
+
+        url = f"/async/team/{team_id}"
+        response = await self.client.get(url, {"operator_user": "user003"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "チーム")
+        self.assertEqual(set(response.json()["members"]), {"user003", "user004"})
+
+        response = await self.client.get(
+            url,
+            {"operator_user": "user003"},
+            headers={"If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = await self.client.get(
+            url, {"operator_user": "user003", "fields": "name"}
+        )
+        self.assertEqual(response.json(), {"id": team_id, "name": "チーム"})
+
+        response = await self.client.get(
+            "/async/team/", {"operator_user": "user003", "ids": f"{team_id},999"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][str(team_id)]["name"], "チーム")
+        self.assertEqual(response.json()["errors"]["999"]["status"], 404)
+
+    async def test_create_team_no_user(self):
+        """
+        存在しないメンバーでチームを作成する
+        """
+
+        request_data = {
+            "name": "チーム",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user002"],
+            "members": ["user0i3"],
+        }
+        response = await self.client.post(
+            "/async/team/", request_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("members", response.json())
+
+    async def test_update_delete_team(self):
+        """
+        チームを更新・削除する
+        """
+        team = await Team.objects.acreate(name="チームA", description="説明")
+        await TeamAdministrator.objects.acreate(team=team, admin_id="user001")
+        await TeamMember.objects.acreate(team=team, member_id="user002")
+
+        url = f"/async/team/{team.id}"
+        request_data = {
+            "name": "チームB",
+            "description": "更新されたチーム",
+            "operator_user": "user002",
+            "administrators": ["user002"],
+            "members": ["user003"],
+        }
+        response = await self.client.put(
+            url, request_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            response.json()["detail"], "operator: user002 has no permission"
+        )
+
+        request_data["operator_user"] = "user001"
+        response = await self.client.put(
+            url, request_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "チームB")
+        self.assertEqual(response.json()["members"], ["user003"])
+
+        response = await self.client.delete(
+            url, {"operator_user": "user003"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.client.delete(
+            url, {"operator_user": "user001"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await Team.objects.filter(id=team.id).aexists())
+
+        response = await self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            response.json()["detail"], f"team: id {team.id} does not found"
+        )
+
+    async def test_get_team_list(self):
+        """
+        チーム一覧を取得する
+        """
+        for i in range(0, 3):
+            team = await Team.objects.acreate(name=f"チーム{i}", description="説明")
+            await TeamMember.objects.acreate(team=team, member_id="user001")
+
+        response = await self.client.get(
+            "/async/team/list",
+            {"operator_user": "user001", "sort": "name", "order": "DESC", "page_size": 2},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [team["name"] for team in response.json()["results"]]
+        self.assertEqual(names, ["チーム2", "チーム1"])
+
+        response = await self.client.get(response.json()["next"])
+        names = [team["name"] for team in response.json()["results"]]
+        self.assertEqual(names, ["チーム0"])
+
+        response = await self.client.get(
+            "/async/team/list", {"operator_user": "user001", "sort": "unknown"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,119 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...cache import get_team_cache, team_cache_key
+from ...models import User, Team, TeamAdministrator, TeamMember
+from ..utils import QueryBudgetMixin
+
+
+class TeamCacheTestCase(QueryBudgetMixin, TestCase):
+    @staticmethod
+    def setUpTestData():
+        users = []
+        for i in range(0, 10):
+            users.append(
+                User(
+                    username=f"user{str(i).zfill(3)}",
+                    password="password",
+                    first_name="田中",
+                    last_name=f"{i}太郎",
+                    email=f"user{str(i).zfill(3)}@sample.com",
+                )
+            )
+        User.objects.bulk_create(users)
+
+        for i in range(0, 3):
+            team = Team.objects.create(name=f"チーム{i}", description="説明")
+            TeamAdministrator.objects.create(team=team, admin_id="user000")
+            TeamMember.objects.bulk_create(
+                [
+                    TeamMember(team=team, member_id=f"user{str(j).zfill(3)}")
+                    for j in range(1, 4)
+                ]
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        get_team_cache().clear()
+
+    def test_team_detail_cache(self):
+        """
+        チームを取得する 2回目はキャッシュを使い、先読みしない
+        """
+        team = Team.objects.first()
+        url = f"/team/{team.id}"
+        response = self.client.get(url, {"operator_user": "user000"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertQueryBudget(1):
+            cached = self.client.get(url, {"operator_user": "user000"})
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, response.data)
+
+    def test_team_list_cache(self):
+        """
+        チーム一覧を取得する キャッシュにないチームのみ先読みする
+        """
+        team = Team.objects.first()
+        self.client.get(f"/team/{team.id}", {"operator_user": "user000"})
+
+        url = "/team/list"
+        response = self.client.get(url, {"operator_user": "user000"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+
+        with self.assertQueryBudget(1):
+            cached = self.client.get(url, {"operator_user": "user000"})
+        self.assertEqual(cached.data["results"], response.data["results"])
+
+    def test_team_cache_invalidated_by_membership(self):
+        """
+        メンバを追加するとキャッシュが無効になる
+        """
+        team = Team.objects.first()
+        url = f"/team/{team.id}"
+        self.client.get(url, {"operator_user": "user000"})
+        self.assertIsNotNone(get_team_cache().get(team_cache_key(team.id)))
+
+        TeamMember.objects.create(team=team, member_id="user005")
+        self.assertIsNone(get_team_cache().get(team_cache_key(team.id)))
+
+        response = self.client.get(url, {"operator_user": "user000"})
+        self.assertIn("user005", response.data["members"])
+
+    def test_team_cache_versioned(self):
+        """
+        チームを更新すると古いバージョンのキャッシュは使われない
+        """
+        team = Team.objects.first()
+        url = f"/team/{team.id}"
+        self.client.get(url, {"operator_user": "user000"})
+
+        request_data = {
+            "name": "チームB",
+            "description": "更新されたチーム",
+            "operator_user": "user000",
+            "administrators": ["user000"],
+            "members": ["user001"],
+        }
+        response = self.client.put(url, request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, {"operator_user": "user000"})
+        self.assertEqual(response.data["name"], "チームB")
+        self.assertEqual(response.data["members"], ["user001"])
+
+    def test_delete_user_bumps_team_version(self):
+        """
+        ユーザを削除すると所属するチームのバージョンが上がる
+        """
+        team = Team.objects.first()
+        url = f"/team/{team.id}"
+        self.client.get(url, {"operator_user": "user000"})
+
+        User.objects.get(username="user002").delete()
+
+        team.refresh_from_db()
+        self.assertEqual(team.version, 2)
+        response = self.client.get(url, {"operator_user": "user000"})
+        self.assertNotIn("user002", response.data["members"])
@@ -3,6 +3,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 from ...models import User, Team, TeamAdministrator, TeamMember
+from ... import search
 
 
 class TeamTestCase(TestCase):
@@ -101,7 +102,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -117,7 +118,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -133,7 +134,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -149,7 +150,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -165,7 +166,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -181,7 +182,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -197,7 +198,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -214,7 +215,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -232,7 +233,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -246,7 +247,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -260,7 +261,7 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
 
@@ -274,6 +275,161 @@ class TeamTestCase(TestCase):
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        team_list = [team["id"] for team in response.data]
+        team_list = [team["id"] for team in response.data["results"]]
 
         self.assertEqual(team_list, ans_list)
+
+    def test_get_team_list_pagination(self):
+        """
+        チーム一覧を取得する ページ分割
+        """
+        _request_data = {"operator_user": "user005", "page_size": 2}
+        url = f"/team/list"
+        response = self.client.get(url, _request_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["previous"])
+
+        pages = [[team["id"] for team in response.data["results"]]]
+        while response.data["next"] is not None:
+            response = self.client.get(response.data["next"])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([team["id"] for team in response.data["results"]])
+
+        self.assertEqual(pages, [[1, 2], [3, 4], [5]])
+
+        # 最終ページから前のページに戻る
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        team_list = [team["id"] for team in response.data["results"]]
+
+        self.assertEqual(team_list, [3, 4])
+
+    def test_get_team_list_pagination_name_desc(self):
+        """
+        チーム一覧を取得する チーム名でソートしてページ分割
+        """
+        _request_data = {
+            "operator_user": "user006",
+            "order": "DESC",
+            "sort": "name",
+            "page_size": 3,
+        }
+        url = f"/team/list"
+        response = self.client.get(url, _request_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        team_list = [team["id"] for team in response.data["results"]]
+        self.assertEqual(team_list, [5, 4, 3])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        team_list = [team["id"] for team in response.data["results"]]
+        self.assertEqual(team_list, [2, 1])
+        self.assertIsNone(response.data["next"])
+
+    def test_get_team_list_invalid_cursor(self):
+        """
+        チーム一覧を取得する 不正なカーソル
+        """
+        _request_data = {"operator_user": "user005", "cursor": "invalid"}
+        url = f"/team/list"
+        response = self.client.get(url, _request_data)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_team_list_search_index(self):
+        """
+        チーム一覧を取得する 全文検索インデックスで検索
+        """
+        self.assertTrue(search.uses_index("子丑寅"))
+
+        ans_list = [1, 2, 3]
+        _request_data = {"operator_user": "user006", "search_keyword": "子丑寅"}
+        url = f"/team/list"
+        response = self.client.get(url, _request_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        team_list = [team["id"] for team in response.data["results"]]
+
+        self.assertEqual(team_list, ans_list)
+
+    def test_get_team_list_search_index_updated(self):
+        """
+        チーム一覧を取得する 更新・削除したチームを全文検索する
+        """
+        request_data = {
+            "name": "チーム1",
+            "description": "甲乙丙丁",
+            "operator_user": "user001",
+            "administrators": ["user001", "user002"],
+            "members": ["user006"],
+        }
+        response = self.client.put("/team/1", request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = f"/team/list"
+        response = self.client.get(
+            url, {"operator_user": "user006", "search_keyword": "甲乙丙"}
+        )
+        team_list = [team["id"] for team in response.data["results"]]
+        self.assertEqual(team_list, [1])
+
+        response = self.client.get(
+            url, {"operator_user": "user006", "search_keyword": "午未申"}
+        )
+        team_list = [team["id"] for team in response.data["results"]]
+        self.assertEqual(team_list, [])
+
+        response = self.client.delete("/team/1", {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            url, {"operator_user": "user002", "search_keyword": "甲乙丙"}
+        )
+        team_list = [team["id"] for team in response.data["results"]]
+        self.assertEqual(team_list, [])
+
+    def test_get_team_list_search_relevance(self):
+        """
+        チーム一覧を取得する 関連度でソート
+        """
+        _request_data = {
+            "operator_user": "user006",
+            "search_keyword": "子丑寅",
+            "sort": "relevance",
+            "page_size": 1,
+        }
+        url = f"/team/list"
+        response = self.client.get(url, _request_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        team_list = [team["id"] for team in response.data["results"]]
+        while response.data["next"] is not None:
+            response = self.client.get(response.data["next"])
+            team_list += [team["id"] for team in response.data["results"]]
+
+        # 説明が短いチームほど関連度が高い
+        self.assertEqual(sorted(team_list), [1, 2, 3])
+        self.assertEqual(team_list[-1], 1)
+
+    def test_get_team_list_sort_member_count(self):
+        """
+        チーム一覧を取得する メンバ数でソート
+        """
+        ans_list = [4, 5, 2, 3, 1]
+        _request_data = {
+            "operator_user": "user006",
+            "sort": "member_count",
+            "order": "ASC",
+        }
+        url = f"/team/list"
+        response = self.client.get(url, _request_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        team_list = [team["id"] for team in response.data["results"]]
+        self.assertEqual(team_list, ans_list)
+        self.assertEqual(
+            [team["member_count"] for team in response.data["results"]],
+            [2, 2, 3, 3, 4],
+        )
@@ -0,0 +1,203 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from ...cache import get_team_cache
+from ...models import User, Team, TeamAdministrator, TeamMember, Channel, ChannelMember
+from ..utils import QueryBudgetMixin, query_plan
+
+
+class TeamQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    @staticmethod
+    def setUpTestData():
+        users = []
+        for i in range(0, 30):
+            users.append(
+                User(
+                    username=f"user{str(i).zfill(3)}",
+                    password="password",
+                    first_name="田中",
+                    last_name=f"{i}太郎",
+                    email=f"user{str(i).zfill(3)}@sample.com",
+                )
+            )
+        User.objects.bulk_create(users)
+
+        # チームごとに管理者1人、メンバ10人を登録する
+        for i in range(0, 20):
+            team = Team.objects.create(name=f"チーム{i}", description="説明")
+            TeamAdministrator.objects.create(team=team, admin_id="user000")
+            TeamMember.objects.bulk_create(
+                [
+                    TeamMember(team=team, member_id=f"user{str(j).zfill(3)}")
+                    for j in range(i % 10 + 1, i % 10 + 11)
+                ]
+            )
+            channel = Channel.objects.create(
+                name=f"チャネル{i}", team=team, description="説明", creator_id="user000"
+            )
+            ChannelMember.objects.bulk_create(
+                [
+                    ChannelMember(channel=channel, member_id=f"user{str(j).zfill(3)}")
+                    for j in range(0, 10)
+                ]
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_team_list_query_budget(self):
+        """
+        チーム一覧を取得する チーム数に関わらずクエリ数が一定
+        """
+        url = "/team/list"
+        for page_size in [1, 5, 20]:
+            with self.assertQueryBudget(3):
+                response = self.client.get(
+                    url, {"operator_user": "user000", "page_size": page_size}
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_team_list_query_plan(self):
+        """
+        チーム一覧は所属のテーブルのインデックスから操作者のチームを引く
+        チームのテーブルを全件走査しない
+        """
+        url = "/team/list"
+        for params in [
+            {},
+            {"sort": "name", "order": "DESC"},
+            {"sort": "member_count", "order": "ASC"},
+        ]:
+            params = {"operator_user": "user001", "page_size": 1, **params}
+            response = self.client.get(url, params)
+            # 2ページ目(キーセットの範囲の条件を含む)のクエリの実行計画を確認する
+            with self.assertQueryBudget(3) as context:
+                response = self.client.get(response.data["next"])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            sql = next(
+                query["sql"]
+                for query in context.captured_queries
+                if '"operator_is_admin"' in query["sql"]
+            )
+            plan = query_plan(sql)
+            self.assertNotIn("SCAN info_share_tool_backend_team", plan, params)
+            self.assertTrue(
+                any("team_member_member_team_idx" in line for line in plan), plan
+            )
+
+    def test_team_detail_query_budget(self):
+        """
+        チームを取得する
+        """
+        team = Team.objects.first()
+        url = f"/team/{team.id}"
+        with self.assertQueryBudget(3):
+            response = self.client.get(url, {"operator_user": "user000"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["members"]), 10)
+
+    def test_channel_detail_query_budget(self):
+        """
+        チャネルを取得する
+        """
+        channel = Channel.objects.first()
+        url = f"/channel/{channel.id}"
+        with self.assertQueryBudget(2):
+            response = self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["members"]), 10)
+
+    def test_team_detail_not_modified_query_budget(self):
+        """
+        変更のないチームを取得する 1回のクエリで304を返す
+        """
+        team = Team.objects.first()
+        url = f"/team/{team.id}"
+        response = self.client.get(url, {"operator_user": "user000"})
+        etag = response["ETag"]
+        with self.assertQueryBudget(1):
+            response = self.client.get(
+                url, {"operator_user": "user000"}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_channel_detail_not_modified_query_budget(self):
+        """
+        変更のないチャネルを取得する 1回のクエリで304を返す
+        """
+        channel = Channel.objects.first()
+        url = f"/channel/{channel.id}"
+        response = self.client.get(url, {"operator_user": "user001"})
+        etag = response["ETag"]
+        with self.assertQueryBudget(1):
+            response = self.client.get(
+                url, {"operator_user": "user001"}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_team_multi_get_query_budget(self):
+        """
+        複数のチームを取得する チーム数に関わらずクエリ数が一定
+        """
+        ids = list(Team.objects.order_by("id").values_list("id", flat=True))
+        for count in [1, 5, 20]:
+            get_team_cache().clear()
+            with self.assertQueryBudget(3):
+                response = self.client.get(
+                    "/team/",
+                    {"operator_user": "user000", "ids": ",".join(map(str, ids[:count]))},
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), count)
+
+    def test_channel_multi_get_query_budget(self):
+        """
+        複数のチャネルを取得する チャネル数に関わらずクエリ数が一定
+        """
+        ids = list(Channel.objects.order_by("id").values_list("id", flat=True))
+        for count in [1, 5, 20]:
+            with self.assertQueryBudget(2):
+                response = self.client.get(
+                    "/channel/",
+                    {"operator_user": "user001", "ids": ",".join(map(str, ids[:count]))},
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), count)
+
+    def test_team_list_fields_query_budget(self):
+        """
+        項目を選択してチーム一覧を取得する 選択しなかった管理者・メンバ・カラムは取得しない
+        """
+        get_team_cache().clear()
+        with self.assertQueryBudget(1) as context:
+            response = self.client.get(
+                "/team/list",
+                {"operator_user": "user000", "fields": "name,member_count"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "name", "member_count"}
+        )
+        self.assertNotIn('"description"', context.captured_queries[0]["sql"])
+
+        with self.assertQueryBudget(2):
+            response = self.client.get(
+                "/team/list",
+                {"operator_user": "user000", "fields": "name", "expand": "members"},
+            )
+        self.assertEqual(set(response.data["results"][0]), {"id", "name", "members"})
+        self.assertEqual(len(response.data["results"][0]["members"]), 10)
+
+    def test_channel_list_fields_query_budget(self):
+        """
+        項目を選択してチャネル一覧を取得する 選択しなかったメンバは取得しない
+        """
+        with self.assertQueryBudget(1):
+            response = self.client.get(
+                "/channel/list", {"operator_user": "user001", "fields": "name,team"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertEqual(set(response.data["results"][0]), {"id", "name", "team"})
@@ -1,8 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
-from ...models import User, Team, TeamAdministrator, TeamMember
+from ...models import User, Team, TeamAdministrator, TeamMember, ChannelMember
 
 
 class TeamTestCase(TestCase):
@@ -237,8 +242,15 @@ class TeamTestCase(TestCase):
         url = f"/team/{team_id}"
         response = self.client.delete(url, request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Job-Id"], str(response.data["job"]))
 
+        # 削除済みのチームは取得できない
         self.assertRaises(Team.DoesNotExist, Team.objects.get, id=team_id)
+        self.assertTrue(Team.all_objects.filter(id=team_id).exists())
+
+        # 所属はジョブで削除する
+        call_command("run_jobs", "--burst", stdout=StringIO())
+        self.assertFalse(Team.all_objects.filter(id=team_id).exists())
         self.assertRaises(
             TeamAdministrator.DoesNotExist, TeamAdministrator.objects.get, id=team_id
         )
@@ -301,6 +313,9 @@ class TeamTestCase(TestCase):
         url = f"/team/{team_id}"
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 内部の管理用のカラムは返さない
+        self.assertNotIn("deleted_at", response.data)
+        self.assertNotIn("version", response.data)
 
         # テスト対象パラメタ
         test_target_params = [
@@ -315,6 +330,91 @@ class TeamTestCase(TestCase):
             else:
                 self.assertEqual(response.data[param], request_data[param])
 
+    def test_get_teams(self):
+        """
+        複数のチームを取得する 存在しない・権限のないチームはidごとのエラーを返す
+        """
+        team_ids = []
+        for operator_user in ["user001", "user002"]:
+            request_data = {
+                "name": "チーム",
+                "description": "説明",
+                "operator_user": operator_user,
+                "administrators": [operator_user],
+                "members": ["user003"],
+            }
+            response = self.client.post("/team/", request_data, format="json")
+            team_ids.append(response.data["id"])
+
+        ids = f"{team_ids[0]},{team_ids[1]},{team_ids[0]},999"
+        response = self.client.get("/team/", {"operator_user": "user001", "ids": ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data["results"]), [team_ids[0]])
+        self.assertEqual(response.data["results"][team_ids[0]]["id"], team_ids[0])
+        self.assertEqual(
+            response.data["errors"][team_ids[1]]["status"], status.HTTP_403_FORBIDDEN
+        )
+        self.assertEqual(response.data["errors"][999]["status"], status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get("/team/", {"operator_user": "user003", "ids": ids})
+        self.assertEqual(list(response.data["results"]), team_ids)
+
+        for params in [
+            {"ids": ids},
+            {"operator_user": "user001"},
+            {"operator_user": "user001", "ids": "1,a"},
+        ]:
+            response = self.client.get("/team/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_team_fields(self):
+        """
+        項目を選択してチームを取得する 選択ごとに異なるETagを返す
+        """
+        request_data = {
+            "name": "チーム",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001"],
+            "members": ["user003"],
+        }
+        response = self.client.post("/team/", request_data, format="json")
+        url = f"/team/{response.data['id']}"
+
+        response = self.client.get(url, {"operator_user": "user001"})
+        full_etag = response["ETag"]
+        self.assertIn("members", response.data)
+
+        response = self.client.get(
+            url, {"operator_user": "user001", "fields": "name,description"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"id", "name", "description"})
+        self.assertEqual(response.data["name"], "チーム")
+        self.assertNotEqual(response["ETag"], full_etag)
+
+        # 選択した表現のETagでのみ304を返す
+        params = {"operator_user": "user001", "fields": "name,description"}
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=full_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            url, {"operator_user": "user001", "fields": "name", "expand": "members"}
+        )
+        self.assertEqual(response.data["members"], ["user003"])
+        self.assertNotIn("administrators", response.data)
+
+        # 関連は expand でのみ指定できる
+        for params in [
+            {"fields": "name,secret"},
+            {"expand": "name"},
+            {"fields": "name,members"},
+        ]:
+            response = self.client.get(url, {"operator_user": "user001", **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_team_not_found(self):
         """
         チームを取得する 存在しないチーム
@@ -361,3 +461,272 @@ class TeamTestCase(TestCase):
         url = f"/team/{team_id}"
         response = self.client.get(url, _request_data)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_update_team_channel_members(self):
+        """
+        チームを更新する 差分のみチャネルメンバに反映される
+        """
+
+        request_data = {
+            "name": "チームA",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001", "user002"],
+            "members": [
+                "user003",
+                "user004",
+                "user005",
+            ],
+        }
+        url = "/team/"
+        response = self.client.post(url, request_data, format="json")
+        team_id = response.data.get("id")
+
+        request_data = {
+            "name": "チャネル",
+            "team": team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": ["user001", "user003", "user004"],
+        }
+        response = self.client.post("/channel/", request_data, format="json")
+        channel_id = response.data.get("id")
+        kept_ids = set(
+            ChannelMember.objects.filter(
+                channel_id=channel_id, member_id__in=["user001", "user003"]
+            ).values_list("id", flat=True)
+        )
+
+        request_data = {
+            "name": "チームA",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001", "user002"],
+            "members": [
+                "user002",
+                "user003",
+                "user006",
+            ],
+        }
+        url = f"/team/{team_id}"
+        response = self.client.put(url, request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Job-Id", response)
+
+        # チャネルメンバはジョブで反映する
+        call_command("run_jobs", "--burst", stdout=StringIO())
+
+        channel_members = list(
+            ChannelMember.objects.filter(channel_id=channel_id).values_list(
+                "member_id", flat=True
+            )
+        )
+        self.assertEqual(
+            sorted(channel_members), ["user001", "user002", "user003", "user006"]
+        )
+        # 残ったメンバの行は削除・再作成されない
+        self.assertTrue(
+            kept_ids
+            <= set(
+                ChannelMember.objects.filter(channel_id=channel_id).values_list(
+                    "id", flat=True
+                )
+            )
+        )
+
+    def test_create_team_no_users_error(self):
+        """
+        チームを作成する
+        存在しないメンバーはまとめて1つのエラーになる
+        """
+
+        request_data = {
+            "name": "チーム",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001"],
+            "members": [
+                "user0i3",
+                "user003",
+                "user0i4",
+            ],
+        }
+        url = "/team/"
+        response = self.client.post(url, request_data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data["members"]), 1)
+        self.assertIn('"user0i3"', response.data["members"][0])
+        self.assertIn('"user0i4"', response.data["members"][0])
+
+    def test_create_team_member_lookup(self):
+        """
+        チームを作成する
+        メンバーの数に関わらずユーザの取得は1回のクエリで行う
+        """
+
+        users = [
+            User(username=f"bulk{i:04}", email=f"bulk{i:04}@sample.com")
+            for i in range(0, 1500)
+        ]
+        User.objects.bulk_create(users)
+
+        request_data = {
+            "name": "チーム",
+            "description": "大きなチーム",
+            "operator_user": "user001",
+            "administrators": ["user001"],
+            "members": [user.username for user in users],
+        }
+        url = "/team/"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, request_data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["members"]), 1500)
+
+        lookup_queries = [
+            query
+            for query in queries.captured_queries
+            if '"username" IN (' in query["sql"]
+        ]
+        # administrators, members の2フィールド分
+        # (members はパラメタ数の上限で分割される)
+        self.assertLessEqual(len(lookup_queries), 3)
+
+    def test_get_team_etag(self):
+        """
+        チームを取得する
+        ETagが一致すれば304、更新後は新しいETagで200を返す
+        """
+
+        request_data = {
+            "name": "チームA",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001", "user002"],
+            "members": [
+                "user003",
+                "user004",
+            ],
+        }
+        response = self.client.post("/team/", request_data, format="json")
+        team_id = response.data.get("id")
+
+        request_data = {
+            "name": "チャネル",
+            "team": team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": ["user001", "user003"],
+        }
+        response = self.client.post("/channel/", request_data, format="json")
+        channel_id = response.data.get("id")
+
+        url = f"/team/{team_id}"
+        response = self.client.get(url, {"operator_user": "user001"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        channel_etag = self.client.get(
+            f"/channel/{channel_id}", {"operator_user": "user001"}
+        )["ETag"]
+
+        response = self.client.get(
+            url, {"operator_user": "user001"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        # 弱いETagでも一致する
+        response = self.client.get(
+            url, {"operator_user": "user001"}, HTTP_IF_NONE_MATCH=f'"x", W/{etag}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # 権限のない操作者には304を返さない
+        response = self.client.get(
+            url, {"operator_user": "user005"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # メンバーの変更でチームとチャネルのETagが変わる
+        request_data = {
+            "name": "チームA",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001", "user002"],
+            "members": [
+                "user004",
+            ],
+        }
+        response = self.client.put(url, request_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        call_command("run_jobs", "--burst", stdout=StringIO())
+
+        response = self.client.get(
+            url, {"operator_user": "user001"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["members"]), {"user004"})
+
+        response = self.client.get(
+            f"/channel/{channel_id}",
+            {"operator_user": "user001"},
+            HTTP_IF_NONE_MATCH=channel_etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_team_counters(self):
+        """
+        チームの管理者数・メンバ数・チャネル数を更新する
+        """
+
+        request_data = {
+            "name": "チームA",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user002"],
+            "members": ["user003", "user004", "user005"],
+        }
+        response = self.client.post("/team/", request_data, format="json")
+        self.assertEqual(response.data["admin_count"], 2)
+        self.assertEqual(response.data["member_count"], 3)
+        self.assertEqual(response.data["channel_count"], 0)
+        team_id = response.data.get("id")
+
+        request_data = {
+            "name": "チャネル",
+            "team": team_id,
+            "description": "最初のチャネル",
+            "operator_user": "user001",
+            "members": ["user001", "user003"],
+        }
+        response = self.client.post("/channel/", request_data, format="json")
+        channel_id = response.data.get("id")
+        self.client.post("/channel/", request_data, format="json")
+
+        request_data = {
+            "name": "チームA",
+            "description": "最初のチーム",
+            "operator_user": "user001",
+            "administrators": ["user001"],
+            "members": ["user003", "user006"],
+        }
+        response = self.client.put(f"/team/{team_id}", request_data, format="json")
+        self.assertEqual(response.data["admin_count"], 1)
+        self.assertEqual(response.data["member_count"], 2)
+        self.assertEqual(response.data["channel_count"], 2)
+
+        response = self.client.delete(
+            f"/channel/{channel_id}", {"operator_user": "user001"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # ユーザの削除で連鎖して削除された所属も反映される
+        User.objects.get(username="user006").delete()
+
+        team = Team.objects.get(id=team_id)
+        self.assertEqual(
+            (team.admin_count, team.member_count, team.channel_count), (1, 1, 1)
+        )
@@ -40,6 +40,8 @@ class UserTestCase(TestCase):
         ]
         for param in test_target_params:
             self.assertEqual(created_data[param], request_data[param])
+        # パスワードはハッシュ化して保存する
+        self.assertTrue(user001.check_password(request_data["password"]))
 
     def test_create_user_already_registered_username(self):
         """
@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from ...authentication import get_token_cache, token_cache_key
+from ...models import User, Team, TeamAdministrator
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    @staticmethod
+    def setUpTestData():
+        user = User.objects.create(username="user001", email="user001@sample.com")
+        team = Team.objects.create(name="チーム", description="説明", admin_count=1)
+        TeamAdministrator.objects.create(team=team, admin=user)
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.token = Token.objects.get(user_id="user001")
+        self.team_id = Team.objects.get().pk
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_team(self):
+        return self.client.get(f"/team/{self.team_id}", {"operator_user": "user001"})
+
+    def test_token_auth_cache(self):
+        """
+        2回目以降のリクエストはトークンを取得するクエリを発行しない
+        """
+        for expected in (1, 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_team()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            token_queries = [
+                query
+                for query in queries.captured_queries
+                if "authtoken_token" in query["sql"]
+            ]
+            self.assertEqual(len(token_queries), expected)
+
+        # キャッシュにはユーザの主キーのみ格納し、キーにトークンそのものは含まない
+        self.assertEqual(get_token_cache().get(token_cache_key(self.token.key)), "user001")
+        self.assertNotIn(self.token.key, token_cache_key(self.token.key))
+
+    def test_token_auth_invalid(self):
+        """
+        存在しないトークンは認証エラー
+        """
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        response = self.get_team()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_auth_deleted_token(self):
+        """
+        トークンを削除したら、キャッシュ済みでも認証エラー
+        """
+        self.assertEqual(self.get_team().status_code, status.HTTP_200_OK)
+        self.token.delete()
+        self.assertEqual(self.get_team().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_auth_inactive_user(self):
+        """
+        ユーザを無効にしたら、キャッシュ済みでも認証エラー
+        """
+        self.assertEqual(self.get_team().status_code, status.HTTP_200_OK)
+        user = User.objects.get(username="user001")
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.get_team().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_auth_inactive_user_queryset_update(self):
+        """
+        シグナルを発行しない QuerySet.update で無効にしても、キャッシュ済みで認証エラー
+        """
+        self.assertEqual(self.get_team().status_code, status.HTTP_200_OK)
+        User.objects.filter(username="user001").update(is_active=False)
+        self.assertIsNotNone(get_token_cache().get(token_cache_key(self.token.key)))
+        self.assertEqual(self.get_team().status_code, status.HTTP_401_UNAUTHORIZED)
+        # 無効なユーザのキャッシュは削除する
+        self.assertIsNone(get_token_cache().get(token_cache_key(self.token.key)))
@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """エンドポイントごとのクエリ数の上限を検証する TestCase 用のMixin"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=connection):
+        with CaptureQueriesContext(using) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = "\n".join(
+                f"{i}. {query['sql']}"
+                for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{executed} queries executed, budget is {budget}\n"
+                f"Captured queries were:\n{queries}"
+            )
+
+
+def query_plan(sql, params=(), using=connection):
+    """SQLの実行計画(EXPLAIN QUERY PLAN の各行の説明)を返す"""
+    with using.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
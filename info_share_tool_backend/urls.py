@@ -16,7 +16,17 @@ Including another URLconf
 """
 from django.urls import path, include
 
-from .views import users, teams, channels
+from .views import (
+    users,
+    teams,
+    channels,
+    changes,
+    events,
+    jobs,
+    metrics,
+    async_teams,
+    async_channels,
+)
 from rest_framework.authtoken import views
 
 urlpatterns = [
@@ -25,7 +35,22 @@ urlpatterns = [
     path("team/", teams.TeamCreateView.as_view()),
     path("team/<int:team_id>", teams.TeamDetailView.as_view()),
     path("team/list", teams.TeamListView.as_view()),
+    path("team/<int:team_id>/channels", channels.TeamChannelListView.as_view()),
     path("channel/", channels.ChannelCreateView.as_view()),
     path("channel/<int:channel_id>", channels.ChannelDetailView.as_view()),
+    path("channel/list", channels.ChannelListView.as_view()),
+    path("changes", changes.ChangeListView.as_view()),
+    path("job/<int:job_id>", jobs.JobDetailView.as_view()),
     path("api-token-auth/", views.obtain_auth_token),
+    path("metrics", metrics.MetricsView.as_view()),
+    # ASGIで動かすときの非同期のビュー
+    path("async/team/", async_teams.AsyncTeamCreateView.as_view()),
+    path("async/team/<int:team_id>", async_teams.AsyncTeamDetailView.as_view()),
+    path("async/team/list", async_teams.AsyncTeamListView.as_view()),
+    path("async/channel/", async_channels.AsyncChannelCreateView.as_view()),
+    path(
+        "async/channel/<int:channel_id>",
+        async_channels.AsyncChannelDetailView.as_view(),
+    ),
+    path("async/events", events.AsyncEventStreamView.as_view()),
 ]
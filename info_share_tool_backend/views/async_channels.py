@@ -0,0 +1,112 @@
+from django.db.models import prefetch_related_objects
+from rest_framework import status
+from rest_framework.exceptions import ValidationError, NotFound
+
+from ..db import retry_on_busy
+from ..executors import run_sync
+from ..etags import etag_matches, make_etag
+from ..fieldsets import get_fieldset, only_selected
+from ..models import Channel
+from ..permissions import (
+    ChannelPermission,
+    get_membership_resolver,
+    get_operator_username,
+    with_channel_roles,
+)
+from ..serializers import ChannelSerializer, delete_channel
+from .asynchronous import AsyncAPIView, json_response
+from .batch import parse_ids
+from .channels import CHANNEL_REQUIRED_FIELDS, get_channels
+
+
+def save_channel(request, channel=None):
+    """シリアライザで検証・保存し、シリアライズ結果を返す"""
+    serializer = ChannelSerializer(
+        channel, data=request.data, context={"request": request}
+    )
+    if not serializer.is_valid():
+        raise ValidationError(serializer.errors)
+    retry_on_busy(serializer.save)()
+    return serializer.data
+
+
+def serialize_channel(request, channel, fieldset=None):
+    prefetch_related_objects(
+        [channel], *ChannelSerializer.eager_loading_lookups(fieldset)
+    )
+    context = {"request": request, "fieldset": fieldset}
+    return ChannelSerializer(channel, context=context).data
+
+
+class AsyncChannelCreateView(AsyncAPIView):
+    async def get(self, request):
+        operator_user = get_operator_username(request)
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+        channel_ids = parse_ids(request)
+        fieldset = get_fieldset(request, ChannelSerializer)
+
+        data = await run_sync(
+            get_channels, request, channel_ids, operator_user, fieldset
+        )
+
+        return json_response(data, status.HTTP_200_OK)
+
+    async def post(self, request):
+        data = await run_sync(save_channel, request)
+
+        return json_response(data, status.HTTP_200_OK)
+
+
+class AsyncChannelDetailView(AsyncAPIView):
+    permission_classes = [ChannelPermission]
+
+    async def get(self, request, channel_id):
+        operator_user = get_operator_username(request)
+        fieldset = get_fieldset(request, ChannelSerializer)
+        queryset = only_selected(
+            Channel.objects.all(), fieldset, *CHANNEL_REQUIRED_FIELDS
+        )
+        channel = await self.get_channel(request, channel_id, operator_user, queryset)
+        await self.check_object_permissions(request, channel)
+
+        # 変更がなければシリアライズせずに304を返す
+        etag = make_etag(channel, fieldset)
+        if etag_matches(request, etag):
+            return json_response(None, status.HTTP_304_NOT_MODIFIED, {"ETag": etag})
+
+        data = await run_sync(serialize_channel, request, channel, fieldset)
+
+        return json_response(data, status.HTTP_200_OK, {"ETag": etag})
+
+    async def put(self, request, channel_id):
+        operator_user = get_operator_username(request)
+        channel = await self.get_channel(request, channel_id, operator_user)
+
+        data = await run_sync(save_channel, request, channel)
+
+        return json_response(data, status.HTTP_200_OK, {"ETag": make_etag(channel)})
+
+    async def delete(self, request, channel_id):
+        operator_user = get_operator_username(request)
+        channel = await self.get_channel(request, channel_id, operator_user)
+        await self.check_object_permissions(request, channel)
+
+        await run_sync(retry_on_busy(delete_channel), channel)
+
+        return json_response({}, status.HTTP_200_OK)
+
+    @staticmethod
+    async def get_channel(request, channel_id, operator_user, queryset=None):
+        if queryset is None:
+            queryset = Channel.objects.all()
+        # 操作者のチャネルメンバ・チーム管理者判定をチャネルと同じクエリで取得する
+        try:
+            channel = await with_channel_roles(queryset, operator_user).aget(
+                id=channel_id
+            )
+        except Channel.DoesNotExist:
+            msg = f"channel: id {channel_id} does not found"
+            raise NotFound(msg)
+        get_membership_resolver(request).prime_channel(channel, operator_user)
+        return channel
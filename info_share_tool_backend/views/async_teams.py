@@ -0,0 +1,120 @@
+from rest_framework import status
+from rest_framework.exceptions import ValidationError, NotFound
+
+from ..cache import serialize_teams
+from ..db import retry_on_busy
+from ..executors import run_sync
+from ..etags import etag_matches, make_etag
+from ..fieldsets import get_fieldset, only_selected
+from ..models import Team
+from ..pagination import KeysetPagination
+from ..permissions import (
+    TeamPermission,
+    get_membership_resolver,
+    get_operator_username,
+    with_team_roles,
+)
+from ..serializers import TeamSerializer, delete_team
+from .asynchronous import AsyncAPIView, json_response
+from .jobs import job_headers
+from .batch import parse_ids
+from .teams import TeamListView, get_teams
+
+
+def save_team(request, team=None):
+    """シリアライザで検証・保存し、シリアライズ結果と登録したジョブを返す"""
+    serializer = TeamSerializer(team, data=request.data, context={"request": request})
+    if not serializer.is_valid():
+        raise ValidationError(serializer.errors)
+    retry_on_busy(serializer.save)()
+    return serializer.data, serializer.job
+
+
+class AsyncTeamCreateView(AsyncAPIView):
+    async def get(self, request):
+        operator_user = get_operator_username(request)
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+        team_ids = parse_ids(request)
+        fieldset = get_fieldset(request, TeamSerializer)
+
+        data = await run_sync(get_teams, request, team_ids, operator_user, fieldset)
+
+        return json_response(data, status.HTTP_200_OK)
+
+    async def post(self, request):
+        data, _ = await run_sync(save_team, request)
+
+        return json_response(data, status.HTTP_200_OK)
+
+
+class AsyncTeamDetailView(AsyncAPIView):
+    permission_classes = [TeamPermission]
+
+    async def get(self, request, team_id):
+        operator_user = get_operator_username(request)
+        fieldset = get_fieldset(request, TeamSerializer)
+        queryset = only_selected(Team.objects.all(), fieldset, "version")
+        team = await self.get_team(request, team_id, operator_user, queryset)
+        await self.check_object_permissions(request, team)
+
+        # 変更がなければシリアライズせずに304を返す
+        etag = make_etag(team, fieldset)
+        if etag_matches(request, etag):
+            return json_response(None, status.HTTP_304_NOT_MODIFIED, {"ETag": etag})
+
+        context = {"request": request, "fieldset": fieldset}
+        data = (await run_sync(serialize_teams, [team], context=context))[0]
+
+        return json_response(data, status.HTTP_200_OK, {"ETag": etag})
+
+    async def put(self, request, team_id):
+        operator_user = get_operator_username(request)
+        team = await self.get_team(request, team_id, operator_user)
+
+        data, job = await run_sync(save_team, request, team)
+
+        return json_response(
+            data, status.HTTP_200_OK, {"ETag": make_etag(team), **job_headers(job)}
+        )
+
+    async def delete(self, request, team_id):
+        operator_user = get_operator_username(request)
+        team = await self.get_team(request, team_id, operator_user)
+        await self.check_object_permissions(request, team)
+
+        job = await run_sync(retry_on_busy(delete_team), team, operator_user)
+
+        return json_response({"job": job.pk}, status.HTTP_200_OK, job_headers(job))
+
+    @staticmethod
+    async def get_team(request, team_id, operator_user, queryset=None):
+        if queryset is None:
+            queryset = Team.objects.all()
+        # 操作者の管理者・メンバ判定をチームと同じクエリで取得する
+        try:
+            team = await with_team_roles(queryset, operator_user).aget(
+                id=team_id
+            )
+        except Team.DoesNotExist:
+            msg = f"team: id {team_id} does not found"
+            raise NotFound(msg)
+        get_membership_resolver(request).prime_team(team, operator_user)
+        return team
+
+
+class AsyncTeamListView(AsyncAPIView):
+    async def get(self, request):
+        fieldset = get_fieldset(request, TeamSerializer)
+        # 全文検索の利用可否の確認でクエリを発行することがあるため、スレッドで組み立てる
+        queryset, orders = await run_sync(TeamListView.build_queryset, request, fieldset)
+
+        # ソートキー+idのキーセットでページ分割する
+        paginator = KeysetPagination(orders)
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+
+        # キャッシュにないチームのみ先読みしてシリアライズする
+        context = {"request": request, "fieldset": fieldset}
+        data = await run_sync(serialize_teams, page, context=context)
+
+        return json_response(paginator.get_paginated_data(data), status.HTTP_200_OK)
@@ -0,0 +1,95 @@
+import io
+
+from django.http import HttpResponse, QueryDict
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from ..executors import run_sync
+from ..metrics import timer
+from ..renderers import FastJSONRenderer
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    """DRFのJSONRendererと同じ形式のレスポンスを返す"""
+    with timer("render"):
+        content = b"" if data is None else FastJSONRenderer().render(data)
+    return HttpResponse(
+        content, status=status_code, content_type="application/json", headers=headers
+    )
+
+
+class AsyncAPIView(View):
+    """
+    非同期のビュー
+    DRFのAPIViewと同じ形式でリクエストを解析し、例外をレスポンスに変換する
+    DjangoのHttpRequestに query_params と data を付与するため、
+    権限クラスやシリアライザは同期のビューと共通で使える
+    """
+
+    permission_classes = []
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # APIViewと同様にCSRFの検証を行わない
+        # (Django 4.2のcsrf_exemptは非同期のビューを同期の関数で包むため、属性のみ設定する)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.query_params = request.GET
+            request.data = self.parse_data(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(request, exc)
+
+    @staticmethod
+    def get_body_parser(content_type):
+        """
+        DEFAULT_PARSER_CLASSES のうち、ボディ全体を解析するパーサ(JSON・MessagePack)を返す
+        フォームはDjangoのHttpRequestで解析する
+        """
+        for parser_class in api_settings.DEFAULT_PARSER_CLASSES:
+            if issubclass(parser_class, (FormParser, MultiPartParser)):
+                continue
+            if parser_class.media_type == content_type:
+                return parser_class()
+        return None
+
+    def parse_data(self, request):
+        if request.method == "GET":
+            return {}
+        parser = self.get_body_parser(request.content_type)
+        if parser is not None:
+            if not request.body:
+                return {}
+            return parser.parse(io.BytesIO(request.body), request.content_type)
+        if request.method == "POST":
+            return request.POST
+        return QueryDict(request.body, encoding=request.encoding)
+
+    def handle_exception(self, request, exc):
+        response = exception_handler(exc, {"view": self, "request": request})
+        if response is None:
+            raise exc
+        headers = {
+            name: value
+            for name, value in response.items()
+            if name.lower() != "content-type"
+        }
+        return json_response(response.data, response.status_code, headers=headers)
+
+    async def check_object_permissions(self, request, obj):
+        """
+        権限クラスで確認する
+        判定が取り込み済みでないときはクエリを発行するため、スレッドで実行する
+        """
+        for permission_class in self.permission_classes:
+            permission = permission_class()
+            if not await run_sync(permission.has_object_permission, request, self, obj):
+                raise PermissionDenied(getattr(permission, "message", None))
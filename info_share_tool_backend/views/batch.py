@@ -0,0 +1,61 @@
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+
+# 1リクエストで取得できるidの最大数
+MAX_IDS = 100
+
+
+def parse_ids(request, max_ids=MAX_IDS):
+    """
+    クエリパラメタ ids(カンマ区切り、または複数指定)をidのリストにする
+    重複は除き、指定した順に返す
+    """
+    values = [
+        value
+        for param in request.GET.getlist("ids")
+        for value in param.split(",")
+        if value.strip()
+    ]
+    if not values:
+        raise ValidationError("ids is required")
+    try:
+        ids = list(dict.fromkeys(int(value) for value in values))
+    except ValueError:
+        raise ValidationError("ids must be integers")
+    if len(ids) > max_ids:
+        raise ValidationError(f"ids: up to {max_ids} ids are allowed")
+    return ids
+
+
+def partition(ids, objects, is_permitted, name):
+    """
+    idごとに取得したオブジェクトを参照できるものとエラーに分ける
+    参照できるオブジェクトのリスト(指定した順)と、idごとのエラーを返す
+    """
+    found = {obj.pk: obj for obj in objects}
+    permitted = []
+    errors = {}
+    for obj_id in ids:
+        obj = found.get(obj_id)
+        if obj is None:
+            errors[obj_id] = {
+                "status": status.HTTP_404_NOT_FOUND,
+                "detail": f"{name}: id {obj_id} does not found",
+            }
+        elif not is_permitted(obj):
+            errors[obj_id] = {
+                "status": status.HTTP_403_FORBIDDEN,
+                "detail": f"operator user has no permision for {name}: {obj_id}",
+            }
+        else:
+            permitted.append(obj)
+    return permitted, errors
+
+
+def batch_data(objects, data, errors):
+    """idごとのシリアライズ結果とエラーのレスポンス"""
+    return {
+        "results": {obj.pk: obj_data for obj, obj_data in zip(objects, data)},
+        "errors": errors,
+    }
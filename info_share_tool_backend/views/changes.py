@@ -0,0 +1,73 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from ..changes import compacted_seq, latest_seq, visible_changes
+from ..serializers import ChangeLogSerializer
+
+
+class ChangesGone(APIException):
+    """
+    since が圧縮した位置より前のとき
+    クライアントは全件を取得し直し、latest_seq を次の since にする
+    """
+
+    status_code = status.HTTP_410_GONE
+    default_detail = "changes before since are compacted; full sync is required"
+    default_code = "gone"
+
+    def __init__(self, latest_seq, compacted_seq):
+        super().__init__()
+        self.detail = {
+            "detail": self.detail,
+            "latest_seq": latest_seq,
+            "compacted_seq": compacted_seq,
+        }
+
+
+def changes_gone():
+    """現在の最新・圧縮した位置を含む410のエラーを返す"""
+    return ChangesGone(latest_seq(), compacted_seq())
+
+
+class ChangeListView(APIView):
+    """
+    操作者に関係するチーム・チャネル・所属の変更履歴
+    クライアントは next_since を保存し、次回はそれより後の変更のみ取得する
+    """
+
+    page_size = 100
+    max_page_size = 1000
+
+    def get(self, request):
+        operator_user = request.GET.get("operator_user")
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+
+        try:
+            since = int(request.GET.get("since", 0))
+            page_size = int(request.GET.get("page_size", self.page_size))
+        except ValueError:
+            raise ValidationError("since and page_size must be integers")
+        if since < 0 or page_size < 1:
+            raise ValidationError("since and page_size must be positive")
+        page_size = min(page_size, self.max_page_size)
+
+        # 圧縮で削除した履歴が必要なとき、差分では同期できない
+        if since < compacted_seq():
+            raise changes_gone()
+
+        # 1件多く取得して続きの有無を判定する
+        changes = list(visible_changes(operator_user, since)[: page_size + 1])
+        has_more = len(changes) > page_size
+        changes = changes[:page_size]
+
+        return Response(
+            {
+                "changes": ChangeLogSerializer(changes, many=True).data,
+                "next_since": changes[-1].seq if changes else since,
+                "has_more": has_more,
+            },
+            status=status.HTTP_200_OK,
+        )
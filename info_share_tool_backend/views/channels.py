@@ -1,93 +1,215 @@
 from django.db import transaction
+from django.db.models import F, prefetch_related_objects
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound, PermissionDenied
 
+from ..db import retry_on_busy
+from ..etags import etag_matches, make_etag, not_modified
+from ..fieldsets import get_fieldset, only_selected
 from ..models import Channel, User, ChannelMember, TeamAdministrator
-
-from ..serializers import ChannelSerializer
+from ..pagination import KeysetPagination
+from ..permissions import (
+    ChannelPermission,
+    TeamPermission,
+    get_membership_resolver,
+    get_operator_username,
+    with_channel_roles,
+)
+
+from ..serializers import ChannelSerializer, delete_channel
+from .batch import batch_data, parse_ids, partition
+from .teams import TeamDetailView
+
+
+# 項目を選択したときも取得するカラム(ETagと権限の判定に使う)
+CHANNEL_REQUIRED_FIELDS = ("version", "team")
+
+
+def get_channels(request, channel_ids, operator_user, fieldset=None):
+    """
+    複数のチャネルを取得する
+    チャネルメンバ判定は取得と同じ1クエリで行い、メンバは参照できるチャネルをまとめて先読みするため、
+    チャネルの件数に関わらずクエリ数が一定になる
+    """
+    resolver = get_membership_resolver(request)
+    queryset = only_selected(
+        Channel.objects.filter(pk__in=channel_ids), fieldset, *CHANNEL_REQUIRED_FIELDS
+    )
+    channels = list(with_channel_roles(queryset, operator_user))
+    for channel in channels:
+        resolver.prime_channel(channel, operator_user)
+    channels, errors = partition(
+        channel_ids,
+        channels,
+        lambda channel: resolver.is_channel_member(channel, operator_user),
+        "channel",
+    )
+    prefetch_related_objects(
+        channels, *ChannelSerializer.eager_loading_lookups(fieldset)
+    )
+    context = {"request": request, "fieldset": fieldset}
+    data = ChannelSerializer(channels, many=True, context=context).data
+    return batch_data(channels, data, errors)
 
 
 class ChannelCreateView(APIView):
+    def get(self, request):
+        """ids で指定した複数のチャネルを取得する。idごとに結果またはエラーを返す"""
+        operator_user = get_operator_username(request)
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+        channel_ids = parse_ids(request)
+        fieldset = get_fieldset(request, ChannelSerializer)
+
+        return Response(
+            get_channels(request, channel_ids, operator_user, fieldset),
+            status=status.HTTP_200_OK,
+        )
+
     @staticmethod
     def post(request):
-        serializer = ChannelSerializer(data=request.data)
+        serializer = ChannelSerializer(data=request.data, context={"request": request})
 
         if not serializer.is_valid():
             raise ValidationError(serializer.errors)
 
-        serializer.save()
+        retry_on_busy(serializer.save)()
 
         return Response(
             serializer.data,
             status=status.HTTP_200_OK,
         )
 
-class ChannelDetailView(APIView):
-    @staticmethod
-    def get(request, channel_id):
-        try:
-            channel = Channel.objects.get(id=channel_id)
-        except Channel.DoesNotExist:
-            msg = f"channel: id {channel_id} does not found"
-            raise NotFound(msg)
 
-        operator_user = request.GET.get("operator_user")
-        _operator_user = User.objects.filter(username=operator_user).first()
+class ChannelDetailView(APIView):
+    permission_classes = [ChannelPermission]
+
+    def get(self, request, channel_id):
+        operator_user = get_operator_username(request)
+        # 選択しなかった項目のカラムは取得しない
+        fieldset = get_fieldset(request, ChannelSerializer)
+        queryset = only_selected(
+            Channel.objects.all(), fieldset, *CHANNEL_REQUIRED_FIELDS
+        )
+        channel = self.get_channel(request, channel_id, operator_user, queryset)
+        self.check_object_permissions(request, channel)
 
-        members = [member.member for member in ChannelMember.objects.filter(channel=channel)]
-        refferer_users = members
-        if _operator_user not in refferer_users:
-            msg = f"operator user: {operator_user} has no permision for channel: {channel_id}"
-            raise PermissionDenied(msg)
+        # 変更がなければシリアライズせずに304を返す
+        etag = make_etag(channel, fieldset)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
-        serializer = ChannelSerializer(channel)
+        prefetch_related_objects(
+            [channel], *ChannelSerializer.eager_loading_lookups(fieldset)
+        )
+        serializer = ChannelSerializer(
+            channel, context={"request": request, "fieldset": fieldset}
+        )
 
         return Response(
             serializer.data,
             status=status.HTTP_200_OK,
+            headers={"ETag": etag},
         )
 
-    @staticmethod
-    def put(request, channel_id):
-        try:
-            channel = Channel.objects.get(id=channel_id)
-        except Channel.DoesNotExist:
-            msg = f"channel: id {channel_id} does not found"
-            raise NotFound(msg)
+    def put(self, request, channel_id):
+        operator_user = get_operator_username(request)
+        channel = self.get_channel(request, channel_id, operator_user)
 
-        serializer = ChannelSerializer(channel, data=request.data)
+        serializer = ChannelSerializer(channel, data=request.data, context={"request": request})
 
         if not serializer.is_valid():
             raise ValidationError(serializer.errors)
-        
-        serializer.save()
+
+        retry_on_busy(serializer.save)()
 
         return Response(
             serializer.data,
             status=status.HTTP_200_OK,
+            headers={"ETag": make_etag(channel)},
+        )
+
+    def delete(self, request, channel_id):
+        operator_user = get_operator_username(request)
+        channel = self.get_channel(request, channel_id, operator_user)
+        self.check_object_permissions(request, channel)
+
+        retry_on_busy(delete_channel)(channel)
+
+        return Response(
+            {},
+            status=status.HTTP_200_OK,
         )
 
     @staticmethod
-    def delete(request, channel_id):
+    def get_channel(request, channel_id, operator_user, queryset=None):
+        if queryset is None:
+            queryset = Channel.objects.all()
+        # 操作者のチャネルメンバ・チーム管理者判定をチャネルと同じクエリで取得する
         try:
-            channel = Channel.objects.get(id=channel_id)
+            channel = with_channel_roles(queryset, operator_user).get(id=channel_id)
         except Channel.DoesNotExist:
             msg = f"channel: id {channel_id} does not found"
             raise NotFound(msg)
+        get_membership_resolver(request).prime_channel(channel, operator_user)
+        return channel
 
-        operator_user = request.data.get("operator_user")
-        _operator_user = User.objects.filter(username=operator_user).first()
 
-        admins = [admin.admin for admin in TeamAdministrator.objects.filter(team=channel.team)]
-        if _operator_user not in admins:
-            msg = f"operator: {operator_user} has no permission"
-            raise PermissionDenied(msg)
+def paginate_channels(request, queryset, view, key="id"):
+    """
+    チャネルをidのキーセットでページ分割したレスポンスを返す
+    order に DESC を指定すると作成の新しい順になる
+    (changed_at は時刻のみで日付をまたぐと順序が変わるため、キーにしない)
+    key にはidと同じ値(一意)の、インデックスの順に並ぶカラムを指定できる
+    """
+    fieldset = get_fieldset(request, ChannelSerializer)
+    queryset = only_selected(queryset, fieldset, *CHANNEL_REQUIRED_FIELDS)
 
-        channel.delete()
+    order = "-" if request.GET.get("order") == "DESC" else ""
+    paginator = KeysetPagination([order + key], unique=True)
+    page = paginator.paginate_queryset(
+        ChannelSerializer.setup_eager_loading(queryset, fieldset), request, view=view
+    )
 
-        return Response(
-            {},
-            status=status.HTTP_200_OK,
+    serializer = ChannelSerializer(
+        page, many=True, context={"request": request, "fieldset": fieldset}
+    )
+
+    return paginator.get_paginated_response(serializer.data)
+
+
+class ChannelListView(APIView):
+    """操作者がメンバのチャネルの一覧"""
+
+    def get(self, request):
+        operator_user = request.GET.get("operator_user")
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+
+        # (member, channel) のインデックスを操作者のチャネルのidの順に範囲検索する
+        # チャネルのidではなく所属の行のidでソートし、一時的なソートをしない
+        queryset = Channel.objects.filter(members=operator_user).annotate(
+            member_channel_id=F("channelmember__channel_id")
         )
+
+        return paginate_channels(
+            request, queryset, view=self, key="member_channel_id"
+        )
+
+
+class TeamChannelListView(APIView):
+    """チームのチャネルのうち、操作者がメンバのチャネルの一覧"""
+
+    permission_classes = [TeamPermission]
+
+    def get(self, request, team_id):
+        operator_user = get_operator_username(request)
+        team = TeamDetailView.get_team(request, team_id, operator_user)
+        self.check_object_permissions(request, team)
+
+        # (team, id) のインデックスの順に取得し、メンバのチャネルに絞り込む
+        queryset = Channel.objects.filter(team=team, members=operator_user)
+
+        return paginate_channels(request, queryset, view=self)
@@ -0,0 +1,110 @@
+import asyncio
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from ..changes import compacted_seq, latest_seq, user_team_ids, visible_changes
+from ..events import get_broker
+from ..executors import run_sync
+from ..models import ChangeLog
+from ..renderers import FastJSONRenderer
+from ..serializers import ChangeLogSerializer
+from .asynchronous import AsyncAPIView
+from .changes import changes_gone
+
+
+def format_event(change):
+    """変更履歴をServer-Sent Eventsの1イベントにする。idは seq"""
+    data = FastJSONRenderer().render(ChangeLogSerializer(change).data).decode()
+    return f"id: {change.seq}\nevent: {change.object_type}\ndata: {data}\n\n"
+
+
+class AsyncEventStreamView(AsyncAPIView):
+    """
+    操作者に関係するチーム・チャネルの変更をServer-Sent Eventsで配信する
+    変更の通知を受けるたびに、変更履歴から操作者に見える変更を取得して送るため、
+    送る内容は /changes と同じになる
+    再接続時は Last-Event-ID (送った変更の seq)から再開する
+    """
+
+    page_size = 100
+    # プロキシに接続を切られないよう、変更がなくても定期的にコメントを送る
+    keepalive_interval = getattr(settings, "EVENT_KEEPALIVE_INTERVAL", 15)
+    # Django 4.2はクライアントの切断をストリームに伝えないため、一定時間で終了する
+    # (EventSourceは retry の待ち時間のあと Last-Event-ID を付けて再接続する)
+    max_duration = getattr(settings, "EVENT_STREAM_MAX_DURATION", 300)
+    retry = 1000
+
+    async def get(self, request):
+        operator_user = request.GET.get("operator_user")
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+
+        since = request.headers.get("Last-Event-ID", request.GET.get("since"))
+        if since is None:
+            # 指定がなければ接続後の変更から送る
+            since = await run_sync(latest_seq)
+        else:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ValidationError("since must be an integer")
+        if since < await run_sync(compacted_seq):
+            raise await run_sync(changes_gone)
+
+        team_ids = await run_sync(user_team_ids, operator_user)
+        response = StreamingHttpResponse(
+            self.stream(operator_user, since, team_ids),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # プロキシでバッファリングしない
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, username, since, team_ids):
+        # 取得と購読の間の変更を取りこぼさないよう、先に購読する
+        with get_broker().subscribe() as subscription:
+            yield f"retry: {self.retry}\n\n"
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.max_duration
+            wake = True
+            while loop.time() < deadline:
+                if wake:
+                    changes = await run_sync(self.fetch_changes, username, since)
+                    for change in changes:
+                        self.update_team_ids(team_ids, change)
+                        since = change.seq
+                        yield format_event(change)
+                    if len(changes) == self.page_size:
+                        continue
+
+                try:
+                    events = await asyncio.wait_for(
+                        subscription.get(),
+                        min(self.keepalive_interval, deadline - loop.time()),
+                    )
+                except asyncio.TimeoutError:
+                    if loop.time() >= deadline:
+                        break
+                    wake = False
+                    yield ": keepalive\n\n"
+                    continue
+                # 関係のない通知では変更履歴を取得しない
+                wake = events is None or any(
+                    event.concerns(team_ids, username) for event in events
+                )
+
+    def fetch_changes(self, username, since):
+        return list(visible_changes(username, since)[: self.page_size])
+
+    @staticmethod
+    def update_team_ids(team_ids, change):
+        """所属するチームの変更に合わせて、通知を受け取るチームを更新する"""
+        if change.object_type != ChangeLog.TEAM:
+            return
+        if change.action == ChangeLog.JOINED:
+            team_ids.add(change.object_id)
+        elif change.action in (ChangeLog.LEFT, ChangeLog.DELETED):
+            team_ids.discard(change.object_id)
@@ -0,0 +1,31 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+
+from ..models import Job
+from ..serializers import JobSerializer
+
+
+def job_headers(job):
+    """登録したジョブの状態を確認するためのヘッダ"""
+    if job is None:
+        return {}
+    return {"Job-Id": str(job.pk)}
+
+
+class JobDetailView(APIView):
+    """バックグラウンドのジョブの状態。ジョブを登録した操作者のみ参照できる"""
+
+    def get(self, request, job_id):
+        operator_user = request.GET.get("operator_user")
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+
+        # 他の操作者のジョブは存在しないものとして扱う
+        try:
+            job = Job.objects.get(pk=job_id, operator=operator_user)
+        except Job.DoesNotExist:
+            raise NotFound(f"job: id {job_id} does not found")
+
+        return Response(JobSerializer(job).data, status=status.HTTP_200_OK)
@@ -0,0 +1,13 @@
+from django.http import HttpResponse
+from django.views import View
+
+from ..metrics import render_metrics
+
+
+class MetricsView(View):
+    """ルートごとの計測値をPrometheusのテキスト形式で返す"""
+
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -5,20 +5,69 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound, PermissionDenied
 
+from .. import search
+from ..cache import serialize_teams
+from ..db import retry_on_busy
+from ..etags import etag_matches, make_etag, not_modified
+from ..fieldsets import get_fieldset, only_selected
 from ..models import Team, TeamAdministrator, TeamMember, User
-
-from ..serializers import TeamSerializer
+from ..pagination import KeysetPagination
+from ..permissions import (
+    TeamPermission,
+    get_membership_resolver,
+    get_operator_username,
+    member_team_ids,
+    with_team_roles,
+)
+
+from ..serializers import TeamSerializer, delete_team
+from .batch import batch_data, parse_ids, partition
+from .jobs import job_headers
+
+
+def get_teams(request, team_ids, operator_user, fieldset=None):
+    """
+    複数のチームを取得する
+    所属判定は取得と同じ1クエリで行い、シリアライズは参照できるチームをまとめて行うため、
+    チームの件数に関わらずクエリ数が一定になる
+    """
+    resolver = get_membership_resolver(request)
+    queryset = only_selected(Team.objects.filter(pk__in=team_ids), fieldset, "version")
+    teams = list(with_team_roles(queryset, operator_user))
+    for team in teams:
+        resolver.prime_team(team, operator_user)
+    teams, errors = partition(
+        team_ids,
+        teams,
+        lambda team: resolver.is_team_referrer(team, operator_user),
+        "team",
+    )
+    data = serialize_teams(teams, context={"request": request, "fieldset": fieldset})
+    return batch_data(teams, data, errors)
 
 
 class TeamCreateView(APIView):
+    def get(self, request):
+        """ids で指定した複数のチームを取得する。idごとに結果またはエラーを返す"""
+        operator_user = get_operator_username(request)
+        if operator_user is None:
+            raise ValidationError("operator_user is required")
+        team_ids = parse_ids(request)
+        fieldset = get_fieldset(request, TeamSerializer)
+
+        return Response(
+            get_teams(request, team_ids, operator_user, fieldset),
+            status=status.HTTP_200_OK,
+        )
+
     @staticmethod
     def post(request):
-        serializer = TeamSerializer(data=request.data)
+        serializer = TeamSerializer(data=request.data, context={"request": request})
 
         if not serializer.is_valid():
             raise ValidationError(serializer.errors)
 
-        serializer.save()
+        retry_on_busy(serializer.save)()
 
         return Response(
             serializer.data,
@@ -27,86 +76,120 @@ class TeamCreateView(APIView):
 
 
 class TeamDetailView(APIView):
-    @staticmethod
-    def get(request, team_id):
-        try:
-            team = Team.objects.get(id=team_id)
-        except Team.DoesNotExist:
-            msg = f"team: id {team_id} does not found"
-            raise NotFound(msg)
-
-        operator_user = request.GET.get("operator_user")
-        _operator_user = User.objects.filter(username=operator_user).first()
-
-        admins = [admin.admin for admin in TeamAdministrator.objects.filter(team=team)]
-        members = [member.member for member in TeamMember.objects.filter(team=team)]
-        refferer_users = [*admins, *members]
-        if _operator_user not in refferer_users:
-            msg = f"operator user: {operator_user} has no permision for team: {team_id}"
-            raise PermissionDenied(msg)
-
-        serializer = TeamSerializer(team)
+    permission_classes = [TeamPermission]
+
+    def get(self, request, team_id):
+        operator_user = get_operator_username(request)
+        # 選択しなかった項目のカラムは取得しない
+        fieldset = get_fieldset(request, TeamSerializer)
+        queryset = only_selected(Team.objects.all(), fieldset, "version")
+        team = self.get_team(request, team_id, operator_user, queryset)
+        self.check_object_permissions(request, team)
+
+        # 変更がなければシリアライズせずに304を返す
+        etag = make_etag(team, fieldset)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        # シリアライズ結果はバージョンごとにキャッシュする
+        data = serialize_teams(
+            [team], context={"request": request, "fieldset": fieldset}
+        )[0]
 
         return Response(
-            serializer.data,
+            data,
             status=status.HTTP_200_OK,
+            headers={"ETag": etag},
         )
 
-    @staticmethod
-    def put(request, team_id):
-        try:
-            team = Team.objects.get(id=team_id)
-        except Team.DoesNotExist:
-            msg = f"team: id {team_id} does not found"
-            raise NotFound(msg)
+    def put(self, request, team_id):
+        operator_user = get_operator_username(request)
+        team = self.get_team(request, team_id, operator_user)
 
-        serializer = TeamSerializer(team, data=request.data)
+        serializer = TeamSerializer(team, data=request.data, context={"request": request})
 
         if not serializer.is_valid():
             raise ValidationError(serializer.errors)
         try:
-            serializer.save()
+            retry_on_busy(serializer.save)()
         except Exception as e:
             raise e
 
         return Response(
             serializer.data,
             status=status.HTTP_200_OK,
+            headers={"ETag": make_etag(team), **job_headers(serializer.job)},
         )
 
-    @staticmethod
-    def delete(request, team_id):
-        try:
-            team = Team.objects.get(id=team_id)
-        except Team.DoesNotExist:
-            msg = f"team: id {team_id} does not found"
-            raise NotFound(msg)
+    def delete(self, request, team_id):
+        operator_user = get_operator_username(request)
+        team = self.get_team(request, team_id, operator_user)
+        self.check_object_permissions(request, team)
 
-        operator_user = request.data.get("operator_user")
-        _operator_user = User.objects.filter(username=operator_user).first()
-
-        admins = [admin.admin for admin in TeamAdministrator.objects.filter(team=team)]
-        if _operator_user not in admins:
-            msg = f"operator: {operator_user} has no permission"
-            raise PermissionDenied(msg)
-
-        team.delete()
+        job = retry_on_busy(delete_team)(team, operator_user)
 
         return Response(
-            {},
+            {"job": job.pk},
             status=status.HTTP_200_OK,
+            headers=job_headers(job),
         )
 
+    @staticmethod
+    def get_team(request, team_id, operator_user, queryset=None):
+        if queryset is None:
+            queryset = Team.objects.all()
+        # 操作者の管理者・メンバ判定をチームと同じクエリで取得する
+        try:
+            team = with_team_roles(queryset, operator_user).get(id=team_id)
+        except Team.DoesNotExist:
+            msg = f"team: id {team_id} does not found"
+            raise NotFound(msg)
+        get_membership_resolver(request).prime_team(team, operator_user)
+        return team
+
 
 class TeamListView(APIView):
-    @staticmethod
-    def get(request):
+    # ソートに指定できる項目
+    sort_fields = (
+        "changed_at",
+        "created_at",
+        "name",
+        "description",
+        "id",
+        "relevance",
+        "member_count",
+        "admin_count",
+        "channel_count",
+    )
+
+    def get(self, request):
+        fieldset = get_fieldset(request, TeamSerializer)
+        queryset, orders = self.build_queryset(request, fieldset)
+
+        # ソートキー+idのキーセットでページ分割する
+        paginator = KeysetPagination(orders)
+        page = paginator.paginate_queryset(queryset, request, view=self)
+
+        # キャッシュにないチームのみ先読みしてシリアライズする
+        data = serialize_teams(page, context={"request": request, "fieldset": fieldset})
+
+        return paginator.get_paginated_response(data)
+
+    @classmethod
+    def build_queryset(cls, request, fieldset=None):
+        """
+        クエリパラメタから一覧のクエリセットとソートキーを組み立てる
+        項目を選択したときは、選択した項目とソートキーのカラムのみ取得する
+        非同期のビューと共通で使う
+        """
         operator_user = request.GET.get("operator_user")
-        _operator_user = User.objects.filter(username=operator_user).first()
 
         sort = request.GET.get("sort")
         if sort is None:
             sort = "changed_at"
+        if sort not in cls.sort_fields:
+            msg = f"sort: {sort} is not supported"
+            raise ValidationError(msg)
         order = request.GET.get("order")
         if order == "ASC":
             _order = ""
@@ -117,25 +200,30 @@ class TeamListView(APIView):
 
         search_keyword = request.GET.get("search_keyword")
 
-        conditions = []
-        admins_condition = Q(administrators=_operator_user)
-        members_condition = Q(members=_operator_user)
-        conditions.append(admins_condition | members_condition)
+        # 全チームを所属判定するのではなく、所属のテーブルから操作者のチームを引く
+        conditions = [Q(pk__in=member_team_ids(operator_user))]
 
         if search_keyword is not None:
-            name_search_condition = Q(name__icontains=search_keyword)
-            description_search_condition = Q(description__icontains=search_keyword)
-            conditions.append(name_search_condition | description_search_condition)
-
-        queryset = Team.objects.filter(*conditions)
+            # 全文検索インデックスが使えないときは部分一致で検索する
+            conditions.append(search.search_condition(search_keyword))
+        elif sort == "relevance":
+            msg = "sort: relevance requires search_keyword"
+            raise ValidationError(msg)
+
+        # 所属判定は取得したチームの分だけ付与する
+        queryset = with_team_roles(Team.objects.filter(*conditions), operator_user)
         orders = ["changed_at"]
-        if order is not None:
+        if sort == "relevance":
+            # 関連度は小さいほど高いため、ASCで関連度の高い順になる
+            queryset = queryset.annotate(
+                search_rank=search.rank_expression(search_keyword)
+            )
+            orders = [_order + "search_rank"]
+        elif order is not None and sort != "changed_at":
             orders.insert(0, _order + sort)
-        queryset = queryset.order_by(*orders)
-
-        serializer = TeamSerializer(queryset.distinct(), many=True)
-
-        return Response(
-            serializer.data,
-            status=status.HTTP_200_OK,
+        elif order is not None:
+            orders = [_order + sort]
+        queryset = only_selected(
+            queryset, fieldset, "version", *(key.lstrip("-") for key in orders)
         )
+        return queryset, orders
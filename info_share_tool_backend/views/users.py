@@ -1,33 +1,35 @@
-from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound
 
+from ..db import retry_on_busy
 from ..models import User
 
 from ..serializers import RegisterSerializer
 
 
+@retry_on_busy
+def register_user(serializer):
+    # 既存ユーザの確認
+    username = serializer.validated_data["username"]
+    if User.objects.filter(username=username).exists():
+        msg = f"username: {username} was already used"
+        raise ValidationError(msg)
+
+    serializer.save()
+
+
 class UserRegisterView(APIView):
     @staticmethod
     def post(request):
+        # 検証(パスワードのハッシュ化を含む)は再試行するトランザクションの外で行う
         serializer = RegisterSerializer(data=request.data)
 
         if not serializer.is_valid():
             raise ValidationError()
 
-        try:
-            with transaction.atomic():
-                # 既存ユーザの確認
-                username = serializer.validated_data["username"]
-                if User.objects.filter(username=username).exists():
-                    msg = f"username: {username} was already used"
-                    raise ValidationError(msg)
-
-                serializer.save()
-        except Exception as e:
-            raise e
+        register_user(serializer)
 
         return Response(
             serializer.data,